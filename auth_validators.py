@@ -0,0 +1,118 @@
+"""
+Auth Validators - Input validation and email confirmation tokens for auth routes
+"""
+
+import os
+import re
+import hmac
+import hashlib
+import time
+from typing import Any, Dict, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Key for confirmation token digests. It must be identical in every worker and instance,
+# or a link minted by one process fails to verify in another (BLAKE2b accepts keys up to 64 bytes)
+_TOKEN_SECRET: str = os.environ.get('EMAIL_CONFIRMATION_SECRET_KEY', '')
+if not _TOKEN_SECRET:
+    raise RuntimeError("EMAIL_CONFIRMATION_SECRET_KEY is not set; it is required to sign email confirmation links")
+_TOKEN_KEY: bytes = _TOKEN_SECRET.encode()[:64]
+
+
+def validate_email(email: str) -> bool:
+    """Validate email format (local@domain.tld, no whitespace, exactly one @)"""
+    at = email.find('@')
+    if at <= 0 or email.find('@', at + 1) != -1:
+        return False
+    # The domain needs a dot with at least one character on each side
+    dot = email.find('.', at + 2)
+    if dot < 0 or dot == len(email) - 1:
+        return False
+    for ch in email:
+        if ch.isspace():
+            return False
+    return True
+
+def validate_password(password: str) -> Tuple[bool, str]:
+    """Validate password strength"""
+    if len(password) < 6:
+        return False, "Password must be at least 6 characters long"
+
+    checks = {
+        'uppercase': re.search(r'[A-Z]', password),
+        'lowercase': re.search(r'[a-z]', password),
+        'number': re.search(r'\d', password),
+        'special': re.search(r'[!@#$%^&*(),.?":{}|<>]', password)
+    }
+
+    # Require at least 3 out of 4 criteria for medium strength
+    met_criteria = sum(1 for check in checks.values() if check)
+    if met_criteria >= 3:
+        return True, "Password meets requirements"
+
+    missing = [
+        name for name, check in (
+            ("uppercase letter", checks['uppercase']),
+            ("lowercase letter", checks['lowercase']),
+            ("number", checks['number']),
+            ("special character", checks['special'])
+        ) if not check
+    ]
+    return False, f"Password needs: {', '.join(missing[:2])}"
+
+def validate_username(username: str) -> Tuple[bool, str]:
+    """Validate username"""
+    if len(username) < 3:
+        return False, "Username must be at least 3 characters long"
+    if len(username) > 20:
+        return False, "Username must be no more than 20 characters long"
+    # ASCII letters, digits and underscores only; str methods keep the scan in C
+    stripped = username.replace('_', '')
+    if not username.isascii() or (stripped and not stripped.isalnum()):
+        return False, "Username can only contain letters, numbers, and underscores"
+    return True, "Username is valid"
+
+def _confirmation_digest(registration_data: Dict[str, Any], timestamp: bytes) -> str:
+    """Keyed BLAKE2b digest over email, username and timestamp"""
+    msg = b':'.join((
+        registration_data['email'].encode(),
+        registration_data['username'].encode(),
+        timestamp
+    ))
+    return hashlib.blake2b(msg, key=_TOKEN_KEY, digest_size=16).hexdigest()
+
+def generate_email_confirmation_token(email: str, registration_data: Dict[str, Any]) -> str:
+    """Generate secure token for email confirmation"""
+    timestamp = str(int(time.time()))
+    token_hash = _confirmation_digest(registration_data, timestamp.encode())
+    return f"{timestamp}.{token_hash}"
+
+def verify_email_confirmation_token(token: str, registration_data: Dict[str, Any], max_age_hours: int = 24) -> Tuple[bool, str]:
+    """Verify email confirmation token (valid for 24 hours)"""
+    try:
+        parts = token.split('.')
+        if len(parts) != 2:
+            return False, "Invalid token format"
+
+        timestamp_str, token_hash = parts
+        timestamp = int(timestamp_str)
+
+        # Check if token has expired
+        current_time = int(time.time())
+        if current_time - timestamp > (max_age_hours * 3600):
+            return False, "Token has expired"
+
+        # Verify token hash using registration data
+        if not registration_data:
+            return False, "Invalid token data"
+
+        expected_hash = _confirmation_digest(registration_data, timestamp_str.encode())
+
+        if not hmac.compare_digest(token_hash, expected_hash):
+            return False, "Invalid token signature"
+
+        return True, "Token is valid"
+
+    except (ValueError, IndexError, KeyError) as e:
+        return False, f"Invalid token: {e}"
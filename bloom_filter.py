@@ -0,0 +1,68 @@
+"""
+TruthGuard in-process Bloom filter
+Thread-safe, scalable set-membership filter: no false negatives, a bounded false-positive rate.
+"""
+
+import hashlib
+import math
+import threading
+
+
+class _FixedBloomFilter:
+    """Bloom filter sized for `capacity` items at `error_rate` false positives"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest):
+        # Double hashing: position_i = h1 + i * h2
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, digest):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class BloomFilter:
+    """
+    Scalable Bloom filter for string keys.
+    When the current filter is full a new one twice as large (with a tighter error rate) is added,
+    so the overall false-positive rate stays below error_rate however many keys are added.
+    """
+
+    def __init__(self, initial_capacity=100000, error_rate=0.001):
+        self.error_rate = error_rate
+        self._filters = [_FixedBloomFilter(initial_capacity, error_rate / 2)]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+
+    def add(self, key):
+        """Add a key to the filter"""
+        digest = self._digest(key)
+        with self._lock:
+            current = self._filters[-1]
+            if current.count >= current.capacity:
+                current = _FixedBloomFilter(current.capacity * 2, self.error_rate / 2 ** (len(self._filters) + 1))
+                self._filters.append(current)
+            current.add(digest)
+
+    def __contains__(self, key):
+        """False means the key was never added; True means it probably was"""
+        digest = self._digest(key)
+        return any(digest in bloom for bloom in self._filters)
+
+    def __len__(self):
+        return sum(bloom.count for bloom in self._filters)
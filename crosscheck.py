@@ -3,8 +3,10 @@ import logging
 import re
 import json
 import requests
+from requests.adapters import HTTPAdapter
 from urllib.parse import urlparse
 from google import genai
+from helpers import gemini_semaphore
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +48,10 @@ def initialize_gemini_client():
 # Initialize client only once
 initialize_gemini_client()
 
+# Shared HTTP session so Custom Search calls reuse keep-alive connections instead of a new TLS handshake each
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
 # Configuration
 MAX_RESULTS    = 5      # how many domains to return
 SIM_THRESHOLD  = 60     # minimum similarity percentage
@@ -110,7 +116,7 @@ class CrossChecker:
         }
         
         try:
-            resp = requests.get(url, params=params, timeout=10)
+            resp = http_session.get(url, params=params, timeout=10)
             resp.raise_for_status()
             items = resp.json().get("items", []) or []
         except requests.exceptions.HTTPError as e:
@@ -176,10 +182,11 @@ Respond in JSON with keys:
 }}
 """
         try:
-            response = self.similarity_client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt
-            )
+            with gemini_semaphore:
+                response = self.similarity_client.models.generate_content(
+                    model="gemini-2.5-flash",
+                    contents=prompt
+                )
             
             if not response or not response.text:
                 return 0, "No response from Gemini"
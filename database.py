@@ -5,11 +5,20 @@ Direct Supabase connection for the fact-checking application database.
 
 import os
 import json
+import base64
+import hashlib
+import re
+import queue
+import atexit
+import threading
+import time
 import traceback
 from datetime import datetime, timezone, timedelta
 from typing import Optional, Dict, List, Any, Union
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from ttl_cache import TTLCache
+from bloom_filter import BloomFilter
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +34,37 @@ SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 # Global Supabase client
 supabase: Optional[Client] = None
 
+# Columns the history listing may be ordered by
+HISTORY_SORT_COLUMNS = frozenset(('created_at', 'title', 'factuality_score', 'classification'))
+
+# History statistics keyed by user_id (or 'global'); cleared when articles are added or deleted
+STATISTICS_CACHE_TTL = 60
+_statistics_cache = TTLCache(ttl=STATISTICS_CACHE_TTL)
+
+# Article detail payloads keyed by article id; cleared when the article is deleted
+ARTICLE_DETAILS_CACHE_TTL = 300
+_article_details_cache = TTLCache(ttl=ARTICLE_DETAILS_CACHE_TTL)
+
+# Active user rows keyed by user id; cleared whenever the user row is updated
+USER_CACHE_TTL = 60
+_user_cache = TTLCache(ttl=USER_CACHE_TTL)
+
+# Admin audit rows waiting to be written; a background thread inserts them in batches
+ADMIN_LOG_BATCH_SIZE = 100
+ADMIN_LOG_FLUSH_INTERVAL = 0.5
+_admin_log_queue = queue.Queue()
+_admin_log_writer = None
+_admin_log_writer_lock = threading.Lock()
+_ADMIN_LOG_STOP = object()
+
+# Content hashes and links of saved articles, so most new submissions skip the duplicate lookup.
+# Loaded in the background on first use, then topped up with newer rows every refresh interval.
+ARTICLE_BLOOM_REFRESH_INTERVAL = 30
+ARTICLE_BLOOM_BATCH_SIZE = 1000
+_article_bloom = BloomFilter(initial_capacity=100000, error_rate=0.001)
+_article_bloom_state = {'last_id': 0, 'refreshed_at': None, 'loading': False}
+_article_bloom_lock = threading.Lock()
+
 # ---------- Helper Functions ----------
 
 def _coerce_text(value):
@@ -48,6 +88,132 @@ def _coerce_text(value):
     return json.dumps(value, ensure_ascii=False)
 
 
+def encode_history_cursor(created_at, article_id):
+    """Encode a history keyset position as an opaque URL-safe cursor"""
+    raw = f"{created_at}|{article_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+_ISO_FRACTION_RE = re.compile(r'\.(\d+)')
+
+
+def _parse_iso_timestamp(value):
+    """datetime.fromisoformat that also accepts a trailing Z and 1-9 fractional digits (as PostgREST emits)"""
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    value = _ISO_FRACTION_RE.sub(lambda match: '.' + match.group(1)[:6].ljust(6, '0'), value, count=1)
+    return datetime.fromisoformat(value)
+
+
+def decode_history_cursor(cursor):
+    """
+    Decode a history cursor into (created_at, article_id); raises ValueError if malformed.
+    created_at must be an ISO timestamp, since it is embedded in a quoted PostgREST filter.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, article_id = raw.rsplit('|', 1)
+        _parse_iso_timestamp(created_at)
+        return created_at, int(article_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def _postgrest_quote(value):
+    """Double-quote a value for use inside a PostgREST or_/and_ filter"""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _apply_history_filters(query, search='', classification='', input_type='', user_id=None):
+    """Apply the shared history listing filters to an articles query"""
+    if user_id:
+        query = query.eq('user_id', user_id)
+    
+    if search:
+        # Use text search on multiple fields
+        search_query = f"title.ilike.*{search}*,content.ilike.*{search}*,summary.ilike.*{search}*"
+        query = query.or_(search_query)
+    
+    if classification:
+        query = query.eq('classification', classification)
+    
+    if input_type:
+        query = query.eq('input_type', input_type)
+    
+    return query
+
+
+def _format_history_article(article):
+    """Convert an articles row into the shape returned by the history API"""
+    return {
+        'id': article['id'],
+        'title': article['title'],
+        'summary': article['summary'],
+        'classification': article['classification'],
+        'classification_score': article['factuality_score'] / 100.0 if article['factuality_score'] else 0,
+        'input_type': article['input_type'],
+        'original_url': article['link'],
+        'created_at': article['created_at'],
+        'content': article['content'],
+        'factuality_level': article['factuality_level'],
+        'factuality_description': article['factuality_description'],
+        'user_id': article['user_id']
+    }
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def compute_content_hash(link, content):
+    """
+    Canonical hash of an analyzed piece of content: its URL (if any) and the first 500
+    characters of its preview, lower-cased with whitespace collapsed.
+    Stored in articles.content_hash so duplicate checks are a single indexed lookup.
+    """
+    normalized = _WHITESPACE_RE.sub(' ', f"{link or ''}|{(content or '')[:500]}".lower()).strip()
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+
+def _add_article_to_bloom(link, content_hash):
+    """Record a saved article's content hash and link in the duplicate-check Bloom filter"""
+    if content_hash:
+        _article_bloom.add(f"hash:{content_hash}")
+    if link:
+        _article_bloom.add(f"link:{link}")
+
+def _refresh_article_bloom():
+    """Add articles newer than the last one seen to the Bloom filter (caller holds _article_bloom_lock)"""
+    client = get_supabase_client()
+    last_id = _article_bloom_state['last_id']
+    while True:
+        rows = client.table('articles').select('id, link, content_hash').gt('id', last_id).order('id').limit(ARTICLE_BLOOM_BATCH_SIZE).execute().data or []
+        
+        # Rows saved before content hashes existed get theirs computed from the content
+        unhashed_ids = [row['id'] for row in rows if not row.get('content_hash')]
+        contents = {}
+        if unhashed_ids:
+            content_rows = client.table('articles').select('id, content').in_('id', unhashed_ids).execute().data or []
+            contents = {row['id']: row['content'] for row in content_rows}
+        
+        for row in rows:
+            content_hash = row.get('content_hash') or compute_content_hash(row.get('link'), contents.get(row['id']))
+            _add_article_to_bloom(row.get('link'), content_hash)
+            last_id = row['id']
+        _article_bloom_state['last_id'] = last_id
+        
+        if len(rows) < ARTICLE_BLOOM_BATCH_SIZE:
+            break
+    _article_bloom_state['refreshed_at'] = time.monotonic()
+
+def _load_article_bloom():
+    """Initial Bloom filter load, run on a background thread"""
+    try:
+        with _article_bloom_lock:
+            _refresh_article_bloom()
+        print(f"✅ Article duplicate filter loaded with {len(_article_bloom)} keys")
+    except Exception as e:
+        print(f"❌ Error loading article duplicate filter: {e}")
+    finally:
+        _article_bloom_state['loading'] = False
+
 def get_philippine_time():
     """Get current Philippine time"""
     return datetime.now(PHILIPPINE_TZ)
@@ -156,6 +322,70 @@ def _handle_insert_with_retry(client, table_name, data, max_retries=3):
                     
     return None
 
+def _write_admin_logs(rows):
+    """Insert a batch of admin_logs rows in a single request"""
+    if not rows:
+        return
+    try:
+        get_supabase_client().table('admin_logs').insert(rows).execute()
+    except Exception as e:
+        print(f"❌ Error writing {len(rows)} admin log entries: {e}")
+
+def _admin_log_worker():
+    """Drain the admin log queue, writing up to ADMIN_LOG_BATCH_SIZE rows every ADMIN_LOG_FLUSH_INTERVAL seconds"""
+    while True:
+        row = _admin_log_queue.get()
+        if row is _ADMIN_LOG_STOP:
+            return
+        batch = [row]
+        deadline = time.monotonic() + ADMIN_LOG_FLUSH_INTERVAL
+        stop = False
+        while len(batch) < ADMIN_LOG_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                row = _admin_log_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if row is _ADMIN_LOG_STOP:
+                stop = True
+                break
+            batch.append(row)
+        _write_admin_logs(batch)
+        if stop:
+            return
+
+def _ensure_admin_log_writer():
+    """Start the admin log writer thread on first use"""
+    global _admin_log_writer
+    with _admin_log_writer_lock:
+        if _admin_log_writer is None or not _admin_log_writer.is_alive():
+            _admin_log_writer = threading.Thread(target=_admin_log_worker, name='admin-log-writer', daemon=True)
+            _admin_log_writer.start()
+
+def flush_admin_logs(timeout=5):
+    """Stop the writer thread and write every queued admin log entry (runs at interpreter exit)"""
+    with _admin_log_writer_lock:
+        writer = _admin_log_writer
+    if writer is not None and writer.is_alive():
+        _admin_log_queue.put(_ADMIN_LOG_STOP)
+        writer.join(timeout)
+    
+    # Anything the writer didn't get to is written synchronously
+    rows = []
+    while True:
+        try:
+            row = _admin_log_queue.get_nowait()
+        except queue.Empty:
+            break
+        if row is not _ADMIN_LOG_STOP:
+            rows.append(row)
+    for start in range(0, len(rows), ADMIN_LOG_BATCH_SIZE):
+        _write_admin_logs(rows[start:start + ADMIN_LOG_BATCH_SIZE])
+
+atexit.register(flush_admin_logs)
+
 
 class DatabaseService:
     """
@@ -238,6 +468,7 @@ class DatabaseService:
                 'title': title,
                 'link': link,
                 'content': content,
+                'content_hash': compute_content_hash(link, content),
                 'summary': summary,
                 'input_type': input_type,
                 'analysis_date': get_philippine_time().isoformat(),
@@ -266,6 +497,8 @@ class DatabaseService:
             
             article_id = article_result['id']
             print(f"✅ Article saved with ID: {article_id}")
+            cls.invalidate_statistics_cache(user_id)
+            _add_article_to_bloom(link, article_data['content_hash'])
 
             # Save breakdown data
             breakdown_data_input = analysis_data.get('breakdown', {})
@@ -379,88 +612,131 @@ class DatabaseService:
 
     @staticmethod
     def get_articles_with_pagination(page=1, limit=50, search='', classification='', input_type='', 
-                                     sort_by='created_at', sort_order='desc', user_id=None, show_duplicates=True):
+                                     sort_by='created_at', sort_order='desc', user_id=None, show_duplicates=True,
+                                     with_total=False):
         """
-        Get articles with pagination, search, and filtering for a specific user
+        Get articles with pagination, search, and filtering for a specific user.
+        Fetches limit+1 rows to compute has_more; the exact COUNT(*) behind
+        total_pages/total_articles only runs when with_total is set.
         """
         try:
             client = get_supabase_client()
             
-            # Start with base query
-            query = client.table('articles').select('*', count='exact')
-            
-            # Apply user filter
-            if user_id:
-                query = query.eq('user_id', user_id)
-            
-            # Apply search filter
-            if search:
-                # Use text search on multiple fields
-                search_query = f"title.ilike.*{search}*,content.ilike.*{search}*,summary.ilike.*{search}*"
-                query = query.or_(search_query)
-            
-            # Apply classification filter
-            if classification:
-                query = query.eq('classification', classification)
-            
-            # Apply input type filter
-            if input_type:
-                query = query.eq('input_type', input_type)
+            # Start with base query; the articles_unique view keeps only the newest copy of each article
+            table = client.table('articles' if show_duplicates else 'articles_unique')
+            query = table.select('*', count='exact') if with_total else table.select('*')
+            query = _apply_history_filters(query, search, classification, input_type, user_id)
             
             # Apply sorting
-            valid_sort_fields = ['created_at', 'title', 'factuality_score', 'classification']
-            if sort_by not in valid_sort_fields:
+            if sort_by not in HISTORY_SORT_COLUMNS:
                 sort_by = 'created_at'
             
             desc = sort_order.lower() == 'desc'
-            query = query.order(sort_by, desc=desc)
+            # id breaks ties so rows never shift between pages
+            query = query.order(sort_by, desc=desc).order('id', desc=desc)
             
-            # Apply pagination
+            # Apply pagination, fetching one extra row to learn whether another page exists
             offset = (page - 1) * limit
-            query = query.range(offset, offset + limit - 1)
+            query = query.range(offset, offset + limit)
             
             result = query.execute()
             articles = result.data if result.data else []
-            total_count = result.count if result.count else 0
+            has_more = len(articles) > limit
+            articles = articles[:limit]
             
             # Convert to expected format
-            articles_data = []
-            for article in articles:
-                article_data = {
-                    'id': article['id'],
-                    'title': article['title'],
-                    'summary': article['summary'],
-                    'classification': article['classification'],
-                    'classification_score': article['factuality_score'] / 100.0 if article['factuality_score'] else 0,
-                    'input_type': article['input_type'],
-                    'original_url': article['link'],
-                    'created_at': article['created_at'],
-                    'content': article['content'],
-                    'factuality_level': article['factuality_level'],
-                    'factuality_description': article['factuality_description'],
-                    'user_id': article['user_id']
-                }
-                articles_data.append(article_data)
+            articles_data = [_format_history_article(article) for article in articles]
+            
+            pagination = {
+                'current_page': page,
+                'articles_per_page': limit,
+                'has_next': has_more,
+                'has_more': has_more,
+                'has_previous': page > 1,
+                'next_cursor': None
+            }
             
-            # Calculate pagination info
-            total_pages = (total_count + limit - 1) // limit
+            # Newest-first listings can continue with keyset pagination from here
+            if has_more and sort_by == 'created_at' and desc:
+                last = articles[-1]
+                pagination['next_cursor'] = encode_history_cursor(last['created_at'], last['id'])
+            
+            if with_total:
+                total_count = result.count if result.count else 0
+                pagination['total_articles'] = total_count
+                pagination['total_pages'] = (total_count + limit - 1) // limit
             
             return {
                 'articles': articles_data,
+                'pagination': pagination
+            }
+            
+        except Exception as e:
+            print(f"❌ Error in get_articles_with_pagination: {e}")
+            raise e
+
+    @staticmethod
+    def get_articles_keyset(limit=50, cursor=None, search='', classification='', input_type='', user_id=None,
+                            show_duplicates=True):
+        """
+        Get articles newest-first using keyset (seek) pagination.
+        The cursor is the (created_at, id) of the last row of the previous page, so each
+        page is an index range scan instead of an OFFSET scan plus a COUNT(*).
+        """
+        try:
+            client = get_supabase_client()
+            
+            # The articles_unique view keeps only the newest copy of each article
+            query = client.table('articles' if show_duplicates else 'articles_unique').select('*')
+            query = _apply_history_filters(query, search, classification, input_type, user_id)
+            
+            if cursor:
+                cursor_ts, cursor_id = decode_history_cursor(cursor)
+                # (created_at, id) < (cursor_ts, cursor_id); the timestamp is quoted for PostgREST
+                query = query.or_(
+                    f'created_at.lt."{cursor_ts}",'
+                    f'and(created_at.eq."{cursor_ts}",id.lt.{cursor_id})'
+                )
+            
+            # Fetch one extra row to learn whether another page exists
+            query = query.order('created_at', desc=True).order('id', desc=True).limit(limit + 1)
+            
+            result = query.execute()
+            articles = result.data if result.data else []
+            has_next = len(articles) > limit
+            articles = articles[:limit]
+            
+            next_cursor = None
+            if has_next:
+                last = articles[-1]
+                next_cursor = encode_history_cursor(last['created_at'], last['id'])
+            
+            return {
+                'articles': [_format_history_article(article) for article in articles],
                 'pagination': {
-                    'current_page': page,
-                    'total_pages': total_pages,
-                    'total_articles': total_count,
                     'articles_per_page': limit,
-                    'has_next': page < total_pages,
-                    'has_previous': page > 1
+                    'has_next': has_next,
+                    'has_more': has_next,
+                    'next_cursor': next_cursor
                 }
             }
             
+        except ValueError:
+            raise
         except Exception as e:
-            print(f"❌ Error in get_articles_with_pagination: {e}")
+            print(f"❌ Error in get_articles_keyset: {e}")
             raise e
 
+    @staticmethod
+    def get_cached_article_with_details(article_id):
+        """
+        Get an article with its breakdown and cross-check results, cached for
+        ARTICLE_DETAILS_CACHE_TTL seconds. Concurrent misses share one database load.
+        """
+        return _article_details_cache.get_or_load(
+            article_id, lambda: DatabaseService.get_article_with_details(article_id)
+        )
+
     @staticmethod
     def get_article_with_details(article_id):
         """Get complete article details including breakdown and cross-check results"""
@@ -618,6 +894,24 @@ class DatabaseService:
             print(f"❌ Error getting statistics: {e}")
             raise e
 
+    @staticmethod
+    def get_cached_analysis_statistics(user_id=None):
+        """Get analysis statistics, reusing a result computed within the last STATISTICS_CACHE_TTL seconds"""
+        cache_key = user_id or 'global'
+        stats = _statistics_cache.get(cache_key)
+        if stats is None:
+            stats = DatabaseService.get_analysis_statistics(user_id=user_id)
+            _statistics_cache.set(cache_key, stats)
+        return stats
+
+    @staticmethod
+    def invalidate_statistics_cache(user_id=None):
+        """Drop cached global statistics and, if given, the statistics of one user"""
+        if user_id:
+            _statistics_cache.invalidate('global', user_id)
+        else:
+            _statistics_cache.invalidate('global')
+
     @staticmethod
     def check_duplicate_article(title, link, summary, user_id):
         """
@@ -645,6 +939,82 @@ class DatabaseService:
             print(f"❌ Error checking duplicate article: {e}")
             return None
 
+    @staticmethod
+    def get_duplicate_users(title, link):
+        """
+        Get the users who have a copy of an article (matched on title and link),
+        embedding each owner in the same PostgREST request.
+        Returns (users, total_duplicates); users are unique and active.
+        """
+        try:
+            client = get_supabase_client()
+            
+            query = client.table('articles').select('user_id, users(id, username, email, is_active)').eq('title', title)
+            query = query.eq('link', link) if link else query.is_('link', 'null')
+            
+            rows = query.execute().data or []
+            
+            users = {}
+            for row in rows:
+                user = row.get('users')
+                if user and user.get('is_active') and user['id'] not in users:
+                    users[user['id']] = {
+                        'id': user['id'],
+                        'username': user['username'],
+                        'email': user['email']
+                    }
+            
+            return list(users.values()), len(rows)
+            
+        except Exception as e:
+            print(f"❌ Error getting duplicate users: {e}")
+            raise e
+
+    @staticmethod
+    def article_may_exist(content_hash, link=None):
+        """
+        Check the in-process Bloom filter for a saved article with this content hash or link.
+        False means no such article exists (as of the last refresh), so the duplicate lookup can be skipped.
+        Returns True while the filter is still loading or whenever it cannot rule the article out.
+        """
+        state = _article_bloom_state
+        if state['refreshed_at'] is None:
+            with _article_bloom_lock:
+                start_load = not state['loading'] and state['refreshed_at'] is None
+                if start_load:
+                    state['loading'] = True
+            if start_load:
+                threading.Thread(target=_load_article_bloom, name='article-bloom-loader', daemon=True).start()
+            return True
+        
+        # Pick up articles saved by other workers; skip if another thread is already refreshing
+        if time.monotonic() - state['refreshed_at'] > ARTICLE_BLOOM_REFRESH_INTERVAL and _article_bloom_lock.acquire(blocking=False):
+            try:
+                _refresh_article_bloom()
+            except Exception as e:
+                print(f"❌ Error refreshing article duplicate filter: {e}")
+                return True
+            finally:
+                _article_bloom_lock.release()
+        
+        return f"hash:{content_hash}" in _article_bloom or bool(link and f"link:{link}" in _article_bloom)
+
+    @staticmethod
+    def find_article_by_content_hash(content_hash):
+        """
+        Find the newest article (any user) with the given content hash (see compute_content_hash).
+        Returns the article dict, or None if there is none.
+        """
+        try:
+            client = get_supabase_client()
+            
+            result = client.table('articles').select('*').eq('content_hash', content_hash).order('created_at', desc=True).limit(1).execute()
+            return result.data[0] if result.data else None
+            
+        except Exception as e:
+            print(f"❌ Error finding article by content hash: {e}")
+            return None
+
     @staticmethod
     def find_global_article(title, link, summary):
         """
@@ -756,6 +1126,9 @@ class DatabaseService:
             # Delete the article
             result = client.table('articles').delete().eq('id', article_id).execute()
             
+            _article_details_cache.invalidate(article_id)
+            if result.data:
+                DatabaseService.invalidate_statistics_cache(result.data[0].get('user_id'))
             return len(result.data) > 0 if result.data else False
             
         except Exception as e:
@@ -763,92 +1136,157 @@ class DatabaseService:
             raise e
 
     @staticmethod
-    def delete_article_for_user(article_id, user_id):
-        """Delete an article for a specific user"""
+    def delete_article_if_owned(article_id, user_id, is_admin=False):
+        """
+        Delete an article if it belongs to user_id (admins may delete any article).
+        Breakdown and cross-check rows are removed by ON DELETE CASCADE.
+        Returns 'ok', 'not_found' or 'forbidden'.
+        """
         try:
             client = get_supabase_client()
             
-            # Verify article belongs to user
-            article_result = client.table('articles').select('id').eq('id', article_id).eq('user_id', user_id).execute()
-            if not article_result.data:
-                return False
-            
-            # Delete breakdown records
-            client.table('breakdowns').delete().eq('article_id', article_id).execute()
+            query = client.table('articles').delete().eq('id', article_id)
+            if not is_admin:
+                query = query.eq('user_id', user_id)
+            result = query.execute()
             
-            # Delete cross-check results
-            client.table('crosscheckresults').delete().eq('article_id', article_id).execute()
+            if result.data:
+                _article_details_cache.invalidate(article_id)
+                DatabaseService.invalidate_statistics_cache(result.data[0].get('user_id'))
+                return 'ok'
             
-            # Delete the article
-            result = client.table('articles').delete().eq('id', article_id).eq('user_id', user_id).execute()
+            if is_admin:
+                return 'not_found'
             
-            return len(result.data) > 0 if result.data else False
+            # Nothing deleted: only now check whether the article exists under another owner
+            exists_result = client.table('articles').select('id').eq('id', article_id).limit(1).execute()
+            return 'forbidden' if exists_result.data else 'not_found'
             
         except Exception as e:
-            print(f"❌ Error deleting article for user: {e}")
+            print(f"❌ Error deleting article if owned: {e}")
             raise e
 
     @staticmethod
-    def get_article_by_id_and_user(article_id, user_id):
-        """Get an article by ID and user ID"""
+    def delete_all_duplicates_by_article_id(article_id):
+        """
+        Delete an article and all copies sharing its title and link, across users,
+        via the delete_article_duplicates database function (one round trip).
+        Returns the number of articles deleted (0 if the article does not exist).
+        """
         try:
             client = get_supabase_client()
             
-            result = client.table('articles').select('*').eq('id', article_id).eq('user_id', user_id).execute()
-            return result.data[0] if result.data else None
+            result = client.rpc('delete_article_duplicates', {'target_article_id': article_id}).execute()
+            deleted = result.data or []
+            
+            if deleted:
+                _article_details_cache.invalidate(*[row['id'] for row in deleted])
+                _statistics_cache.clear()
+            return len(deleted)
             
         except Exception as e:
-            print(f"❌ Error getting article by ID and user: {e}")
-            return None
+            print(f"❌ Error deleting duplicate articles: {e}")
+            raise e
 
     @staticmethod
-    def get_all_articles_for_export(include_breakdown=True, include_crosscheck=True, user_id=None):
-        """Get all articles for export purposes, optionally filtered by user"""
+    def delete_article_for_user(article_id, user_id):
+        """
+        Delete an article for a specific user in one conditional statement.
+        Breakdown and cross-check rows are removed by ON DELETE CASCADE.
+        Returns (success, existed); existed is False when the user has no such article.
+        """
         try:
             client = get_supabase_client()
             
-            # Get articles
-            query = client.table('articles').select('*')
-            if user_id:
-                query = query.eq('user_id', user_id)
+            result = client.table('articles').delete().eq('id', article_id).eq('user_id', user_id).execute()
             
-            articles_result = query.order('created_at', desc=True).execute()
-            articles = articles_result.data if articles_result.data else []
-            
-            articles_data = []
-            for article in articles:
-                article_dict = {
-                    'id': article['id'],
-                    'title': article['title'],
-                    'link': article['link'],
-                    'content': article['content'],
-                    'summary': article['summary'],
-                    'input_type': article['input_type'],
-                    'analysis_date': article['analysis_date'],
-                    'factuality_score': article['factuality_score'],
-                    'factuality_level': article['factuality_level'],
-                    'factuality_description': article['factuality_description'],
-                    'classification': article['classification'],
-                    'cross_check_data': article['cross_check_data'],
-                    'created_at': article['created_at'],
-                    'updated_at': article['updated_at'],
-                    'user_id': article['user_id']
-                }
+            if not result.data:
+                return False, False
+            
+            _article_details_cache.invalidate(article_id)
+            DatabaseService.invalidate_statistics_cache(user_id)
+            return True, True
+            
+        except Exception as e:
+            print(f"❌ Error deleting article for user: {e}")
+            raise e
+
+    @staticmethod
+    def iter_all_articles_for_export(include_breakdown=True, include_crosscheck=True, user_id=None, batch_size=500):
+        """
+        Yield articles for export newest-first, fetching batch_size rows at a time.
+        Batches are read with keyset pagination on (created_at, id), and breakdowns and
+        cross-check results are fetched once per batch rather than once per article.
+        """
+        try:
+            client = get_supabase_client()
+            cursor = None
+            
+            while True:
+                query = client.table('articles').select('*')
+                if user_id:
+                    query = query.eq('user_id', user_id)
+                if cursor:
+                    cursor_ts, cursor_id = cursor
+                    query = query.or_(
+                        f'created_at.lt."{cursor_ts}",'
+                        f'and(created_at.eq."{cursor_ts}",id.lt.{cursor_id})'
+                    )
+                
+                articles_result = query.order('created_at', desc=True).order('id', desc=True).limit(batch_size).execute()
+                articles = articles_result.data if articles_result.data else []
+                if not articles:
+                    return
                 
+                article_ids = [article['id'] for article in articles]
+                
+                breakdowns = {}
                 if include_breakdown:
-                    breakdown_result = client.table('breakdowns').select('*').eq('article_id', article['id']).execute()
-                    article_dict['breakdown'] = breakdown_result.data[0] if breakdown_result.data else None
+                    breakdown_result = client.table('breakdowns').select('*').in_('article_id', article_ids).execute()
+                    for breakdown in breakdown_result.data or []:
+                        breakdowns.setdefault(breakdown['article_id'], breakdown)
                 
+                crosschecks = {}
                 if include_crosscheck:
-                    crosscheck_result = client.table('crosscheckresults').select('*').eq('article_id', article['id']).execute()
-                    article_dict['crosscheck_results'] = crosscheck_result.data if crosscheck_result.data else []
+                    crosscheck_result = client.table('crosscheckresults').select('*').in_('article_id', article_ids).execute()
+                    for crosscheck in crosscheck_result.data or []:
+                        crosschecks.setdefault(crosscheck['article_id'], []).append(crosscheck)
                 
-                articles_data.append(article_dict)
-            
-            return articles_data
+                for article in articles:
+                    article_dict = {
+                        'id': article['id'],
+                        'title': article['title'],
+                        'link': article['link'],
+                        'content': article['content'],
+                        'summary': article['summary'],
+                        'input_type': article['input_type'],
+                        'analysis_date': article['analysis_date'],
+                        'factuality_score': article['factuality_score'],
+                        'factuality_level': article['factuality_level'],
+                        'factuality_description': article['factuality_description'],
+                        'classification': article['classification'],
+                        'cross_check_data': article['cross_check_data'],
+                        'created_at': article['created_at'],
+                        'updated_at': article['updated_at'],
+                        'user_id': article['user_id']
+                    }
+                    
+                    if include_breakdown:
+                        article_dict['breakdown'] = breakdowns.get(article['id'])
+                    
+                    if include_crosscheck:
+                        article_dict['crosscheck_results'] = crosschecks.get(article['id'], [])
+                    
+                    yield article_dict
+                
+                if len(articles) < batch_size:
+                    return
+                
+                last = articles[-1]
+                cursor = (last['created_at'], last['id'])
             
         except Exception as e:
-            print(f"❌ Error getting articles for export: {e}")
+            print(f"❌ Error iterating articles for export: {e}")
             raise e
     
     # ========================== USER MANAGEMENT METHODS ==========================
@@ -947,9 +1385,16 @@ class DatabaseService:
     @staticmethod
     def get_user_by_id(user_id):
         """
-        Get user by ID.
+        Get user by ID (cached for USER_CACHE_TTL seconds).
         Returns user dict or None if not found.
         """
+        user = _user_cache.get_or_load(user_id, lambda: DatabaseService._load_user_by_id(user_id))
+        # Hand out a copy so callers can't modify the cached entry
+        return dict(user) if user else None
+    
+    @staticmethod
+    def _load_user_by_id(user_id):
+        """Fetch an active user by ID from the database"""
         try:
             client = get_supabase_client()
             
@@ -974,9 +1419,15 @@ class DatabaseService:
             return None
     
     @staticmethod
-    def update_last_login(user_id):
+    def invalidate_user_cache(*user_ids):
+        """Drop cached user rows after their password, role, email or status changes"""
+        _user_cache.invalidate(*user_ids)
+    
+    @staticmethod
+    def update_last_login(user_id, password_hash=None):
         """
         Update user's last login timestamp.
+        A new password_hash (e.g. rehash on login) is stored in the same write.
         """
         try:
             client = get_supabase_client()
@@ -984,14 +1435,49 @@ class DatabaseService:
             update_data = {
                 'last_login': get_philippine_time().isoformat()
             }
+            if password_hash:
+                update_data['password_hash'] = password_hash
             
             result = client.table('users').update(update_data).eq('id', user_id).execute()
+            DatabaseService.invalidate_user_cache(user_id)
             return len(result.data) > 0 if result.data else False
             
         except Exception as e:
             print(f"❌ Error updating last login for user {user_id}: {e}")
             return False
     
+    @staticmethod
+    def get_user_for_login(identifier):
+        """
+        Look up an active user by username or email in a single read (a username match wins).
+        Nothing is written; stamp last_login with update_last_login() once the password checks out.
+        Returns user dict or None if not found.
+        """
+        try:
+            client = get_supabase_client()
+            
+            result = client.table('users').select('*').eq('is_active', True).or_(
+                f'username.eq.{_postgrest_quote(identifier)},email.eq.{_postgrest_quote(identifier.lower())}'
+            ).execute()
+            
+            if result.data:
+                user = next((row for row in result.data if row['username'] == identifier), result.data[0])
+                return {
+                    'id': user['id'],
+                    'username': user['username'],
+                    'email': user['email'],
+                    'password_hash': user['password_hash'],
+                    'role': user['role'],
+                    'created_at': user['created_at'],
+                    'last_login': user.get('last_login'),
+                    'is_active': user['is_active']
+                }
+            return None
+            
+        except Exception as e:
+            print(f"❌ Error during login lookup for {identifier}: {e}")
+            return None
+    
     @staticmethod
     def deactivate_user(user_id):
         """
@@ -1005,6 +1491,7 @@ class DatabaseService:
             }
             
             result = client.table('users').update(update_data).eq('id', user_id).execute()
+            DatabaseService.invalidate_user_cache(user_id)
             return len(result.data) > 0 if result.data else False
             
         except Exception as e:
@@ -1023,6 +1510,7 @@ class DatabaseService:
             }
             
             result = client.table('users').update(update_data).eq('id', user_id).execute()
+            DatabaseService.invalidate_user_cache(user_id)
             return len(result.data) > 0 if result.data else False
             
         except Exception as e:
@@ -1047,6 +1535,7 @@ class DatabaseService:
             }
             
             result = client.table('users').update(update_data).eq('id', user_id).execute()
+            DatabaseService.invalidate_user_cache(user_id)
             if result.data and len(result.data) > 0:
                 return True, "Username updated successfully"
             else:
@@ -1074,6 +1563,7 @@ class DatabaseService:
             }
             
             result = client.table('users').update(update_data).eq('id', user_id).execute()
+            DatabaseService.invalidate_user_cache(user_id)
             if result.data and len(result.data) > 0:
                 return True, "Email updated successfully"
             else:
@@ -1375,6 +1865,27 @@ class DatabaseService:
             print(f"❌ Error initializing user game stats: {e}")
             return {'success': False, 'error': str(e)}
 
+    @staticmethod
+    def save_game_results(results):
+        """
+        Save per-stage game completion details.
+        
+        Args:
+            results (dict): user_id, stage, total_xp, accuracy, average_time, answers, completed_at
+            
+        Returns:
+            dict: Inserted row or None on failure
+        """
+        try:
+            client = get_supabase_client()
+            
+            result = client.table('game_results').insert(results).execute()
+            return result.data[0] if result.data else None
+            
+        except Exception as e:
+            print(f"❌ Error saving game results: {e}")
+            return None
+
     # =================== PASSWORD RESET METHODS ===================
 
     @staticmethod
@@ -1398,7 +1909,7 @@ class DatabaseService:
 
     @staticmethod
     def create_password_reset_request(reset_request):
-        """Create new password reset request"""
+        """Create new password reset request (requested_at defaults to NOW() in the database)"""
         try:
             client = get_supabase_client()
             
@@ -1406,7 +1917,6 @@ class DatabaseService:
                 'user_id': reset_request['user_id'],
                 'username': reset_request['username'],
                 'email': reset_request['email'],
-                'requested_at': get_philippine_time().isoformat(),
                 'status': 'pending',
                 'ip_address': reset_request.get('ip_address')
             }
@@ -1463,25 +1973,87 @@ class DatabaseService:
             return False
 
     @staticmethod
-    def log_admin_action(admin_id, action, details):
-        """Log admin actions"""
+    def resolve_pending_password_reset_request(request_id, status):
+        """
+        Move a pending password reset request to status ('approved' or 'denied') in one UPDATE.
+        Filtering on status='pending' makes concurrent approvals/denials race-free.
+        Returns the updated request, or None if it doesn't exist or was already processed.
+        """
         try:
             client = get_supabase_client()
             
-            log_data = {
-                'admin_id': admin_id,
-                'action': action,
-                'details': details,
-                'timestamp': get_philippine_time().isoformat()
+            update_data = {
+                'status': status,
+                'processed_at': get_philippine_time().isoformat()
             }
             
-            result = _handle_insert_with_retry(client, 'admin_logs', log_data)
-            return result is not None
+            # PostgREST returns the updated rows, so no separate SELECT is needed
+            result = client.table('password_reset_requests').update(update_data).eq('id', request_id).eq('status', 'pending').execute()
+            return result.data[0] if result.data else None
             
         except Exception as e:
-            print(f"❌ Error logging admin action: {e}")
+            print(f"❌ Error resolving password reset request: {e}")
+            return None
+
+    @staticmethod
+    def create_password_reset_token(token_hash, user_id, expires_at):
+        """Store the SHA-256 hash of a reset token for user_id until expires_at (ISO timestamp)"""
+        try:
+            client = get_supabase_client()
+            
+            result = client.table('password_reset_tokens').insert({
+                'token_hash': token_hash,
+                'user_id': user_id,
+                'expires_at': expires_at
+            }).execute()
+            return bool(result.data)
+            
+        except Exception as e:
+            print(f"❌ Error creating password reset token for user {user_id}: {e}")
             return False
 
+    @staticmethod
+    def get_password_reset_token_user_id(token_hash):
+        """
+        Look up the user an unexpired reset token was issued for (one primary-key lookup).
+        Returns the user id, or None if the token is unknown, used or expired.
+        """
+        try:
+            client = get_supabase_client()
+            
+            result = client.table('password_reset_tokens').select('user_id').eq('token_hash', token_hash).gt('expires_at', datetime.now(timezone.utc).isoformat()).limit(1).execute()
+            return result.data[0]['user_id'] if result.data else None
+            
+        except Exception as e:
+            print(f"❌ Error looking up password reset token: {e}")
+            raise e
+
+    @staticmethod
+    def revoke_password_reset_tokens(user_id):
+        """Delete every outstanding reset token of a user (after a successful reset)"""
+        try:
+            client = get_supabase_client()
+            
+            result = client.table('password_reset_tokens').delete().eq('user_id', user_id).execute()
+            return len(result.data) if result.data else 0
+            
+        except Exception as e:
+            print(f"❌ Error revoking password reset tokens for user {user_id}: {e}")
+            return 0
+
+    @staticmethod
+    def queue_admin_action(admin_id, action, details):
+        """
+        Queue an admin action for the background audit log writer.
+        The timestamp is taken now; the row is inserted within ADMIN_LOG_FLUSH_INTERVAL seconds.
+        """
+        _admin_log_queue.put({
+            'admin_id': admin_id,
+            'action': action,
+            'details': details,
+            'timestamp': get_philippine_time().isoformat()
+        })
+        _ensure_admin_log_writer()
 
     # =================== ADMIN HELPER METHODS ===================
 
@@ -2,6 +2,7 @@ from google import genai
 import os
 import json
 import re
+import threading
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
@@ -29,6 +30,11 @@ if GEMINI_API_KEYS:
 else:
     print("Warning: No GEMINI_API_KEY found. Gemini features will be disabled.")
 
+# Process-wide cap on in-flight Gemini requests. Requests run on worker threads (each async view has
+# its own event loop), so a thread semaphore bounds the fan-out instead of a per-loop asyncio one.
+GEMINI_CONCURRENCY = int(os.getenv('GEMINI_CONCURRENCY', '16'))
+gemini_semaphore = threading.BoundedSemaphore(GEMINI_CONCURRENCY)
+
 class GeminiAnalyzer:
     def __init__(self):
         self.clients = gemini_clients
@@ -66,10 +72,11 @@ class GeminiAnalyzer:
                 continue
                 
             try:
-                response = client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=prompt
-                )
+                with gemini_semaphore:
+                    response = client.models.generate_content(
+                        model="gemini-2.5-flash",
+                        contents=prompt
+                    )
                 return response
             except Exception as e:
                 last_error = e
@@ -635,7 +642,7 @@ class GeminiAnalyzer:
             self._print_formatted_breakdown(fallback_result, factuality_score)
             return fallback_result
     
-    def generate_article_title(self, content: str, input_type: str = 'text', url: str = None, extracted_title: str = None) -> str:
+    def generate_article_title(self, content: str, input_type: str = 'text', url: str = None, extracted_title: str = None, allow_browser: bool = True) -> str:
         """
         Generate a title automatically, either by using already-extracted title, extracting from URL metadata, or via Gemini API
         Args:
@@ -643,6 +650,7 @@ class GeminiAnalyzer:
             input_type: 'text' or 'link'
             url: URL if input_type is 'link'
             extracted_title: Already-extracted title to avoid duplicate processing
+            allow_browser: Whether a Selenium page load may be used to find the title (link inputs only)
         """
         try:
             # If we already have an extracted title, use it instead of running Selenium again
@@ -661,7 +669,7 @@ class GeminiAnalyzer:
                         return content_extracted_title
                 
                 # Try to extract title from URL using improved Selenium approach
-                if url:
+                if url and allow_browser:
                     try:
                         from selenium import webdriver
                         from selenium.webdriver.chrome.service import Service
@@ -752,7 +760,7 @@ class GeminiAnalyzer:
                     Do not include any quotes, formatting, or prefixes like "Title:".
                     Respond with only the title text:
 
-                    {content[:1500]}
+                    {content[:1500] if input_type == 'link' else content[:600]}
                     """
                     
                     response = self._make_gemini_request(prompt)
@@ -0,0 +1,51 @@
+"""
+TruthGuard in-process rate limiter
+Thread-safe sliding-window limits keyed by arbitrary hashable values (e.g. client IP + identifier).
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class RateLimiter:
+    """Allow at most `count` hits per `seconds` for every (count, seconds) pair in limits"""
+
+    def __init__(self, limits, maxkeys=10000):
+        self.limits = tuple(limits)
+        self.window = max(seconds for _, seconds in self.limits)
+        self.maxkeys = maxkeys
+        self._hits = {}  # key -> deque of hit timestamps within the longest window
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """Record a hit for key; returns False (without recording it) if any limit is exceeded"""
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                if len(self._hits) >= self.maxkeys:
+                    self._prune(now)
+                hits = self._hits[key] = deque()
+
+            while hits and now - hits[0] >= self.window:
+                hits.popleft()
+
+            for count, seconds in self.limits:
+                if sum(1 for stamp in reversed(hits) if now - stamp < seconds) >= count:
+                    return False
+
+            hits.append(now)
+            return True
+
+    def reset(self, key):
+        """Forget the hits recorded for key"""
+        with self._lock:
+            self._hits.pop(key, None)
+
+    def _prune(self, now):
+        """Drop keys with no hits in the longest window, then the oldest keys, until there is room (lock held)"""
+        for key in [key for key, hits in self._hits.items() if not hits or now - hits[-1] >= self.window]:
+            del self._hits[key]
+        while len(self._hits) >= self.maxkeys:
+            del self._hits[next(iter(self._hits))]
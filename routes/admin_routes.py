@@ -1,47 +1,30 @@
-from flask import Blueprint, render_template, session, redirect, url_for, flash, jsonify, request
-from functools import wraps
+import traceback
+from flask import Blueprint, render_template, session, jsonify, request
 from database import DatabaseService, get_supabase_client, PHILIPPINE_TZ
 from datetime import datetime, timedelta
+from .utils import admin_page_required
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
-def admin_required(f):
-    """Decorator to require admin role for access"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if not session.get('user_id'):
-            flash('Please log in to access this page.', 'error')
-            return redirect(url_for('auth.login'))
-        
-        from database import DatabaseService
-        user = DatabaseService.get_user_by_id(session['user_id'])
-        if not user or user.get('role') != 'admin':
-            flash('Access denied. Admin privileges required.', 'error')
-            return redirect(url_for('main.index'))
-        
-        return f(*args, **kwargs)
-    return decorated_function
-
 @admin_bp.route('/')
 @admin_bp.route('/dashboard')
-@admin_required
+@admin_page_required
 def admin_dashboard():
     """Admin dashboard with system statistics"""
     return render_template('admin/admin_dashboard.html')
 
 @admin_bp.route('/feedback')
-@admin_required
+@admin_page_required
 def admin_feedback():
     """Admin feedback management page"""
     return render_template('admin/admin_feedback.html')
 
 @admin_bp.route('/api/dashboard-stats')
-@admin_required
+@admin_page_required
 def get_dashboard_stats():
     """API endpoint to get dashboard statistics"""
     try:
         print("Starting dashboard stats calculation...")
-        from database import DatabaseService
         
         # User statistics - with error handling
         try:
@@ -163,12 +146,11 @@ def get_dashboard_stats():
         })
     except Exception as e:
         print(f"Fatal error in dashboard stats: {e}")
-        import traceback
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/users')
-@admin_required
+@admin_page_required
 def get_users():
     """API endpoint to get user list with pagination or all users"""
     try:
@@ -251,7 +233,7 @@ def get_users():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/feedback')
-@admin_required
+@admin_page_required
 def get_feedback():
     """API endpoint to get feedback list with pagination"""
     try:
@@ -352,12 +334,11 @@ def get_feedback():
         })
     except Exception as e:
         print(f"Error in get_feedback: {e}")
-        import traceback
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/feedback/statistics')
-@admin_required
+@admin_page_required
 def get_feedback_statistics():
     """API endpoint to get feedback statistics"""
     try:
@@ -366,12 +347,11 @@ def get_feedback_statistics():
         
     except Exception as e:
         print(f"Error in get_feedback_statistics: {e}")
-        import traceback
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/feedback/<int:feedback_id>')
-@admin_required
+@admin_page_required
 def get_feedback_detail(feedback_id):
     """API endpoint to get individual feedback details"""
     try:
@@ -415,7 +395,7 @@ def get_feedback_detail(feedback_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/feedback/<int:feedback_id>', methods=['DELETE'])
-@admin_required
+@admin_page_required
 def delete_feedback(feedback_id):
     """Delete a feedback entry"""
     try:
@@ -429,7 +409,7 @@ def delete_feedback(feedback_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/users/<int:user_id>/toggle-role', methods=['POST'])
-@admin_required
+@admin_page_required
 def toggle_user_role(user_id):
     """Toggle user role between admin and user"""
     try:
@@ -444,6 +424,7 @@ def toggle_user_role(user_id):
 
         new_role = 'admin' if user.get('role') == 'user' else 'user'
         upd = client.table('users').update({'role': new_role}).eq('id', user_id).execute()
+        DatabaseService.invalidate_user_cache(user_id)
         if upd.error:
             return jsonify({'success': False, 'error': str(upd.error)}), 500
 
@@ -453,7 +434,7 @@ def toggle_user_role(user_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/users/<int:user_id>/toggle-status', methods=['POST'])
-@admin_required
+@admin_page_required
 def toggle_user_status(user_id):
     """Toggle user active status"""
     try:
@@ -468,6 +449,7 @@ def toggle_user_status(user_id):
 
         new_status = not bool(user.get('is_active'))
         upd = client.table('users').update({'is_active': new_status}).eq('id', user_id).execute()
+        DatabaseService.invalidate_user_cache(user_id)
         if upd.error:
             return jsonify({'success': False, 'error': str(upd.error)}), 500
 
@@ -478,7 +460,7 @@ def toggle_user_status(user_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/password-reset-requests')
-@admin_required
+@admin_page_required
 def get_password_reset_requests():
     """API endpoint to get password reset requests with pagination or all requests"""
     try:
@@ -553,7 +535,7 @@ def get_password_reset_requests():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/password-reset-requests/<int:request_id>', methods=['DELETE'])
-@admin_required
+@admin_page_required
 def delete_password_reset_request(request_id):
     """API endpoint to delete a password reset request"""
     try:
@@ -1,16 +1,31 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-import re
-import secrets
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app
 import string
-import hashlib
 import time
-from datetime import datetime, timezone, timedelta
-from werkzeug.security import generate_password_hash, check_password_hash
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from database import DatabaseService, PHILIPPINE_TZ
 from services.email_service import send_email
+from services.password_service import hash_password, check_password, password_needs_rehash
+from auth_validators import (
+    validate_email, validate_password, validate_username,
+    generate_email_confirmation_token, verify_email_confirmation_token
+)
+from .utils import mark_session_role
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+# Confirmation emails are sent off the request thread; delivery status is kept
+# per token so the registration page can poll it through check-login-status
+_MAIL_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='auth-mail')
+_MAIL_STATUS = {}
+_MAIL_STATUS_LOCK = threading.Lock()
+_MAIL_STATUS_MAX_ENTRIES = 1000
+
+# Verified against when a login identifier doesn't match any user, so unknown
+# usernames cost the same hash time as wrong passwords
+_DUMMY_HASH = hash_password("!dummy!")
+
 def convert_to_pht(datetime_obj):
     """Convert datetime to Philippine Time (UTC+8)"""
     if datetime_obj is None:
@@ -64,102 +79,17 @@ def pht_date_filter(datetime_obj):
         return pht_datetime.strftime('%B %d, %Y')
     return None
 
-def validate_email(email):
-    """Validate email format"""
-    pattern = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
-    return re.match(pattern, email) is not None
-
-def validate_password(password):
-    """Validate password strength"""
-    if len(password) < 6:
-        return False, "Password must be at least 6 characters long"
-    
-    checks = {
-        'uppercase': re.search(r'[A-Z]', password),
-        'lowercase': re.search(r'[a-z]', password),
-        'number': re.search(r'\d', password),
-        'special': re.search(r'[!@#$%^&*(),.?":{}|<>]', password)
-    }
-    
-    missing = []
-    if not checks['uppercase']:
-        missing.append("uppercase letter")
-    if not checks['lowercase']:
-        missing.append("lowercase letter")
-    if not checks['number']:
-        missing.append("number")
-    if not checks['special']:
-        missing.append("special character")
-    
-    # Require at least 3 out of 4 criteria for medium strength
-    met_criteria = sum(1 for check in checks.values() if check)
-    if met_criteria < 3:
-        return False, f"Password needs: {', '.join(missing[:2])}"
-    
-    return True, "Password meets requirements"
-
-def validate_username(username):
-    """Validate username"""
-    if len(username) < 3:
-        return False, "Username must be at least 3 characters long"
-    if len(username) > 20:
-        return False, "Username must be no more than 20 characters long"
-    if not re.match(r'^[a-zA-Z0-9_]+$', username):
-        return False, "Username can only contain letters, numbers, and underscores"
-    return True, "Username is valid"
-
-def generate_email_confirmation_token(email, registration_data):
-    """Generate secure token for email confirmation"""
-    timestamp = str(int(time.time()))
-    secret_key = secrets.token_urlsafe(32)
-    token_data = f"{registration_data['email']}:{registration_data['username']}:{timestamp}"
-    token_hash = hashlib.sha256(f"{token_data}:{secret_key}".encode()).hexdigest()
-    token = f"{timestamp}.{token_hash}.{secret_key}"
-    
-    return token
-
-def verify_email_confirmation_token(token, registration_data, max_age_hours=24):
-    """Verify email confirmation token (valid for 24 hours)"""
-    try:
-        parts = token.split('.')
-        if len(parts) != 3:
-            return False, "Invalid token format"
-        
-        timestamp_str, token_hash, secret_key = parts
-        timestamp = int(timestamp_str)
-        
-        # Check if token has expired
-        current_time = int(time.time())
-        if current_time - timestamp > (max_age_hours * 3600):
-            return False, "Token has expired"
-        
-        # Verify token hash using registration data
-        if not registration_data:
-            return False, "Invalid token data"
-            
-        # Reconstruct token data to verify hash
-        token_data = f"{registration_data['email']}:{registration_data['username']}:{timestamp}"
-        expected_hash = hashlib.sha256(f"{token_data}:{secret_key}".encode()).hexdigest()
-        
-        if token_hash != expected_hash:
-            return False, "Invalid token signature"
-        
-        return True, "Token is valid"
-        
-    except (ValueError, IndexError, KeyError) as e:
-        return False, f"Invalid token: {e}"
-
-def send_email_confirmation(email, username, confirmation_token):
+def send_email_confirmation(email, username, confirmation_token, base_url=None):
     """Send email confirmation link to user"""
     try:
         subject = "Confirm Your Email - TruthGuard Registration"
         
         # Use request.host to get the current domain, fallback to localhost for development
-        try:
-            from flask import request
-            base_url = f"http://{request.host}" if request else "http://localhost:5000"
-        except:
-            base_url = "http://localhost:5000"
+        if not base_url:
+            try:
+                base_url = f"http://{request.host}" if request else "http://localhost:5000"
+            except:
+                base_url = "http://localhost:5000"
             
         confirmation_url = f"{base_url}/auth/confirm-email?token={confirmation_token}"
         
@@ -207,6 +137,77 @@ def send_email_confirmation(email, username, confirmation_token):
         print(f"Error sending confirmation email: {e}")
         return False
 
+def _set_mail_status(token, status):
+    """Record the delivery status of a confirmation email"""
+    with _MAIL_STATUS_LOCK:
+        _MAIL_STATUS[token] = status
+        # Drop the oldest entries so abandoned registrations don't accumulate
+        while len(_MAIL_STATUS) > _MAIL_STATUS_MAX_ENTRIES:
+            _MAIL_STATUS.pop(next(iter(_MAIL_STATUS)))
+
+def _get_mail_status(token):
+    """Get the delivery status of a confirmation email ('pending', 'sent' or 'failed')"""
+    with _MAIL_STATUS_LOCK:
+        return _MAIL_STATUS.get(token)
+
+def _send_email_confirmation_async(app, email, username, confirmation_token, base_url):
+    """Background worker: send the confirmation email inside an app context"""
+    with app.app_context():
+        email_sent = send_email_confirmation(email, username, confirmation_token, base_url)
+    _set_mail_status(confirmation_token, 'sent' if email_sent else 'failed')
+
+def _validate_registration_form(form):
+    """Validate registration form fields and check for existing accounts.
+    Returns (form_data, errors) where form_data has username, email and password."""
+    username = form.get('username', '').strip()
+    email = form.get('email', '').strip().lower()
+    password = form.get('password', '')
+    confirm_password = form.get('confirm_password', '')
+    
+    errors = []
+    
+    # Validate all fields
+    if not username:
+        errors.append("Username is required")
+    else:
+        is_valid, message = validate_username(username)
+        if not is_valid:
+            errors.append(message)
+    
+    if not email:
+        errors.append("Email is required")
+    elif not validate_email(email):
+        errors.append("Please enter a valid email address")
+    
+    if not password:
+        errors.append("Password is required")
+    else:
+        is_valid, message = validate_password(password)
+        if not is_valid:
+            errors.append(message)
+    
+    if password != confirm_password:
+        errors.append("Passwords do not match")
+    
+    # Check if user already exists
+    if not errors:
+        try:
+            db = DatabaseService()
+            
+            # Check if username exists
+            if db.get_user_by_username(username):
+                errors.append("Username already taken")
+            
+            # Check if email exists
+            if db.get_user_by_email(email):
+                errors.append("Email already registered")
+            
+        except Exception as e:
+            print(f"Database check error: {e}")
+            errors.append("Error checking existing users")
+    
+    return {'username': username, 'email': email, 'password': password}, errors
+
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     """Handle user login"""
@@ -225,20 +226,25 @@ def login():
         try:
             db = DatabaseService()
             
-            # Try to find user by username or email
-            user = db.get_user_by_username(username)
-            if not user:
-                user = db.get_user_by_email(username)
+            # Find user by username or email
+            user = db.get_user_for_login(username)
             
-            if user and check_password_hash(user['password_hash'], password):
+            if user:
+                password_ok = check_password(user['password_hash'], password)
+            else:
+                check_password(_DUMMY_HASH, password)
+                password_ok = False
+            
+            if password_ok:
                 # Successful login
                 session['user_id'] = user['id']
                 session['username'] = user['username']
                 session['email'] = user['email']
-                session['user_role'] = user.get('role', 'user')  # Add user role to session
+                mark_session_role(user.get('role', 'user'))  # Add user role to session
                 
-                # Update last login
-                db.update_last_login(user['id'])
+                # Stamp last_login, transparently upgrading legacy werkzeug hashes to argon2id in the same write
+                new_hash = hash_password(password) if password_needs_rehash(user['password_hash']) else None
+                db.update_last_login(user['id'], new_hash)
                 
                 # Redirect to the page they were trying to access, or detector page
                 next_page = request.args.get('next')
@@ -265,52 +271,10 @@ def register():
         return redirect(url_for('main.index'))
     
     if request.method == 'POST':
-        username = request.form.get('username', '').strip()
-        email = request.form.get('email', '').strip().lower()
-        password = request.form.get('password', '')
-        confirm_password = request.form.get('confirm_password', '')
-        
-        errors = []
-        
-        # Validate all fields
-        if not username:
-            errors.append("Username is required")
-        else:
-            is_valid, message = validate_username(username)
-            if not is_valid:
-                errors.append(message)
-        
-        if not email:
-            errors.append("Email is required")
-        elif not validate_email(email):
-            errors.append("Please enter a valid email address")
-        
-        if not password:
-            errors.append("Password is required")
-        else:
-            is_valid, message = validate_password(password)
-            if not is_valid:
-                errors.append(message)
-        
-        if password != confirm_password:
-            errors.append("Passwords do not match")
-        
-        # Check if user already exists
-        if not errors:
-            try:
-                db = DatabaseService()
-                
-                # Check if username exists
-                if db.get_user_by_username(username):
-                    errors.append("Username already taken")
-                
-                # Check if email exists
-                if db.get_user_by_email(email):
-                    errors.append("Email already registered")
-                
-            except Exception as e:
-                print(f"Database check error: {e}")
-                errors.append("Error checking existing users")
+        form_data, errors = _validate_registration_form(request.form)
+        username = form_data['username']
+        email = form_data['email']
+        password = form_data['password']
         
         if errors:
             for error in errors:
@@ -320,7 +284,7 @@ def register():
         # Create new user
         try:
             db = DatabaseService()
-            password_hash = generate_password_hash(password)
+            password_hash = hash_password(password)
             
             user_id = db.create_user(username, email, password_hash)
             
@@ -353,52 +317,10 @@ def register_with_confirmation():
     """Handle registration with email confirmation"""
     
     # Validate form data
-    username = request.form.get('username', '').strip()
-    email = request.form.get('email', '').strip().lower()
-    password = request.form.get('password', '')
-    confirm_password = request.form.get('confirm_password', '')
-    
-    errors = []
-    
-    # Validate all fields
-    if not username:
-        errors.append("Username is required")
-    else:
-        is_valid, message = validate_username(username)
-        if not is_valid:
-            errors.append(message)
-    
-    if not email:
-        errors.append("Email is required")
-    elif not validate_email(email):
-        errors.append("Please enter a valid email address")
-    
-    if not password:
-        errors.append("Password is required")
-    else:
-        is_valid, message = validate_password(password)
-        if not is_valid:
-            errors.append(message)
-    
-    if password != confirm_password:
-        errors.append("Passwords do not match")
-    
-    # Check if user already exists
-    if not errors:
-        try:
-            db = DatabaseService()
-            
-            # Check if username exists
-            if db.get_user_by_username(username):
-                errors.append("Username already taken")
-            
-            # Check if email exists
-            if db.get_user_by_email(email):
-                errors.append("Email already registered")
-                
-        except Exception as e:
-            print(f"Database check error: {e}")
-            errors.append("Error checking existing users")
+    form_data, errors = _validate_registration_form(request.form)
+    username = form_data['username']
+    email = form_data['email']
+    password = form_data['password']
     
     if errors:
         return jsonify({'success': False, 'error': errors[0]})
@@ -408,7 +330,7 @@ def register_with_confirmation():
         registration_data = {
             'username': username,
             'email': email,
-            'password_hash': generate_password_hash(password),
+            'password_hash': hash_password(password),
             'timestamp': time.time()
         }
         
@@ -417,21 +339,20 @@ def register_with_confirmation():
         
         # Store token and data in session
         session[f'registration_token_{token}'] = registration_data
+        session['pending_confirmation_token'] = token
         
-        # Send confirmation email
-        email_sent = send_email_confirmation(email, username, token)
+        # Send confirmation email in the background; failures surface via check-login-status
+        _set_mail_status(token, 'pending')
+        _MAIL_POOL.submit(
+            _send_email_confirmation_async,
+            current_app._get_current_object(), email, username, token, f"http://{request.host}"
+        )
         
-        if email_sent:
-            return jsonify({
-                'success': True, 
-                'message': 'Confirmation email sent. Please check your inbox.',
-                'email': email
-            })
-        else:
-            return jsonify({
-                'success': False, 
-                'error': 'Failed to send confirmation email. Please try again.'
-            })
+        return jsonify({
+            'success': True, 
+            'message': 'Confirmation email sent. Please check your inbox.',
+            'email': email
+        })
             
     except Exception as e:
         print(f"Registration confirmation error: {e}")
@@ -492,6 +413,9 @@ def confirm_email():
         if user_id:
             # Clean up session
             session.pop(f'registration_token_{token}', None)
+            session.pop('pending_confirmation_token', None)
+            with _MAIL_STATUS_LOCK:
+                _MAIL_STATUS.pop(token, None)
             
             # Auto-login user
             session['user_id'] = user_id
@@ -516,10 +440,12 @@ def confirm_email():
 @auth_bp.route('/check-login-status')
 def check_login_status():
     """Check if user is logged in (for email confirmation status check)"""
+    pending_token = session.get('pending_confirmation_token')
     return jsonify({
         'logged_in': 'user_id' in session,
         'username': session.get('username', ''),
-        'email': session.get('email', '')
+        'email': session.get('email', ''),
+        'confirmation_email_status': _get_mail_status(pending_token) if pending_token else None
     })
 
 @auth_bp.route('/logout', methods=['GET', 'POST'])
@@ -572,7 +498,7 @@ def update_username():
         # Verify current password
         db = DatabaseService()
         user = db.get_user_by_id(session['user_id'])
-        if not user or not check_password_hash(user['password_hash'], password):
+        if not user or not check_password(user['password_hash'], password):
             return jsonify({'success': False, 'message': 'Invalid password'}), 400
         
         # Update username
@@ -608,7 +534,7 @@ def update_email():
         # Verify current password
         db = DatabaseService()
         user = db.get_user_by_id(session['user_id'])
-        if not user or not check_password_hash(user['password_hash'], password):
+        if not user or not check_password(user['password_hash'], password):
             return jsonify({'success': False, 'message': 'Invalid password'}), 400
         
         # Update email
@@ -649,11 +575,11 @@ def update_password():
         # Verify current password
         db = DatabaseService()
         user = db.get_user_by_id(session['user_id'])
-        if not user or not check_password_hash(user['password_hash'], current_password):
+        if not user or not check_password(user['password_hash'], current_password):
             return jsonify({'success': False, 'message': 'Current password is incorrect'}), 400
         
         # Update password
-        new_password_hash = generate_password_hash(new_password)
+        new_password_hash = hash_password(new_password)
         success = db.update_user_password(session['user_id'], new_password_hash)
         if success:
             return jsonify({'success': True, 'message': 'Password updated successfully'})
@@ -1,75 +1,66 @@
-from flask import Blueprint, request, jsonify, current_app
-import traceback
+from flask import Blueprint, request, jsonify, current_app, Response
+import logging
+from .model_routes import invalidate_model_status_cache
+
+logger = logging.getLogger(__name__)
 
 feedback_bp = Blueprint('feedback', __name__)
 
+# Feedback payload schema: (request key, add_feedback argument, default, strip whitespace)
+FEEDBACK_SCHEMA = (
+    ('text', 'text', '', True),
+    ('predicted_label', 'predicted_label', '', True),
+    ('actual_label', 'actual_label', '', True),
+    ('confidence', 'confidence', 0.0, False),
+    ('comment', 'user_comment', '', True),
+    ('link', 'link', None, False),
+    ('title', 'title', None, False),
+    ('summary', 'summary', None, False),
+    ('factuality_score', 'factuality_score', None, False),
+)
+FEEDBACK_REQUIRED_FIELDS = ('text', 'predicted_label', 'actual_label')
+FEEDBACK_LABELS = frozenset(('fake', 'real'))
+
+def parse_feedback_payload(data):
+    """Extract feedback fields according to FEEDBACK_SCHEMA.
+    Returns (feedback kwargs, list of missing required fields)."""
+    feedback = {}
+    for key, name, default, strip in FEEDBACK_SCHEMA:
+        value = data.get(key, default)
+        feedback[name] = value.strip() if strip and isinstance(value, str) else value
+    missing_fields = [name for name in FEEDBACK_REQUIRED_FIELDS if not feedback[name]]
+    return feedback, missing_fields
+
 @feedback_bp.route('/submit-feedback', methods=['POST'])
 def submit_feedback():
     """Submit user feedback for model improvement"""
     try:
-        from web_app import feedback_service
-        
-        data = request.get_json()
-        print(f"Feedback request data: {data}")
+        data = request.get_json(force=True)
         
         if not data:
-            print("Error: No JSON data received for feedback")
+            logger.debug("No JSON data received for feedback")
             return jsonify({'error': 'No data provided'}), 400
         
-        text = data.get('text', '').strip()
-        predicted_label = data.get('predicted_label', '').strip()
-        actual_label = data.get('actual_label', '').strip()
-        confidence = data.get('confidence', 0.0)
-        user_comment = data.get('comment', '').strip()
-        link = data.get('link', None)
-        title = data.get('title', None)
-        summary = data.get('summary', None)
-        factuality_score = data.get('factuality_score', None)
-        
-        print(f"Feedback fields extracted:")
-        print(f"  - text: {len(text)} chars")
-        print(f"  - predicted: {predicted_label}")
-        print(f"  - actual: {actual_label}")
-        print(f"  - confidence: {confidence}")
-        print(f"  - link: {link}")
-        print(f"  - title: {title}")
-        print(f"  - summary: {summary}")
-        print(f"  - factuality_score: {factuality_score}")
+        feedback, missing_fields = parse_feedback_payload(data)
         
         # Validate required fields
-        if not text or not predicted_label or not actual_label:
-            missing_fields = []
-            if not text: missing_fields.append('text')
-            if not predicted_label: missing_fields.append('predicted_label')
-            if not actual_label: missing_fields.append('actual_label')
-            print(f"Error: Missing required fields: {missing_fields}")
+        if missing_fields:
+            logger.debug("Feedback missing required fields: %s", missing_fields)
             return jsonify({'error': f'Missing required fields: {", ".join(missing_fields)}'}), 400
         
-        if actual_label.lower() not in ['fake', 'real']:
-            print(f"Error: Invalid actual_label: {actual_label}")
+        actual_label = feedback['actual_label']
+        if not isinstance(actual_label, str) or actual_label.lower() not in FEEDBACK_LABELS:
+            logger.debug("Feedback has invalid actual_label: %s", actual_label)
             return jsonify({'error': 'actual_label must be either "fake" or "real"'}), 400
         
-        # Use the correct feedback service reference
-        current_feedback_service = getattr(current_app, 'feedback_service', feedback_service)
+        # Bind the service once; web_app always defines app.feedback_service
+        current_feedback_service = current_app.feedback_service
         if not current_feedback_service:
             return jsonify({'error': 'Feedback service not available'}), 503
         
-        print("Adding feedback to system...")
-        # Pass parameters in the correct order according to the method signature
-        current_feedback_service.add_feedback(
-            text=text,
-            predicted_label=predicted_label,
-            actual_label=actual_label,
-            confidence=confidence,
-            user_comment=user_comment,
-            link=link,
-            title=title,
-            summary=summary,
-            factuality_score=factuality_score
-        )
-        
-        feedback_stats = current_feedback_service.get_feedback_stats()
-        print(f"Updated feedback stats: {feedback_stats}")
+        # Add the entry and get the updated stats in one call
+        feedback_stats = current_feedback_service.add_feedback_and_get_stats(**feedback)
+        invalidate_model_status_cache()
         
         response = {
             'message': 'Thank you for your feedback! It will help improve the model.',
@@ -80,22 +71,18 @@ def submit_feedback():
         if feedback_stats.get('can_retrain', False):
             response['message'] += f' The model can be retrained with {feedback_stats.get("pending_training", 0)} new feedback entries.'
         
-        print(f"Feedback submission successful: {response}")
         return jsonify(response)
         
     except Exception as e:
-        print(f"Submit feedback error: {str(e)}")
-        traceback.print_exc()
+        logger.exception("submit_feedback failed")
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
 
 @feedback_bp.route('/feedback-stats')
 def feedback_stats():
     """Get feedback statistics"""
     try:
-        from web_app import feedback_service
-        
-        # Use the correct feedback service reference
-        current_feedback_service = getattr(current_app, 'feedback_service', feedback_service)
+        # Bind the service once; web_app always defines app.feedback_service
+        current_feedback_service = current_app.feedback_service
         if not current_feedback_service:
             return jsonify({'error': 'Feedback service not available'}), 503
         
@@ -108,16 +95,20 @@ def feedback_stats():
 def delete_feedback(feedback_id):
     """Delete a specific feedback entry"""
     try:
-        from web_app import feedback_service
-        
-        # Use the correct feedback service reference
-        current_feedback_service = getattr(current_app, 'feedback_service', feedback_service)
+        # Bind the service once; web_app always defines app.feedback_service
+        current_feedback_service = current_app.feedback_service
         if not current_feedback_service:
             return jsonify({'error': 'Feedback service not available'}), 503
         
         success = current_feedback_service.delete_feedback(feedback_id)
         
         if success:
+            invalidate_model_status_cache()
+            
+            # Clients that don't need the refreshed stats can opt out of them
+            if request.headers.get('Prefer') == 'return=minimal':
+                return '', 204
+            
             feedback_stats = current_feedback_service.get_feedback_stats()
             return jsonify({
                 'message': 'Feedback entry deleted successfully',
@@ -133,20 +124,23 @@ def delete_feedback(feedback_id):
 def get_feedback():
     """Get all feedback entries"""
     try:
-        from web_app import feedback_service
-        
-        # Use the correct feedback service reference
-        current_feedback_service = getattr(current_app, 'feedback_service', feedback_service)
+        # Bind the service once; web_app always defines app.feedback_service
+        current_feedback_service = current_app.feedback_service
         if not current_feedback_service:
             return jsonify({'error': 'Feedback service not available'}), 503
         
-        feedback_entries = current_feedback_service.get_all_feedback()
+        feedback_entries = current_feedback_service.iter_feedback()
         feedback_stats = current_feedback_service.get_feedback_stats()
+        dumps = current_app.json.dumps
         
-        return jsonify({
-            'feedback_entries': feedback_entries,
-            'feedback_stats': feedback_stats
-        })
+        def generate():
+            # Serialize one entry at a time instead of building the whole document
+            yield '{"feedback_entries":['
+            for index, entry in enumerate(feedback_entries):
+                yield dumps(entry) if index == 0 else ',' + dumps(entry)
+            yield '],"feedback_stats":' + dumps(feedback_stats) + '}'
+        
+        return Response(generate(), mimetype='application/json')
         
     except Exception as e:
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
@@ -1,12 +1,62 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app, g
 from functools import wraps
 import json
 import os
+import hashlib
 from database import DatabaseService, db
 from datetime import datetime, timezone
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 game_bp = Blueprint('game', __name__, url_prefix='/game')
 
+_BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+STAGE_PATHS = {stage: os.path.join(_BASE_DIR, f'stage{stage}.json') for stage in (2, 3, 4, 5)}
+# Stages completed through /api/stage<n>/complete (stage 3 keeps its own deprecated route)
+COMPLETABLE_STAGES = frozenset((4, 5))
+
+def _load_stage_payload(stage):
+    """Load a stage JSON file once and pre-encode its API response body"""
+    try:
+        with open(STAGE_PATHS[stage], 'r', encoding='utf-8') as file:
+            stage_data = json.load(file)
+        
+        # Stage 2 clients expect the data wrapped in a success envelope
+        if stage == 2:
+            stage_data = {'success': True, 'data': stage_data}
+        
+        return orjson.dumps(stage_data) if orjson else json.dumps(stage_data).encode('utf-8')
+    except FileNotFoundError:
+        print(f"⚠️ Stage {stage} data file not found: {STAGE_PATHS[stage]}")
+        return None
+    except Exception as e:
+        print(f"❌ Error loading stage {stage} data: {e}")
+        return None
+
+# Stage data is static, so it is read and encoded once per process
+STAGE_BYTES = {stage: _load_stage_payload(stage) for stage in STAGE_PATHS}
+STAGE_ETAGS = {
+    stage: hashlib.blake2b(payload, digest_size=16).hexdigest()
+    for stage, payload in STAGE_BYTES.items() if payload is not None
+}
+STAGE_CACHE_MAX_AGE = 3600
+
+def _stage_data_response(stage):
+    """Serve the pre-encoded data for a game stage, answering 304 on a matching ETag"""
+    payload = STAGE_BYTES.get(stage)
+    if payload is None:
+        return jsonify({'success': False, 'error': f'Stage {stage} data file not found'}), 404
+    
+    response = current_app.response_class(payload, mimetype='application/json')
+    response.set_etag(STAGE_ETAGS[stage])
+    # Private: the endpoints sit behind login, so shared caches must not store them
+    response.cache_control.private = True
+    response.cache_control.max_age = STAGE_CACHE_MAX_AGE
+    return response.make_conditional(request)
+
 def login_required(f):
     """Decorator to require login for game routes"""
     @wraps(f)
@@ -17,6 +67,8 @@ def login_required(f):
             else:
                 flash('Please log in to access the Game Hub.', 'warning')
                 return redirect(url_for('auth.login'))
+        # Read the session once; handlers use g.user_id
+        g.user_id = session['user_id']
         return f(*args, **kwargs)
     return decorated_function
 
@@ -25,7 +77,7 @@ def login_required(f):
 def game_hub():
     """Game hub - main game selection page"""
     user_stats = None
-    user_id = session['user_id']
+    user_id = g.user_id
     user_stats = DatabaseService.get_user_game_stats(user_id)
     
     # Initialize stats if user doesn't have any yet
@@ -70,40 +122,13 @@ def stage5_game():
 @login_required
 def get_stage2_data():
     """Get Stage 2: Source Showdown game data"""
-    try:
-        # Load stage2.json file
-        stage2_file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'stage2.json')
-        
-        if not os.path.exists(stage2_file_path):
-            return jsonify({'success': False, 'error': 'Stage 2 data file not found'}), 404
-        
-        with open(stage2_file_path, 'r', encoding='utf-8') as file:
-            stage2_data = json.load(file)
-        
-        return jsonify({
-            'success': True,
-            'data': stage2_data
-        })
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    return _stage_data_response(2)
 
 @game_bp.route('/api/stage3/data', methods=['GET'])
 @login_required
 def get_stage3_data():
     """Get Stage 3: Content Preview game data"""
-    try:
-        # Load stage3.json file
-        stage3_file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'stage3.json')
-        
-        if not os.path.exists(stage3_file_path):
-            return jsonify({'success': False, 'error': 'Stage 3 data file not found'}), 404
-        
-        with open(stage3_file_path, 'r', encoding='utf-8') as file:
-            stage3_data = json.load(file)
-        
-        return jsonify(stage3_data)
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    return _stage_data_response(3)
 
 @game_bp.route('/api/stage3/complete', methods=['POST'])
 @login_required
@@ -116,19 +141,19 @@ def complete_stage3():
 def complete_game():
     """Handle game completion for any stage and update user stats"""
     try:
-        data = request.get_json()
-        user_id = session.get('user_id')
-        
-        if not user_id:
-            return jsonify({'success': False, 'error': 'User not logged in'}), 401
+        data = request.get_json(force=True)
+        user_id = g.user_id
         
         # Validate completion data
         xp_earned = data.get('total_xp', 0)
-        correct_answers = data.get('correct_answers', 0)
         stage = data.get('stage', 'unknown')
         
         # Validate that all 10 rounds were completed
-        if correct_answers < 0 or correct_answers > 10:
+        try:
+            correct_answers = int(data.get('correct_answers', 0))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'Invalid correct_answers value'}), 400
+        if not 0 <= correct_answers <= 10:
             return jsonify({'success': False, 'error': 'Invalid correct_answers value'}), 400
         
         # Update user game statistics
@@ -150,85 +175,37 @@ def complete_game():
 @login_required
 def get_stage4_data():
     """Get Stage 4: Claim Cross-Check game data"""
-    try:
-        # Load stage4.json file
-        stage4_file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'stage4.json')
-        
-        if not os.path.exists(stage4_file_path):
-            return jsonify({'success': False, 'error': 'Stage 4 data file not found'}), 404
-        
-        with open(stage4_file_path, 'r', encoding='utf-8') as file:
-            stage4_data = json.load(file)
-        
-        return jsonify(stage4_data)
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
-
-@game_bp.route('/api/stage4/complete', methods=['POST'])
-@login_required
-def complete_stage4():
-    """Handle Stage 4 game completion"""
-    try:
-        data = request.get_json()
-        user_id = session.get('user_id')
-        
-        # Store results in database if user is logged in
-        if user_id:
-            db = DatabaseService()
-            db.save_game_results({
-                'user_id': user_id,
-                'stage': data.get('stage'),
-                'total_xp': data.get('totalXP'),
-                'accuracy': data.get('accuracy'),
-                'average_time': data.get('averageTime'),
-                'answers': data.get('answers'),
-                'completed_at': data.get('completedAt')
-            })
-        
-        return jsonify({'success': True, 'message': 'Stage 4 completed successfully'})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    return _stage_data_response(4)
 
 @game_bp.route('/api/stage5/data', methods=['GET'])
 @login_required
 def get_stage5_data():
     """Get Stage 5: Full Article Analysis game data"""
-    try:
-        # Load stage5.json file
-        stage5_file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'stage5.json')
-        
-        if not os.path.exists(stage5_file_path):
-            return jsonify({'success': False, 'error': 'Stage 5 data file not found'}), 404
-        
-        with open(stage5_file_path, 'r', encoding='utf-8') as file:
-            stage5_data = json.load(file)
-        
-        return jsonify(stage5_data)
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    return _stage_data_response(5)
 
-@game_bp.route('/api/stage5/complete', methods=['POST'])
+@game_bp.route('/api/stage<int:stage>/complete', methods=['POST'])
 @login_required
-def complete_stage5():
-    """Handle Stage 5 game completion"""
+def complete_stage(stage):
+    """Handle per-stage game completion (stage 3 keeps its own deprecated route)"""
+    if stage not in COMPLETABLE_STAGES:
+        return jsonify({'success': False, 'error': f'Unknown stage {stage}'}), 404
+    
     try:
-        data = request.get_json()
-        user_id = session.get('user_id')
+        data = request.get_json(force=True)
         
-        # Store results in database if user is logged in
-        if user_id:
-            db = DatabaseService()
-            db.save_game_results({
-                'user_id': user_id,
-                'stage': data.get('stage'),
-                'total_xp': data.get('totalXP'),
-                'accuracy': data.get('accuracy'),
-                'average_time': data.get('averageTime'),
-                'answers': data.get('answers'),
-                'completed_at': data.get('completedAt')
-            })
+        saved = DatabaseService.save_game_results({
+            'user_id': g.user_id,
+            'stage': stage,
+            'total_xp': data.get('totalXP'),
+            'accuracy': data.get('accuracy'),
+            'average_time': data.get('averageTime'),
+            'answers': data.get('answers'),
+            'completed_at': data.get('completedAt')
+        })
+        if saved is None:
+            return jsonify({'success': False, 'error': f'Failed to save stage {stage} results'}), 500
         
-        return jsonify({'success': True, 'message': 'Stage 5 completed successfully'})
+        return jsonify({'success': True, 'message': f'Stage {stage} completed successfully'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -237,11 +214,11 @@ def complete_stage5():
 def submit_answer():
     """Submit answer for any game stage"""
     try:
-        data = request.get_json()
+        data = request.get_json(force=True)
         stage = data.get('stage')
         answer = data.get('answer')
         round_id = data.get('round_id')
-        user_id = session.get('user_id')
+        user_id = g.user_id
         
         # Process the answer based on stage
         result = process_game_answer(stage, answer, round_id, user_id)
@@ -255,11 +232,7 @@ def submit_answer():
 def get_user_stats():
     """Get user's game statistics"""
     try:
-        user_id = session.get('user_id')
-        if not user_id:
-            return jsonify({'success': False, 'error': 'User not logged in'}), 401
-        
-        stats = get_user_game_stats(user_id)
+        stats = get_user_game_stats(g.user_id)
         return jsonify(stats)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1,12 +1,57 @@
-from flask import Blueprint, request, jsonify, make_response, session
+from flask import Blueprint, request, session, current_app, Response, stream_with_context
 from database import DatabaseService, PHILIPPINE_TZ
+from .utils import ojsonify, cached_response, json_text, admin_required, session_is_admin
+import csv
 import logging
 from datetime import datetime
+from operator import itemgetter
+from types import MappingProxyType
 
 history_bp = Blueprint('history_api', __name__, url_prefix='/api')
 
 logger = logging.getLogger(__name__)
 
+# Shared across requests; the underlying Supabase client is a process-wide singleton
+_db = DatabaseService()
+
+
+# Accepted sort_by values mapped to articles columns, and sort_order values mapped to "descending"
+_SORT_COLS = MappingProxyType({
+    'created_at': 'created_at',
+    'title': 'title',
+    'classification': 'classification',
+    'factuality_score': 'factuality_score',
+    'classification_score': 'factuality_score'
+})
+_SORT_DESC = MappingProxyType({'asc': False, 'desc': True})
+
+# Client cache lifetimes (seconds) for article details and statistics
+HISTORY_CACHE_MAX_AGE = 60
+HISTORY_STALE_WHILE_REVALIDATE = 300
+
+
+# CSV export layout: base columns always, breakdown/cross-check columns per export flags
+_CSV_BASE_HEADERS = ('ID', 'Title', 'Summary', 'Classification', 'Score', 'Input Type', 'URL', 'Created At')
+_CSV_HEADERS = {
+    (include_breakdown, include_crosscheck): (
+        _CSV_BASE_HEADERS
+        + (('Breakdown Count', 'Breakdown Details') if include_breakdown else ())
+        + (('CrossCheck Count', 'CrossCheck Details') if include_crosscheck else ())
+    )
+    for include_breakdown in (False, True)
+    for include_crosscheck in (False, True)
+}
+_csv_base_columns = itemgetter(
+    'id', 'title', 'summary', 'classification', 'factuality_score', 'input_type', 'link', 'created_at'
+)
+
+
+class _CSVLineBuffer:
+    """File-like sink for csv.writer that hands each written line back to the caller"""
+    def write(self, value):
+        return value
+
+
 @history_bp.route('/history', methods=['GET'])
 def get_articles():
     """
@@ -19,15 +64,19 @@ def get_articles():
     - search: Search term for title, summary, breakdown
     - classification: Filter by classification (Real, Fake)
     - input_type: Filter by input type (url, snippet)
-    - sort_by: Sort field (created_at, classification_score, title)
+    - sort_by: Sort field (created_at, title, classification, factuality_score/classification_score)
     - sort_order: Sort order (asc, desc)
+    - cursor: Opaque keyset cursor from a previous response's pagination.next_cursor
+    - with_total: Include total_articles/total_pages (costs a COUNT(*); default false)
+    
+    Newest-first listings without an explicit page use keyset pagination; the
+    page parameter (or a non-default sort) keeps the offset-based path.
     """
     try:
         # Check if user is logged in and their role
         user_id = session.get('user_id')
-        user_role = session.get('user_role', 'user')
         is_logged_in = user_id is not None
-        is_admin = user_role == 'admin'
+        is_admin = session_is_admin()
         
         # Get query parameters
         page = max(1, int(request.args.get('page', 1)))
@@ -37,71 +86,74 @@ def get_articles():
         input_type = request.args.get('input_type', '').strip()
         sort_by = request.args.get('sort_by', 'created_at').strip()
         sort_order = request.args.get('sort_order', 'desc').strip().lower()
+        sort_column = _SORT_COLS.get(sort_by)
+        if sort_column is None:
+            raise ValueError(f"Unsupported sort_by '{sort_by}'")
+        sort_desc = _SORT_DESC.get(sort_order)
+        if sort_desc is None:
+            raise ValueError(f"Unsupported sort_order '{sort_order}'")
+        cursor = request.args.get('cursor', '').strip()
+        with_total = request.args.get('with_total', 'false').lower() == 'true'
         # Admin-only parameter: show duplicates (default True for backward compatibility)
         show_duplicates = request.args.get('show_duplicates', 'true').lower() == 'true'
         
-        # Debug log for duplicate filtering
-        if is_admin:
-            logger.info(f"🔄 Admin duplicate filter: show_duplicates={show_duplicates} (raw: '{request.args.get('show_duplicates', 'not provided')}')")
-
-        if is_admin:
-            logger.info(f"📊 History API request for admin user {user_id}: page={page}, limit={limit}, search='{search}', "
-                       f"classification='{classification}', input_type='{input_type}', "
-                       f"sort_by='{sort_by}', sort_order='{sort_order}', show_duplicates={show_duplicates} (viewing all articles)")
-        elif is_logged_in:
-            logger.info(f"📊 History API request for user {user_id}: page={page}, limit={limit}, search='{search}', "
-                       f"classification='{classification}', input_type='{input_type}', "
-                       f"sort_by='{sort_by}', sort_order='{sort_order}'")
-        else:
-            logger.info(f"📊 History API request (public view): page={page}, limit={limit}, search='{search}', "
-                       f"classification='{classification}', input_type='{input_type}', "
-                       f"sort_by='{sort_by}', sort_order='{sort_order}'")
+        logger.debug("history.request user=%s admin=%s page=%s limit=%s search=%r classification=%r "
+                     "input_type=%r sort_by=%s sort_order=%s show_duplicates=%s cursor=%s",
+                     user_id, is_admin, page, limit, search, classification,
+                     input_type, sort_by, sort_order, show_duplicates, bool(cursor))
 
-        # Get database service
-        db_service = DatabaseService()
-        
         # Get articles with pagination and filtering
         # Admin users see all articles, regular users see only their own, logged-out users see all (public view)
-        result = db_service.get_articles_with_pagination(
-            page=page,
-            limit=limit,
-            search=search,
-            classification=classification,
-            input_type=input_type,
-            sort_by=sort_by,
-            sort_order=sort_order,
-            user_id=user_id if (is_logged_in and not is_admin) else None,  # Regular users: user-specific, Admin/Public: all articles
-            show_duplicates=show_duplicates if is_admin else True  # Only admin can control duplicate viewing
+        use_keyset = bool(cursor) or (
+            'page' not in request.args and sort_column == 'created_at' and sort_desc
         )
-
-        if is_admin:
-            logger.info(f"✅ Retrieved {len(result.get('articles', []))} articles for admin user {user_id} "
-                       f"(page {page} of {result.get('pagination', {}).get('total_pages', 1)}) - showing all users' articles")
-        elif is_logged_in:
-            logger.info(f"✅ Retrieved {len(result.get('articles', []))} articles for user {user_id} "
-                       f"(page {page} of {result.get('pagination', {}).get('total_pages', 1)})")
+        
+        if use_keyset:
+            result = _db.get_articles_keyset(
+                limit=limit,
+                cursor=cursor or None,
+                search=search,
+                classification=classification,
+                input_type=input_type,
+                user_id=user_id if (is_logged_in and not is_admin) else None,
+                show_duplicates=show_duplicates if is_admin else True
+            )
         else:
-            logger.info(f"✅ Retrieved {len(result.get('articles', []))} articles (public view) "
-                       f"(page {page} of {result.get('pagination', {}).get('total_pages', 1)})")
+            result = _db.get_articles_with_pagination(
+                page=page,
+                limit=limit,
+                search=search,
+                classification=classification,
+                input_type=input_type,
+                sort_by=sort_column,
+                sort_order='desc' if sort_desc else 'asc',
+                user_id=user_id if (is_logged_in and not is_admin) else None,  # Regular users: user-specific, Admin/Public: all articles
+                show_duplicates=show_duplicates if is_admin else True,  # Only admin can control duplicate viewing
+                with_total=with_total
+            )
+
+        logger.debug("history.response user=%s admin=%s page=%s count=%s has_more=%s",
+                     user_id, is_admin, page, len(result.get('articles', [])),
+                     result.get('pagination', {}).get('has_more', False))
 
         # Add is_admin flag to the response for frontend use
         result['is_admin'] = is_admin
 
-        return jsonify(result)
+        return ojsonify(result)
 
     except ValueError as e:
-        logger.error(f"❌ Invalid parameter in history request: {e}")
-        return jsonify({
+        logger.warning("history.request invalid parameter: %s", e)
+        return ojsonify({
             'error': 'Invalid parameter',
             'message': str(e)
-        }), 400
+        }, 400)
 
     except Exception as e:
-        logger.error(f"❌ Error in get_articles: {e}")
-        return jsonify({
+        logger.error("history.request failed: %s", e)
+        return ojsonify({
             'error': 'Internal server error',
             'message': 'Failed to retrieve articles'
-        }), 500
+        }, 500)
 
 
 @history_bp.route('/history/<int:article_id>', methods=['GET'])
@@ -115,56 +167,46 @@ def get_article_details(article_id):
     try:
         # Check if user is logged in and their role
         user_id = session.get('user_id')
-        user_role = session.get('user_role', 'user')
         is_logged_in = user_id is not None
-        is_admin = user_role == 'admin'
+        is_admin = session_is_admin()
         
-        if is_admin:
-            logger.info(f"🔍 Getting details for article {article_id} for admin user {user_id}")
-        elif is_logged_in:
-            logger.info(f"🔍 Getting details for article {article_id} for user {user_id}")
-        else:
-            logger.info(f"🔍 Getting details for article {article_id} (public view)")
+        logger.debug("history.details article=%s user=%s admin=%s", article_id, user_id, is_admin)
 
-        # Get database service
-        db_service = DatabaseService()
-        
-        # Get article with full details
-        article = db_service.get_article_with_details(article_id)
+        # Get article with full details; the cached payload is the same for every viewer,
+        # ownership is checked below
+        article = _db.get_cached_article_with_details(article_id)
         
         if not article:
-            logger.warning(f"⚠️ Article {article_id} not found")
-            return jsonify({
+            logger.debug("history.details article=%s not found", article_id)
+            return ojsonify({
                 'error': 'Article not found',
                 'message': f'No article found with ID {article_id}'
-            }), 404
+            }, 404)
 
         # If user is logged in (but not admin), check if the article belongs to them
         # Admin users can view any article, regular users can only view their own
         if is_logged_in and not is_admin and article.get('user_id') != user_id:
-            logger.warning(f"⚠️ User {user_id} attempted to access article {article_id} owned by user {article.get('user_id')}")
-            return jsonify({
+            logger.warning("history.details user=%s denied access to article=%s owned by user=%s",
+                           user_id, article_id, article.get('user_id'))
+            return ojsonify({
                 'error': 'Access denied',
                 'message': 'You can only view your own articles'
-            }), 403
-
-        if is_admin:
-            logger.info(f"✅ Retrieved details for article {article_id} for admin user {user_id} (viewing all articles)")
-        elif is_logged_in:
-            logger.info(f"✅ Retrieved details for article {article_id} for user {user_id}")
-        else:
-            logger.info(f"✅ Retrieved details for article {article_id} (public view)")
-
-        return jsonify({
-            'article': article
-        })
+            }, 403)
+
+        # Public viewers share one cacheable representation; logged-in views stay private
+        return cached_response(
+            ojsonify({'article': article}),
+            HISTORY_CACHE_MAX_AGE,
+            public=not is_logged_in,
+            stale_while_revalidate=HISTORY_STALE_WHILE_REVALIDATE
+        )
 
     except Exception as e:
-        logger.error(f"❌ Error getting article {article_id} details: {e}")
-        return jsonify({
+        logger.error("history.details article=%s failed: %s", article_id, e)
+        return ojsonify({
             'error': 'Internal server error',
             'message': 'Failed to retrieve article details'
-        }), 500
+        }, 500)
 
 
 @history_bp.route('/history/stats', methods=['GET'])
@@ -178,38 +220,27 @@ def get_history_stats():
     try:
         # Check if user is logged in and their role
         user_id = session.get('user_id')
-        user_role = session.get('user_role', 'user')
         is_logged_in = user_id is not None
-        is_admin = user_role == 'admin'
+        is_admin = session_is_admin()
         
-        if is_admin:
-            logger.info(f"📈 Getting global history statistics for admin user {user_id}")
-        elif is_logged_in:
-            logger.info(f"📈 Getting history statistics for user {user_id}")
-        else:
-            logger.info("📈 Getting global history statistics (public view)")
+        logger.debug("history.stats user=%s admin=%s", user_id, is_admin)
 
-        # Get database service
-        db_service = DatabaseService()
-        
-        # Get statistics - global for admin and public users, user-specific for regular users
-        stats = db_service.get_analysis_statistics(user_id=user_id if (is_logged_in and not is_admin) else None)
+        # Get statistics - global for admin and public users, user-specific for regular users (cached briefly)
+        stats = _db.get_cached_analysis_statistics(user_id=user_id if (is_logged_in and not is_admin) else None)
 
-        if is_admin:
-            logger.info(f"✅ Retrieved global history statistics for admin user {user_id}")
-        elif is_logged_in:
-            logger.info(f"✅ Retrieved history statistics for user {user_id}")
-        else:
-            logger.info("✅ Retrieved global history statistics")
-
-        return jsonify(stats)
+        return cached_response(
+            ojsonify(stats),
+            HISTORY_CACHE_MAX_AGE,
+            public=not is_logged_in,
+            stale_while_revalidate=HISTORY_STALE_WHILE_REVALIDATE
+        )
 
     except Exception as e:
-        logger.error(f"❌ Error getting history stats: {e}")
-        return jsonify({
+        logger.error("history.stats failed: %s", e)
+        return ojsonify({
             'error': 'Internal server error',
             'message': 'Failed to retrieve statistics'
-        }), 500
+        }, 500)
 
 
 @history_bp.route('/history/<int:article_id>', methods=['DELETE'])
@@ -222,65 +253,46 @@ def delete_article(article_id):
     try:
         # Check if user is logged in - deletion requires authentication
         if 'user_id' not in session:
-            logger.warning("⚠️ Unauthorized attempt to delete article - user not logged in")
-            return jsonify({
+            logger.debug("history.delete article=%s denied: not logged in", article_id)
+            return ojsonify({
                 'error': 'Authentication required',
                 'message': 'You must be logged in to delete articles'
-            }), 401
+            }, 401)
 
         user_id = session['user_id']
-        user_role = session.get('user_role', 'user')
-        is_admin = user_role == 'admin'
+        is_admin = session_is_admin()
         
-        if is_admin:
-            logger.info(f"🗑️ Admin user {user_id} attempting to delete article {article_id}")
-        else:
-            logger.info(f"🗑️ User {user_id} attempting to delete article {article_id}")
+        logger.debug("history.delete article=%s user=%s admin=%s", article_id, user_id, is_admin)
 
-        # Get database service
-        db_service = DatabaseService()
+        # Delete in one conditional statement; the status tells not-found and not-owned apart
+        # (breakdown and cross-check rows cascade with the article)
+        status = _db.delete_article_if_owned(article_id, user_id, is_admin=is_admin)
         
-        # Check if article exists
-        article = db_service.get_article_with_details(article_id)
-        if not article:
-            logger.warning(f"⚠️ Article {article_id} not found for deletion")
-            return jsonify({
+        if status == 'not_found':
+            logger.debug("history.delete article=%s not found", article_id)
+            return ojsonify({
                 'error': 'Article not found',
                 'message': f'No article found with ID {article_id}'
-            }), 404
+            }, 404)
 
-        # Check if the article belongs to the current user (unless admin)
-        if not is_admin and article.get('user_id') != user_id:
-            logger.warning(f"⚠️ User {user_id} attempted to delete article {article_id} owned by user {article.get('user_id')}")
-            return jsonify({
+        if status == 'forbidden':
+            logger.warning("history.delete user=%s denied deleting article=%s owned by another user", user_id, article_id)
+            return ojsonify({
                 'error': 'Access denied',
                 'message': 'You can only delete your own articles'
-            }), 403
+            }, 403)
 
-        # Delete article (this should cascade to delete breakdown and cross-check results)
-        success = db_service.delete_article(article_id)
-        
-        if success:
-            if is_admin:
-                logger.info(f"✅ Admin user {user_id} successfully deleted article {article_id} (owned by user {article.get('user_id')})")
-            else:
-                logger.info(f"✅ Successfully deleted article {article_id} for user {user_id}")
-            return jsonify({
-                'message': f'Article {article_id} deleted successfully'
-            })
-        else:
-            logger.error(f"❌ Failed to delete article {article_id} for user {user_id}")
-            return jsonify({
-                'error': 'Delete failed',
-                'message': f'Failed to delete article {article_id}'
-            }), 500
+        logger.debug("history.delete article=%s deleted", article_id)
+        return ojsonify({
+            'message': f'Article {article_id} deleted successfully'
+        })
 
     except Exception as e:
-        logger.error(f"❌ Error deleting article {article_id}: {e}")
-        return jsonify({
+        logger.error("history.delete article=%s failed: %s", article_id, e)
+        return ojsonify({
             'error': 'Internal server error',
             'message': 'Failed to delete article'
-        }), 500
+        }, 500)
 
 
 @history_bp.route('/history/export', methods=['GET'])
@@ -297,320 +309,245 @@ def export_history():
     try:
         # Check if user is logged in - export requires authentication
         if 'user_id' not in session:
-            logger.warning("⚠️ Unauthorized access to export history - user not logged in")
-            return jsonify({
+            logger.debug("history.export denied: not logged in")
+            return ojsonify({
                 'error': 'Authentication required',
                 'message': 'You must be logged in to export analysis history'
-            }), 401
+            }, 401)
 
         user_id = session['user_id']
-        user_role = session.get('user_role', 'user')
-        is_admin = user_role == 'admin'
+        is_admin = session_is_admin()
         
         export_format = request.args.get('format', 'json').lower()
         include_breakdown = request.args.get('include_breakdown', 'true').lower() == 'true'
         include_crosscheck = request.args.get('include_crosscheck', 'true').lower() == 'true'
 
-        if is_admin:
-            logger.info(f"📤 Admin user {user_id} exporting all articles: format={export_format}, "
-                       f"breakdown={include_breakdown}, crosscheck={include_crosscheck}")
-        else:
-            logger.info(f"📤 Exporting history for user {user_id}: format={export_format}, "
-                       f"breakdown={include_breakdown}, crosscheck={include_crosscheck}")
+        logger.debug("history.export user=%s admin=%s format=%s breakdown=%s crosscheck=%s",
+                     user_id, is_admin, export_format, include_breakdown, include_crosscheck)
 
-        # Get database service
-        db_service = DatabaseService()
-        
-        # Get articles for export - all articles for admin, user-specific for regular users
-        all_articles = db_service.get_all_articles_for_export(
+        # Articles are streamed in batches - all articles for admin, user-specific for regular users
+        articles = _db.iter_all_articles_for_export(
             include_breakdown=include_breakdown,
             include_crosscheck=include_crosscheck,
             user_id=user_id if not is_admin else None  # Admin gets all articles, regular users get their own
         )
 
+        # One timestamp for the whole export (filename and export_timestamp)
+        now = datetime.now(PHILIPPINE_TZ)
+
         if export_format == 'csv':
-            # Convert to CSV format
-            import csv
-            import io
+            headers = _CSV_HEADERS[(include_breakdown, include_crosscheck)]
             
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # Write headers
-            headers = ['ID', 'Title', 'Summary', 'Classification', 'Score', 'Input Type', 'URL', 'Created At']
-            if include_breakdown:
-                headers.extend(['Breakdown Count', 'Breakdown Details'])
-            if include_crosscheck:
-                headers.extend(['CrossCheck Count', 'CrossCheck Details'])
-            
-            writer.writerow(headers)
-            
-            # Write data
-            for article in all_articles:
-                row = [
-                    article.get('id'),
-                    article.get('title'),
-                    article.get('summary'),
-                    article.get('classification'),
-                    article.get('classification_score'),
-                    article.get('input_type'),
-                    article.get('original_url'),
-                    article.get('created_at')
-                ]
+            def generate():
+                # Each writerow() returns the formatted line, which is yielded straight to the client
+                writer = csv.writer(_CSVLineBuffer())
+                yield writer.writerow(headers)
                 
-                if include_breakdown:
-                    breakdown = article.get('breakdown', [])
-                    row.extend([len(breakdown), str(breakdown)])
+                exported = 0
+                for article in articles:
+                    row = _csv_base_columns(article)
+                    
+                    if include_breakdown:
+                        breakdown = article['breakdown']
+                        row += (1 if breakdown else 0, json_text(breakdown) if breakdown else '')
+                        
+                    if include_crosscheck:
+                        crosscheck = article['crosscheck_results']
+                        row += (len(crosscheck), json_text(crosscheck))
                     
-                if include_crosscheck:
-                    crosscheck = article.get('cross_check_results', [])
-                    row.extend([len(crosscheck), str(crosscheck)])
+                    yield writer.writerow(row)
+                    exported += 1
                 
-                writer.writerow(row)
+                logger.debug("history.export done format=csv articles=%s", exported)
             
-            csv_content = output.getvalue()
-            output.close()
-            
-            response = make_response(csv_content)
-            response.headers['Content-Type'] = 'text/csv'
-            response.headers['Content-Disposition'] = f'attachment; filename=truth_guard_history_{datetime.now(PHILIPPINE_TZ).strftime("%Y%m%d_%H%M%S")}.csv'
-            
-            logger.info(f"✅ Exported {len(all_articles)} articles as CSV")
-            return response
+            filename = f'truth_guard_history_{now.strftime("%Y%m%d_%H%M%S")}.csv'
+            return Response(
+                stream_with_context(generate()),
+                mimetype='text/csv',
+                headers={'Content-Disposition': f'attachment; filename={filename}'}
+            )
             
         else:  # JSON format
-            response_data = {
-                'export_timestamp': datetime.now(PHILIPPINE_TZ).isoformat(),
-                'total_articles': len(all_articles),
-                'export_options': {
-                    'include_breakdown': include_breakdown,
-                    'include_crosscheck': include_crosscheck
-                },
-                'articles': all_articles
+            export_options = {
+                'include_breakdown': include_breakdown,
+                'include_crosscheck': include_crosscheck
             }
+            dumps = current_app.json.dumps
+            
+            def generate():
+                # Serialize one article at a time; the total is only known once the stream ends
+                yield ('{"export_timestamp":' + dumps(now.isoformat()) +
+                       ',"export_options":' + dumps(export_options) + ',"articles":[')
+                exported = 0
+                for article in articles:
+                    yield dumps(article) if exported == 0 else ',' + dumps(article)
+                    exported += 1
+                yield '],"total_articles":' + str(exported) + '}'
+                
+                logger.debug("history.export done format=json articles=%s", exported)
             
-            logger.info(f"✅ Exported {len(all_articles)} articles as JSON")
-            return jsonify(response_data)
+            return Response(stream_with_context(generate()), mimetype='application/json')
 
     except Exception as e:
-        logger.error(f"❌ Error exporting history: {e}")
-        return jsonify({
+        logger.error("history.export failed: %s", e)
+        return ojsonify({
             'error': 'Export failed',
             'message': 'Failed to export analysis history'
-        }), 500
+        }, 500)
 
 
 @history_bp.route('/articles/<int:article_id>/duplicates', methods=['GET'])
+@admin_required
 def get_article_duplicates(article_id):
     """
     Get information about duplicate articles (users who have the same article)
     - Admin only endpoint
     """
     try:
-        # Get user info from session
-        user_id = session.get('user_id')
-        user_role = session.get('user_role')
-        is_logged_in = bool(user_id)
-        is_admin = user_role == 'admin'
-
-        if not is_logged_in or not is_admin:
-            return jsonify({
-                'error': 'Unauthorized',
-                'message': 'Admin access required'
-            }), 401
+        user_id = session['user_id']
 
-        logger.info(f"🔍 Getting duplicate info for article {article_id} by admin {user_id}")
+        logger.debug("history.duplicates article=%s admin=%s", article_id, user_id)
 
         try:
             # Get the article to find similar ones
-            db = DatabaseService()
-            article_data = db.get_article_by_id(article_id)
+            article_data = _db.get_article_by_id(article_id)
             
             if not article_data or not article_data.get('article'):
-                logger.warning(f"❌ Article {article_id} not found")
-                return jsonify({
+                logger.debug("history.duplicates article=%s not found", article_id)
+                return ojsonify({
                     'error': 'Not found',
                     'message': 'Article not found'
-                }), 404
+                }, 404)
 
             article = article_data['article']
-            logger.info(f"📄 Found article: title='{article.title}', url='{article.link}'")
 
-            # Get all articles with the same title and URL (duplicates)
-            duplicates = db.get_duplicate_articles(article.title, article.link)
+            # Get the users who have the same title and URL, and the number of copies, in one query
+            users, total_duplicates = _db.get_duplicate_users(article.get('title'), article.get('link'))
             
-            logger.info(f"🔄 Found {len(duplicates)} duplicate articles")
-            
-            # Extract unique users who have this article
-            users = []
-            seen_users = set()
-            
-            for dup_article in duplicates:
-                if dup_article.user_id and dup_article.user_id not in seen_users:
-                    user_info = db.get_user_by_id(dup_article.user_id)
-                    if user_info:
-                        users.append({
-                            'id': user_info['id'],
-                            'username': user_info['username'],
-                            'email': user_info['email']
-                        })
-                        seen_users.add(dup_article.user_id)
-
-            logger.info(f"✅ Found {len(users)} users with duplicate articles for article {article_id}")
-
-            return jsonify({
+            logger.debug("history.duplicates article=%s copies=%s users=%s", article_id, total_duplicates, len(users))
+
+            return ojsonify({
                 'article_id': article_id,
                 'users': users,
-                'total_duplicates': len(duplicates)
+                'total_duplicates': total_duplicates
             })
             
         except Exception as db_error:
-            logger.error(f"❌ Database error in get_article_duplicates: {db_error}")
-            logger.exception("Full traceback:")
-            return jsonify({
+            logger.exception("history.duplicates article=%s database error", article_id)
+            return ojsonify({
                 'error': 'Database error',
                 'message': f'Failed to get duplicate information: {str(db_error)}'
-            }), 500
+            }, 500)
 
     except Exception as e:
-        logger.error(f"❌ Error getting article duplicates: {e}")
-        return jsonify({
+        logger.error("history.duplicates article=%s failed: %s", article_id, e)
+        return ojsonify({
             'error': 'Internal server error',
             'message': 'Failed to get duplicate information'
-        }), 500
+        }, 500)
 
 
 @history_bp.route('/articles/<int:article_id>/delete-for-user', methods=['DELETE'])
+@admin_required
 def delete_article_for_user(article_id):
     """
     Delete article for a specific user
     - Admin only endpoint
     """
     try:
-        # Get user info from session
-        user_id = session.get('user_id')
-        user_role = session.get('user_role')
-        is_logged_in = bool(user_id)
-        is_admin = user_role == 'admin'
-
-        if not is_logged_in or not is_admin:
-            return jsonify({
-                'error': 'Unauthorized',
-                'message': 'Admin access required'
-            }), 401
+        user_id = session['user_id']
 
         # Get target user ID from request body
         data = request.get_json()
         target_user_id = data.get('user_id') if data else None
         
         if not target_user_id:
-            return jsonify({
+            return ojsonify({
                 'error': 'Bad request',
                 'message': 'user_id is required'
-            }), 400
+            }, 400)
 
-        logger.info(f"🗑️ Admin {user_id} deleting article {article_id} for user {target_user_id}")
+        logger.debug("history.delete_for_user article=%s target=%s admin=%s", article_id, target_user_id, user_id)
 
-        db = DatabaseService()
+        # Delete the article; an empty result means the user has no such article
+        success, existed = _db.delete_article_for_user(article_id, target_user_id)
         
-        # Find the specific article for this user
-        article = db.get_article_by_id_and_user(article_id, target_user_id)
-        
-        if not article:
-            return jsonify({
+        if not existed:
+            return ojsonify({
                 'error': 'Not found',
                 'message': 'Article not found for the specified user'
-            }), 404
+            }, 404)
 
-        # Delete the article
-        success = db.delete_article_for_user(article_id, target_user_id)
-        
         if not success:
-            return jsonify({
+            return ojsonify({
                 'error': 'Internal server error',
                 'message': 'Failed to delete article'
-            }), 500
+            }, 500)
 
-        logger.info(f"✅ Successfully deleted article {article_id} for user {target_user_id}")
+        logger.debug("history.delete_for_user article=%s target=%s deleted", article_id, target_user_id)
 
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': f'Article deleted for user {target_user_id}'
         })
 
     except Exception as e:
-        logger.error(f"❌ Error deleting article for user: {e}")
-        return jsonify({
+        logger.error("history.delete_for_user article=%s failed: %s", article_id, e)
+        return ojsonify({
             'error': 'Internal server error',
             'message': 'Failed to delete article'
-        }), 500
+        }, 500)
 
 
 @history_bp.route('/articles/<int:article_id>/delete-all', methods=['DELETE'])
+@admin_required
 def delete_article_for_all_users(article_id):
     """
     Delete article for all users (complete removal from system)
     - Admin only endpoint
     """
     try:
-        # Get user info from session
-        user_id = session.get('user_id')
-        user_role = session.get('user_role')
-        is_logged_in = bool(user_id)
-        is_admin = user_role == 'admin'
-
-        if not is_logged_in or not is_admin:
-            return jsonify({
-                'error': 'Unauthorized',
-                'message': 'Admin access required'
-            }), 401
+        user_id = session['user_id']
 
-        logger.info(f"🗑️ Admin {user_id} deleting article {article_id} for ALL users")
+        logger.debug("history.delete_all article=%s admin=%s", article_id, user_id)
 
-        db = DatabaseService()
+        # Delete all articles with the same title and URL (all duplicates) in one statement
+        deleted_count = _db.delete_all_duplicates_by_article_id(article_id)
         
-        # Get the article to find all duplicates
-        article_data = db.get_article_by_id(article_id)
-        
-        if not article_data or not article_data.get('article'):
-            return jsonify({
+        if not deleted_count:
+            return ojsonify({
                 'error': 'Not found',
                 'message': 'Article not found'
-            }), 404
-
-        article = article_data['article']
+            }, 404)
 
-        # Delete all articles with the same title and URL (all duplicates)
-        deleted_count = db.delete_all_duplicate_articles(article.title, article.link)
-        
-        logger.info(f"✅ Successfully deleted {deleted_count} duplicate articles for article {article_id}")
+        logger.debug("history.delete_all article=%s deleted=%s", article_id, deleted_count)
 
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': f'Article deleted for all users ({deleted_count} entries removed)',
             'deleted_count': deleted_count
         })
 
     except Exception as e:
-        logger.error(f"❌ Error deleting article for all users: {e}")
-        return jsonify({
+        logger.error("history.delete_all article=%s failed: %s", article_id, e)
+        return ojsonify({
             'error': 'Internal server error',
             'message': 'Failed to delete article'
-        }), 500
+        }, 500)
 
 
 # Error handlers for the blueprint
 @history_bp.errorhandler(404)
 def not_found(error):
-    return jsonify({
+    return ojsonify({
         'error': 'Not found',
         'message': 'The requested resource was not found'
-    }), 404
+    }, 404)
 
 
 @history_bp.errorhandler(500)
 def internal_error(error):
-    return jsonify({
+    return ojsonify({
         'error': 'Internal server error',
         'message': 'An unexpected error occurred'
-    }), 500
+    }, 500)
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from functools import wraps
 from database import DatabaseService, User
+from .utils import refresh_session_role, session_is_admin
 
 main_bp = Blueprint('main', __name__)
 
@@ -18,9 +19,10 @@ def login_required(f):
 def index():
     # Check if user is logged in and is admin, redirect to admin dashboard
     if session.get('user_id'):
-        from database import DatabaseService
-        user = DatabaseService.get_user_by_id(session['user_id'])
-        if user and user.get('role') == 'admin':
+        # Login confirms the role; older sessions and failed lookups are checked against the database
+        if session.get('role_checked_at') is None:
+            refresh_session_role()
+        if session_is_admin():
             return redirect(url_for('admin.admin_dashboard'))
     
     return render_template('home.html')
@@ -105,8 +107,3 @@ def feedback_page():
     
     # GET request - show feedback form
     return render_template('feedback.html')
-
-@main_bp.route('/static/<path:filename>')
-def static_files(filename):
-    from flask import current_app
-    return current_app.send_static_file(filename)
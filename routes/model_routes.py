@@ -1,33 +1,87 @@
-from flask import Blueprint, jsonify, current_app
+from flask import Blueprint, current_app
+import logging
+import os
 import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from ttl_cache import TTLCache
+from .utils import ojsonify
 
 model_bp = Blueprint('model', __name__)
 
+logger = logging.getLogger(__name__)
+
+# Resolved from the app on first use; web_app creates the feedback service once and never replaces it
+model_bp.feedback_service = None
+
+def _feedback_service():
+    """Return the app's feedback service, caching it on the blueprint once it exists"""
+    service = model_bp.feedback_service
+    if service is None:
+        service = model_bp.feedback_service = current_app.feedback_service
+    return service
+
+# The status page polls this endpoint; rapid repeat polls reuse the last encoded body
+MODEL_STATUS_CACHE_TTL = 1.5
+_status_cache = TTLCache(ttl=MODEL_STATUS_CACHE_TTL, maxsize=1)
+
+# Model file presence is re-checked at most every MODEL_FILE_CHECK_INTERVAL seconds
+MODEL_FILE_PATH = 'fake_news_model.pkl'
+MODEL_FILE_CHECK_INTERVAL = 30
+_model_file_state = {'mtime': None, 'checked_at': None}
+_model_file_lock = threading.Lock()
+
+def get_model_file_mtime():
+    """Return the model file's mtime, or None if it is missing (stat cached briefly)"""
+    now = time.monotonic()
+    with _model_file_lock:
+        checked_at = _model_file_state['checked_at']
+        if checked_at is None or now - checked_at > MODEL_FILE_CHECK_INTERVAL:
+            try:
+                _model_file_state['mtime'] = os.stat(MODEL_FILE_PATH).st_mtime
+            except FileNotFoundError:
+                _model_file_state['mtime'] = None
+            _model_file_state['checked_at'] = now
+        return _model_file_state['mtime']
+
+def refresh_model_file_state():
+    """Force the next get_model_file_mtime() call to stat the file again"""
+    with _model_file_lock:
+        _model_file_state['checked_at'] = None
+
+# Retraining runs on a single background worker; task states are kept for /retrain-status
+_RETRAIN_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-retrain')
+_RETRAIN_TASKS = {}
+_RETRAIN_TASKS_LOCK = threading.Lock()
+_RETRAIN_TASKS_MAX_ENTRIES = 100
+_active_retrain_task = None
+
+def invalidate_model_status_cache():
+    """Drop the cached model status so the next poll recomputes it"""
+    _status_cache.clear()
+
 @model_bp.route('/model-status')
 def model_status():
     """Get current model status and statistics"""
     try:
-        from web_app import detector, feedback_service
+        detector = current_app.detector
         
-        # Enhanced debug logging with more details
-        print("="*50)
-        print("🔍 MODEL STATUS CHECK FROM ROUTES")
-        print("="*50)
-        print(f"detector.is_trained: {detector.is_trained}")
-        print(f"detector.model exists: {detector.model is not None}")
-        print(f"detector.accuracy: {detector.accuracy}")
+        cached_body = _status_cache.get('status')
+        if cached_body is not None and detector.is_trained:
+            return current_app.response_class(cached_body, mimetype='application/json')
         
-        # Check model file existence
-        import os
-        model_file_exists = os.path.exists('fake_news_model.pkl')
-        print(f"Model file exists: {model_file_exists}")
+        logger.debug("model_status is_trained=%s model_loaded=%s accuracy=%s",
+                     detector.is_trained, detector.model is not None, detector.accuracy)
+        
+        # Check model file existence (cached stat)
+        model_file_exists = get_model_file_mtime() is not None
         
         # If model is not trained but file exists, try to reload
         if not detector.is_trained and model_file_exists:
-            print("⚠️ Model not trained but file exists - attempting reload...")
+            logger.info("Model not trained but model file exists - attempting reload")
             reload_success = detector.load_model()
-            print(f"Reload attempt success: {reload_success}")
-            print(f"After reload - is_trained: {detector.is_trained}")
+            logger.info("Model reload success=%s is_trained=%s", reload_success, detector.is_trained)
         
         status_info = {
             'is_trained': detector.is_trained,
@@ -39,23 +93,12 @@ def model_status():
             status_info['accuracy'] = f"{detector.accuracy:.4f}"
             status_info['status'] = f"Model ready (Accuracy: {detector.accuracy:.1%})"
         
-        # Use the correct feedback service reference
-        current_feedback_service = getattr(current_app, 'feedback_service', feedback_service)
-        print(f"🔍 FEEDBACK SERVICE CHECK:")
-        print(f"   current_feedback_service exists: {current_feedback_service is not None}")
-        print(f"   feedback_service from import exists: {feedback_service is not None}")
+        current_feedback_service = _feedback_service()
         
         if current_feedback_service:
-            print(f"   📊 Getting feedback stats...")
-            feedback_stats = current_feedback_service.get_feedback_stats()
-            status_info['feedback'] = feedback_stats
-            print(f"   📤 Feedback stats from service: {feedback_stats}")
-            print(f"   📊 Key values:")
-            print(f"     total_feedback: {feedback_stats.get('total_feedback')}")
-            print(f"     pending_training: {feedback_stats.get('pending_training')}")
-            print(f"     can_retrain: {feedback_stats.get('can_retrain')}")
+            status_info['feedback'] = current_feedback_service.get_feedback_stats()
         else:
-            print("⚠️ No feedback service available")
+            logger.debug("model_status: no feedback service available")
             status_info['feedback'] = {
                 'total_feedback': 0, 
                 'used_for_training': 0, 
@@ -63,62 +106,115 @@ def model_status():
                 'can_retrain': False
             }
         
-        print(f"📤 FINAL status_info being returned:")
-        print(f"   feedback section: {status_info.get('feedback')}")
-        print("="*50)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("model_status response: %s", status_info)
+        
+        response = ojsonify(status_info)
+        if detector.is_trained:
+            _status_cache.set('status', response.get_data())
         
-        return jsonify(status_info)
+        return response
+        
+    except Exception as e:
+        logger.exception("Error in model status route")
+        return ojsonify({'error': f'An error occurred: {str(e)}'}, 500)
+
+def _set_retrain_task(task_id, **fields):
+    """Create or update the state of a background retraining task"""
+    with _RETRAIN_TASKS_LOCK:
+        _RETRAIN_TASKS.setdefault(task_id, {'task_id': task_id}).update(fields)
+        # Drop the oldest finished tasks so the registry stays bounded
+        while len(_RETRAIN_TASKS) > _RETRAIN_TASKS_MAX_ENTRIES:
+            _RETRAIN_TASKS.pop(next(iter(_RETRAIN_TASKS)))
+
+def _run_retrain(feedback_service, task_id):
+    """Background worker: retrain the model and record the outcome for /retrain-status"""
+    global _active_retrain_task
+    try:
+        _set_retrain_task(task_id, state='running')
+        result = feedback_service.manual_retrain_with_feedback()
         
+        if result['success']:
+            refresh_model_file_state()
+            invalidate_model_status_cache()
+            _set_retrain_task(
+                task_id,
+                state='success',
+                success=True,
+                message=result['message'],
+                details={
+                    'old_accuracy': result.get('old_accuracy'),
+                    'new_accuracy': result.get('new_accuracy'),
+                    'feedback_used': result.get('feedback_used'),
+                    'total_samples': result.get('total_samples')
+                }
+            )
+        else:
+            _set_retrain_task(task_id, state='failed', success=False, message=result['message'])
     except Exception as e:
-        print(f"❌ Error in model status route: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
+        logger.exception("Error in background retraining task %s", task_id)
+        _set_retrain_task(task_id, state='failed', success=False,
+                          message=f'An error occurred during retraining: {str(e)}')
+    finally:
+        with _RETRAIN_TASKS_LOCK:
+            _active_retrain_task = None
 
 @model_bp.route('/trigger-retrain', methods=['POST'])
 def trigger_retrain():
-    """Manually trigger model retraining with confirmation"""
+    """Start model retraining with user feedback in the background; poll /retrain-status/<task_id>"""
+    global _active_retrain_task
     try:
-        from web_app import feedback_service
-        
-        # Use the correct feedback service reference
-        current_feedback_service = getattr(current_app, 'feedback_service', feedback_service)
+        current_feedback_service = _feedback_service()
         if not current_feedback_service:
-            return jsonify({'error': 'Feedback service not available'}), 503
+            return ojsonify({'error': 'Feedback service not available'}, 503)
         
         feedback_stats = current_feedback_service.get_feedback_stats()
         
         if feedback_stats['pending_training'] == 0:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'message': 'No new feedback available for retraining.'
-            }), 400
+            }, 400)
+        
+        # Only one retraining may run at a time
+        with _RETRAIN_TASKS_LOCK:
+            running_task = _active_retrain_task
+            if running_task is None:
+                task_id = uuid.uuid4().hex
+                _active_retrain_task = task_id
+        if running_task is not None:
+            return ojsonify({
+                'success': False,
+                'task_id': running_task,
+                'message': 'Retraining is already in progress.'
+            }, 409)
         
-        print(f"🔄 Manual retraining triggered with {feedback_stats['pending_training']} pending feedback entries")
+        logger.info("Manual retraining %s triggered with %s pending feedback entries",
+                    task_id, feedback_stats['pending_training'])
         
-        # Perform manual retraining (synchronous for immediate feedback)
-        result = current_feedback_service.manual_retrain_with_feedback()
+        _set_retrain_task(task_id, state='pending')
+        _RETRAIN_POOL.submit(_run_retrain, current_feedback_service, task_id)
         
-        if result['success']:
-            return jsonify({
-                'success': True,
-                'message': result['message'],
-                'details': {
-                    'old_accuracy': result.get('old_accuracy'),
-                    'new_accuracy': result.get('new_accuracy'),
-                    'feedback_used': result.get('feedback_used'),
-                    'total_samples': result.get('total_samples')
-                }
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': result['message']
-            }), 400
+        return ojsonify({
+            'success': True,
+            'task_id': task_id,
+            'message': 'Retraining started'
+        }, 202)
         
     except Exception as e:
-        print(f"❌ Error in manual retrain route: {str(e)}")
-        return jsonify({
+        logger.exception("Error in manual retrain route")
+        return ojsonify({
             'success': False,
             'message': f'An error occurred during retraining: {str(e)}'
-        }), 500
+        }, 500)
+
+@model_bp.route('/retrain-status/<task_id>')
+def retrain_status(task_id):
+    """Get the state of a background retraining task (pending, running, success or failed)"""
+    with _RETRAIN_TASKS_LOCK:
+        task = dict(_RETRAIN_TASKS[task_id]) if task_id in _RETRAIN_TASKS else None
+    
+    if task is None:
+        return ojsonify({'error': 'Unknown retraining task'}, 404)
+    
+    return ojsonify(task)
@@ -1,78 +1,75 @@
 from flask import Blueprint, request, render_template, redirect, url_for, flash, session
-from datetime import datetime, timedelta, timezone
-from werkzeug.security import generate_password_hash, check_password_hash
-from database import DatabaseService, User, PHILIPPINE_TZ
+from database import DatabaseService, User
 from services.user_service import user_service
-from functools import wraps
+from services.password_service import hash_password
+import hashlib
+import re
+from datetime import datetime, timedelta, timezone
 import secrets
 import string
-import hashlib
-import time
 import os
+from .utils import admin_page_required, mark_session_role
+from rate_limiter import RateLimiter
+from ttl_cache import TTLCache
+
+try:
+    from services.email_service import send_password_reset_token_notification
+except ImportError:
+    send_password_reset_token_notification = None
 
 # Create blueprint
 passwordreset_bp = Blueprint('passwordreset', __name__, url_prefix='/passwordreset')
 
-def admin_required(f):
-    """Decorator to require admin role for access"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if not session.get('user_id'):
-            flash('Please log in to access this page.', 'error')
-            return redirect(url_for('auth.login'))
-        
-        from database import DatabaseService
-        user = DatabaseService.get_user_by_id(session['user_id'])
-        if not user or user.get('role') != 'admin':
-            flash('Access denied. Admin privileges required.', 'error')
-            return redirect(url_for('main.index'))
-        
-        return f(*args, **kwargs)
-    return decorated_function
+# Shared across requests; the underlying Supabase client is a process-wide singleton
+_db = DatabaseService()
 
-# Generate a random secret key for this session if not in environment
-_SESSION_SECRET_KEY = os.environ.get('PASSWORD_RESET_SECRET_KEY') or secrets.token_urlsafe(64)
+# Reset requests per client IP and identifier: 3 per hour, 20 per day (checked before any DB work)
+_reset_request_limiter = RateLimiter(((3, 3600), (20, 86400)))
 
-# Helper function to generate secure reset token
-def generate_reset_token(user_id, email):
-    """Generate a secure time-based reset token"""
-    timestamp = str(int(time.time()))
-    # Add random salt for additional security
-    salt = secrets.token_urlsafe(16)
-    token_data = f"{user_id}:{email}:{timestamp}:{salt}"
-    token_hash = hashlib.sha256(f"{token_data}:{_SESSION_SECRET_KEY}".encode()).hexdigest()
-    # Return token without exposing the secret key
-    return f"{user_id}.{timestamp}.{salt}.{token_hash}"
+# Recently rejected tokens (keyed by digest) so repeated hits on a bad link skip the database
+BAD_TOKEN_CACHE_TTL = 60
+_bad_token_cache = TTLCache(ttl=BAD_TOKEN_CACHE_TTL, maxsize=10000)
+
+# Reset tokens are secrets.token_urlsafe(32) values: 43 URL-safe base64 characters
+_RESET_TOKEN_RE = re.compile(r'[A-Za-z0-9_-]{43}')
 
-def verify_reset_token(token, user_id, email, max_age_hours=None):
-    """Verify a reset token and check if it's not expired"""
+def _reset_token_max_age_seconds(max_age_hours=None):
+    """Token lifetime in seconds (configurable from environment)"""
     if max_age_hours is None:
         max_age_hours = int(os.environ.get('PASSWORD_RESET_TOKEN_EXPIRY_HOURS', 1))
+    return max_age_hours * 3600
+
+def _reset_token_hash(token):
+    """SHA-256 of a reset token; only this hash is stored server-side"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+# Helper function to generate secure reset token
+def generate_reset_token(user_id):
+    """
+    Generate an opaque single-use reset token for user_id and store its hash.
+    Returns the token to email, or None if it could not be stored.
+    """
+    token = secrets.token_urlsafe(32)
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=_reset_token_max_age_seconds())
+    if not _db.create_password_reset_token(_reset_token_hash(token), user_id, expires_at.isoformat()):
+        return None
+    return token
+
+def _reset_token_user(token):
+    """
+    Resolve a reset token to its user with one indexed token lookup.
+    Returns the user dict, or None if the token is malformed, unknown, used or expired.
+    """
+    token_hash = _reset_token_hash(token)
+    if _bad_token_cache.get(token_hash):
+        return None
     
-    try:
-        parts = token.split('.')
-        if len(parts) != 4:
-            return False
-        
-        token_user_id, timestamp, salt, token_hash = parts
-        
-        # Check if user_id matches
-        if str(user_id) != token_user_id:
-            return False
-        
-        # Check if token is expired (configurable from environment)
-        token_time = int(timestamp)
-        current_time = int(time.time())
-        if current_time - token_time > (max_age_hours * 3600):
-            return False
-        
-        # Verify token integrity using the session secret key
-        token_data = f"{user_id}:{email}:{timestamp}:{salt}"
-        expected_hash = hashlib.sha256(f"{token_data}:{_SESSION_SECRET_KEY}".encode()).hexdigest()
-        
-        return token_hash == expected_hash
-    except (ValueError, IndexError):
-        return False
+    user_id = _db.get_password_reset_token_user_id(token_hash) if _RESET_TOKEN_RE.fullmatch(token) else None
+    if user_id is None:
+        _bad_token_cache.set(token_hash, True)
+        return None
+    
+    return _db.get_user_by_id(user_id)
 
 @passwordreset_bp.route('/request', methods=['POST'])
 def request_password_reset():
@@ -83,6 +80,10 @@ def request_password_reset():
         flash('Please enter your username or email', 'error')
         return redirect(url_for('auth.login'))
     
+    if not _reset_request_limiter.hit((request.remote_addr, user_identifier.strip().lower())):
+        flash('Too many password reset requests. Please try again later.', 'error')
+        return redirect(url_for('auth.login'))
+    
     try:
         # Use centralized user service for consistent user resolution
         user_info = user_service.get_user_display_info(user_identifier)
@@ -91,14 +92,13 @@ def request_password_reset():
             flash('User does not exist. Please check your username or email and try again.', 'error')
             return redirect(url_for('auth.login'))
         
-        db = DatabaseService()
+        db = _db
         
         # Create password reset request using verified user info
         reset_request = {
             'user_id': user_info['user_id'],
             'username': user_info['username'],
             'email': user_info['email'],
-            'requested_at': datetime.now(PHILIPPINE_TZ),
             'status': 'pending',
             'ip_address': request.remote_addr
         }
@@ -124,25 +124,9 @@ def reset_password():
             flash('Invalid or missing reset token', 'error')
             return redirect(url_for('auth.login'))
         
-        # Parse token and verify
         try:
-            parts = token.split('.')
-            if len(parts) != 4:
-                flash('Invalid reset token format', 'error')
-                return redirect(url_for('auth.login'))
-            
-            user_id = int(parts[0])
-            
-            # Get user from database
-            db = DatabaseService()
-            user = db.get_user_by_id(user_id)
-            
+            user = _reset_token_user(token)
             if not user:
-                flash('Invalid reset token', 'error')
-                return redirect(url_for('auth.login'))
-            
-            # Verify token is valid and not expired
-            if not verify_reset_token(token, user['id'], user['email']):
                 flash('Invalid or expired reset token', 'error')
                 return redirect(url_for('auth.login'))
             
@@ -151,9 +135,6 @@ def reset_password():
                                  user_data={'username': user['username'], 'email': user['email']},
                                  token=token)
                                  
-        except (ValueError, IndexError) as e:
-            flash('Invalid reset token format', 'error')
-            return redirect(url_for('auth.login'))
         except Exception as e:
             print(f"Reset password error: {e}")
             flash('An error occurred. Please try again.', 'error')
@@ -177,26 +158,26 @@ def reset_password():
         return redirect(url_for('passwordreset.reset_password', token=token))
     
     try:
-        # Parse and verify token again
-        parts = token.split('.')
-        user_id = int(parts[0])
-        
-        db = DatabaseService()
-        user = db.get_user_by_id(user_id)
-        
-        if not user or not verify_reset_token(token, user['id'], user['email']):
+        user = _reset_token_user(token)
+        if not user:
             flash('Invalid or expired reset token', 'error')
             return redirect(url_for('auth.login'))
         
-        # Update password
-        password_hash = generate_password_hash(new_password)
+        db = _db
+        
+        # Update password (argon2id releases the GIL while hashing)
+        password_hash = hash_password(new_password)
         success = db.update_user_password(user['id'], password_hash)
         
         if success:
+            # Tokens are single-use: revoke this one and any other outstanding ones
+            db.revoke_password_reset_tokens(user['id'])
+            _bad_token_cache.set(_reset_token_hash(token), True)
+            
             # Auto-login the user
             session['user_id'] = user['id']
             session['username'] = user['username']
-            session['is_admin'] = user.get('role') == 'admin'
+            mark_session_role(user.get('role'))
             
             # Update last login since user is now logged in
             db.update_last_login(user['id'])
@@ -213,8 +194,16 @@ def reset_password():
         return redirect(url_for('passwordreset.reset_password', token=token))
 
 # Admin routes for password reset management
+def _flash_unprocessable_reset_request(request_id):
+    """Explain why a reset request could not be approved or denied (only runs on the failure path)"""
+    reset_request = _db.get_password_reset_request(request_id)
+    if not reset_request:
+        flash('Request not found', 'error')
+    else:
+        flash(f'Password reset for {reset_request["username"]} was already {reset_request["status"]}', 'info')
+
 @passwordreset_bp.route('/approve', methods=['POST'])
-@admin_required
+@admin_page_required
 def approve_password_reset():
     """Admin approves password reset request - generates token instead of temp password"""
     request_id = request.form.get('request_id')
@@ -224,40 +213,36 @@ def approve_password_reset():
         return redirect(url_for('admin.admin_dashboard'))
     
     try:
-        db = DatabaseService()
+        db = _db
         
-        # Get the reset request
-        reset_request = db.get_password_reset_request(request_id)
+        # Approve only if still pending; the UPDATE returns the request it changed
+        reset_request = db.resolve_pending_password_reset_request(request_id, 'approved')
         if not reset_request:
-            flash('Request not found', 'error')
-            return redirect(url_for('admin.admin_dashboard'))
-        
-        # Check if already approved
-        if reset_request['status'] == 'approved':
-            flash(f'Password reset for {reset_request["username"]} was already approved', 'info')
+            _flash_unprocessable_reset_request(request_id)
             return redirect(url_for('admin.admin_dashboard'))
         
         # Generate secure reset token
-        reset_token = generate_reset_token(reset_request['user_id'], reset_request['email'])
-        
-        # Mark request as approved
-        db.update_password_reset_request(request_id, 'approved')
+        reset_token = generate_reset_token(reset_request['user_id'])
+        if not reset_token:
+            # Put the request back so it can be approved again
+            db.update_password_reset_request(request_id, 'pending')
+            flash('Could not create a reset token. Please try again.', 'error')
+            return redirect(url_for('admin.admin_dashboard'))
         
         # Try to send email notification with token
-        try:
-            from services.email_service import send_password_reset_token_notification
+        if send_password_reset_token_notification is not None:
             # Use username as identifier - user service will resolve to correct email
             email_sent = send_password_reset_token_notification(
                 reset_request['username'], 
                 reset_token
             )
-        except ImportError:
+        else:
             email_sent = False
             print("Email service not available - email notification skipped")
         
         # Log admin action
         admin_id = session.get('user_id')
-        db.log_admin_action(admin_id, 'approve_password_reset', f"Approved reset for: {reset_request['username']}")
+        db.queue_admin_action(admin_id, 'approve_password_reset', f"Approved reset for: {reset_request['username']}")
         
         if email_sent:
             flash(f"Password reset approved for {reset_request['username']}", 'success')
@@ -271,7 +256,7 @@ def approve_password_reset():
     return redirect(url_for('admin.admin_dashboard'))
 
 @passwordreset_bp.route('/deny', methods=['POST'])
-@admin_required
+@admin_page_required
 def deny_password_reset():
     """Admin denies password reset request"""
     request_id = request.form.get('request_id')
@@ -281,25 +266,17 @@ def deny_password_reset():
         return redirect(url_for('admin.admin_dashboard'))
     
     try:
-        db = DatabaseService()
+        db = _db
         
-        # Get the reset request
-        reset_request = db.get_password_reset_request(request_id)
+        # Deny only if still pending; the UPDATE returns the request it changed
+        reset_request = db.resolve_pending_password_reset_request(request_id, 'denied')
         if not reset_request:
-            flash('Request not found', 'error')
+            _flash_unprocessable_reset_request(request_id)
             return redirect(url_for('admin.admin_dashboard'))
         
-        # Check if already denied
-        if reset_request['status'] == 'denied':
-            flash(f'Password reset for {reset_request["username"]} was already denied', 'info')
-            return redirect(url_for('admin.admin_dashboard'))
-        
-        # Mark request as denied
-        db.update_password_reset_request(request_id, 'denied')
-        
         # Log admin action
         admin_id = session.get('user_id')
-        db.log_admin_action(admin_id, 'deny_password_reset', f"Denied reset for: {reset_request['username']}")
+        db.queue_admin_action(admin_id, 'deny_password_reset', f"Denied reset for: {reset_request['username']}")
         
         flash(f"Password reset request denied for {reset_request['username']}", 'info')
         
@@ -1,12 +1,165 @@
-from flask import Blueprint, request, jsonify, current_app, session
-from helpers import GeminiAnalyzer
-gemini_analyzer = GeminiAnalyzer()
+import asyncio
+import contextvars
+import functools
+import hashlib
+import itertools
+import logging
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from flask import Blueprint, request, current_app, session, copy_current_request_context
+from helpers import gemini_analyzer
 from crosscheck import cross_checker
+from database import compute_content_hash
+from ttl_cache import TTLCache
+from .utils import json_text, ojsonify
+
+logger = logging.getLogger(__name__)
 
 prediction_bp = Blueprint('prediction', __name__)
 
-# Global set to track cancelled analysis IDs
-cancelled_analyses = set()
+# Whitespace-separated tokens; scanned lazily so only the needed prefix of long texts is tokenized
+_WORD_RE = re.compile(r'\S+')
+
+def first_words(text, count):
+    """Return the first `count` whitespace-separated words of text"""
+    return [match.group(0) for match in itertools.islice(_WORD_RE.finditer(text), count)]
+
+def count_words(text):
+    """Count whitespace-separated words without building a list of them"""
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
+# Constant part of the response for content that is not Philippine political news
+_NON_POLITICAL_BASE = {
+    'prediction': 'Not Philippine Political Content',
+    'confidence': 0.0,
+    'factuality_score': 0,
+    'factuality_level': 'Not Applicable',
+    'factuality_description': 'This content is not Philippine political news and therefore cannot be analyzed by this specialized detector.',
+    'cross_check': None,
+    'factuality_breakdown': None,
+    'message': 'This detector is specifically designed for Philippine political news content. The provided content does not appear to be related to Philippine politics or government affairs.',
+    'analysis_stopped': True,
+    'detector_type': 'Philippine Political News Detector'
+}
+_NON_POLITICAL_SUMMARY = 'Content classification indicates this is not Philippine political news.'
+
+# Cancellation events by analysis ID (thread-safe); events of abandoned analyses expire instead of leaking
+CANCELLED_ANALYSIS_TTL = 600
+cancelled_analyses = TTLCache(ttl=CANCELLED_ANALYSIS_TTL, maxsize=10000)
+# How often an in-flight stage checks whether its analysis was cancelled
+CANCEL_POLL_INTERVAL = 0.2
+
+# Blocking pipeline calls run here rather than on each request loop's default executor, whose shutdown
+# at the end of the request would otherwise wait for calls abandoned by a cancellation
+_ANALYSIS_POOL = ThreadPoolExecutor(max_workers=64, thread_name_prefix='analysis')
+
+# Analyses in progress by request digest; identical requests wait on the first one's Future
+# (a concurrent Future, since each async view runs on its own event loop)
+INFLIGHT_WAIT_TIMEOUT = 120
+_inflight_analyses = {}
+_inflight_lock = threading.Lock()
+
+# Copies of an existing analysis into another user's history are saved off the request path
+_HISTORY_SAVE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='history-save')
+
+def _save_history_copy(db_service, analysis_data, user_id):
+    """Save an existing analysis to a user's history (runs on _HISTORY_SAVE_POOL)"""
+    try:
+        save_result = db_service.save_analysis_results(analysis_data, user_id=user_id)
+        logger.debug("prediction.history_copy user=%s duplicate=%s global_reuse=%s",
+                     user_id, save_result.get('is_duplicate'), save_result.get('is_global_reuse'))
+    except Exception as save_error:
+        logger.warning("prediction.history_copy could not save to user=%s history: %s", user_id, save_error)
+
+def to_thread(func, *args, **kwargs):
+    """asyncio.to_thread on the shared analysis pool"""
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return asyncio.get_running_loop().run_in_executor(_ANALYSIS_POOL, call)
+
+class AnalysisCancelled(Exception):
+    """Raised inside the analysis pipeline once the client has cancelled it"""
+
+# Philippine-political classifications keyed by a digest of the analyzed text.
+# Keyword fallbacks and errors (Gemini unavailable) are not cached so they are retried.
+POLITICAL_CHECK_CACHE_TTL = 3600
+_political_check_cache = TTLCache(ttl=POLITICAL_CHECK_CACHE_TTL, maxsize=4096)
+_UNCACHED_POLITICAL_REASONS = ('Fallback', 'Error:', 'Gemini API not available')
+
+def check_political_content_cached(text):
+    """Classify text as Philippine political content, reusing the answer for repeated texts"""
+    key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    content_check = _political_check_cache.get(key)
+    if content_check is None:
+        content_check = gemini_analyzer.check_philippine_political_content(text)
+        if not str(content_check.get('reason', '')).startswith(_UNCACHED_POLITICAL_REASONS):
+            _political_check_cache.set(key, content_check)
+    return dict(content_check)
+
+# Gemini summaries and factuality assessments keyed by a digest of their inputs, so repeated
+# analyses of the same article skip the API. Only real Gemini answers are cached; fallbacks are retried.
+GEMINI_RESULT_CACHE_TTL = 86400
+_gemini_result_cache = TTLCache(ttl=GEMINI_RESULT_CACHE_TTL, maxsize=4096)
+
+def _gemini_cache_key(kind, *parts):
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return kind, digest.digest()
+
+def _cached_gemini_result(key, compute):
+    result = _gemini_result_cache.get(key)
+    if result is None:
+        result = compute()
+        if result and result.get('source') == 'gemini_ai':
+            _gemini_result_cache.set(key, result)
+    return dict(result) if result else result
+
+def summarize_content_cached(content, content_digest=None):
+    """Summarize content, reusing the Gemini summary for repeated content (content_digest: its precomputed digest)"""
+    return _cached_gemini_result(
+        _gemini_cache_key('summary', content_digest or content),
+        lambda: gemini_analyzer.summarize_content(content)
+    )
+
+def assess_factuality_score_cached(content, article_url=None, trusted_sources_info=None, content_digest=None):
+    """Assess factuality, reusing the Gemini assessment for the same content, URL and cross-check matches"""
+    # The prompt only uses the match sources, similarities and overall confidence of the cross-check
+    matches = (trusted_sources_info or {}).get('matches') or []
+    cross_check_fingerprint = (
+        (trusted_sources_info or {}).get('confidence'),
+        tuple((match.get('source'), match.get('similarity')) for match in matches)
+    )
+    return _cached_gemini_result(
+        _gemini_cache_key('factuality', content_digest or content, article_url, cross_check_fingerprint),
+        lambda: gemini_analyzer.assess_factuality_score(content, article_url, trusted_sources_info=trusted_sources_info)
+    )
+
+# Leading preview characters compared by the title/link/summary duplicate match
+PREVIEW_MATCH_CHARS = 500
+
+# Snippets this short that already end like a finished sentence are used as-is, without asking Gemini to complete them
+SNIPPET_AS_IS_MAX_CHARS = 2000
+SNIPPET_AS_IS_MIN_SPACES = 20
+_COMPLETE_SNIPPET_RE = re.compile(r'[.!?]["\')\]]?\s*$')
+
+def process_user_text_snippet_cached(user_text):
+    """Prepare a snippet preview: as-is when obviously complete, otherwise Gemini's (cached) completion"""
+    if (len(user_text) < SNIPPET_AS_IS_MAX_CHARS and user_text.count(' ') >= SNIPPET_AS_IS_MIN_SPACES
+            and _COMPLETE_SNIPPET_RE.search(user_text)):
+        return {
+            'processed_preview': user_text,
+            'is_complete': True,
+            'word_count': count_words(user_text),
+            'source': 'heuristic'
+        }
+    return _cached_gemini_result(
+        _gemini_cache_key('snippet', user_text),
+        lambda: gemini_analyzer.process_user_text_snippet(user_text)
+    )
 
 @prediction_bp.route('/cancel-analysis', methods=['POST'])
 def cancel_analysis():
@@ -16,65 +169,220 @@ def cancel_analysis():
         analysis_id = data.get('analysis_id')
         
         if analysis_id:
-            cancelled_analyses.add(analysis_id)
-            print(f"🚫 Analysis {analysis_id} marked for cancellation")
-            return jsonify({'success': True, 'message': 'Analysis cancellation requested'})
+            analysis_cancel_event(analysis_id).set()
+            logger.debug("prediction.cancel analysis=%s", analysis_id)
+            return ojsonify({'success': True, 'message': 'Analysis cancellation requested'})
         else:
-            return jsonify({'success': False, 'error': 'No analysis ID provided'}), 400
+            return ojsonify({'success': False, 'error': 'No analysis ID provided'}, 400)
             
     except Exception as e:
-        print(f"❌ Error cancelling analysis: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+        logger.error("prediction.cancel failed: %s", e)
+        return ojsonify({'success': False, 'error': str(e)}, 500)
+
+def analysis_cancel_event(analysis_id):
+    """Get the cancellation event for an analysis, creating it on first use (cancel may arrive first)"""
+    return cancelled_analyses.get_or_load(analysis_id, threading.Event)
 
 def is_analysis_cancelled(analysis_id):
     """Check if an analysis has been cancelled"""
-    return analysis_id in cancelled_analyses
+    cancel_event = cancelled_analyses.get(analysis_id)
+    return cancel_event is not None and cancel_event.is_set()
 
 def cleanup_analysis(analysis_id):
-    """Remove analysis ID from cancelled set when complete"""
-    cancelled_analyses.discard(analysis_id)
+    """Forget the cancellation event of a finished analysis"""
+    cancelled_analyses.invalidate(analysis_id)
+
+async def cancellable(cancel_event, stage, awaitable):
+    """
+    Await a pipeline stage, abandoning it as soon as the analysis is cancelled.
+    Worker threads cannot be interrupted, so an abandoned call finishes in the background and its result is dropped.
+    """
+    task = asyncio.ensure_future(awaitable)
+    while not task.done():
+        if cancel_event.is_set():
+            task.cancel()
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())  # Nobody awaits it now
+            raise AnalysisCancelled(stage)
+        await asyncio.wait({task}, timeout=CANCEL_POLL_INTERVAL)
+    return task.result()
+
+class StageTimer:
+    """Milliseconds spent in each pipeline stage, reported once per request"""
+    
+    def __init__(self):
+        self.started = self._last = time.perf_counter()
+        self.stages = {}
+    
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = round((now - self._last) * 1000, 1)
+        self._last = now
+    
+    def total_ms(self):
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+def log_prediction_done(analysis_id, outcome, timer, **fields):
+    """Emit the single INFO record summarizing a finished analysis (details are logged at DEBUG)"""
+    record = {'analysis_id': analysis_id, 'outcome': outcome, 'total_ms': timer.total_ms(), 'stages_ms': timer.stages, **fields}
+    logger.info("prediction.done %s", json_text(record), extra={'prediction': record})
+
+def _ignore_phase(name, payload):
+    pass
 
 @prediction_bp.route('/predict', methods=['POST'])
-def predict():
+async def predict():
+    """Analyze a snippet or article URL and return the complete result as one JSON response"""
+    return await analyze_request(_ignore_phase)
+
+@prediction_bp.route('/predict/stream', methods=['POST'])
+def predict_stream():
+    """
+    Same analysis as /predict, streamed as server-sent events.
+    A `phase` event is sent as each stage finishes (content_check, prediction, cross_check, summary),
+    followed by a single `result` event (or `error` event with the status code) carrying the /predict body.
+    """
+    request.get_json(silent=True)  # Parse the body now; the worker shares this request object
+    events = queue.Queue()
+    
+    def emit_phase(name, payload):
+        # Serialize immediately: the pipeline keeps mutating the result dict afterwards
+        events.put(('phase', json_text({'phase': name, 'data': payload})))
+    
+    @copy_current_request_context
+    def run_analysis():
+        try:
+            response = current_app.make_response(asyncio.run(analyze_request(emit_phase)))
+            body = response.get_json(silent=True) or {}
+            if response.status_code < 400:
+                events.put(('result', json_text(body)))
+            else:
+                events.put(('error', json_text({'status': response.status_code, **body})))
+        except Exception as e:
+            logger.exception("prediction.stream failed: %s", e)
+            events.put(('error', json_text({'status': 500, 'error': f'An error occurred: {str(e)}'})))
+    
+    threading.Thread(target=run_analysis, daemon=True).start()
+    
+    def generate():
+        while True:
+            event, data = events.get()
+            yield f"event: {event}\ndata: {data}\n\n"
+            if event != 'phase':
+                return
+    
+    return current_app.response_class(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Don't let a reverse proxy buffer the stream
+    })
+
+async def _wait_done(future, timeout):
+    """
+    Wait up to timeout for a concurrent Future completed from another thread.
+    Unlike asyncio.wrap_future, giving up never cancels the shared future.
+    """
+    loop = asyncio.get_running_loop()
+    waiter = loop.create_future()
+    
+    def wake(_):
+        try:
+            loop.call_soon_threadsafe(lambda: waiter.done() or waiter.set_result(None))
+        except RuntimeError:
+            pass  # The waiting request already finished and closed its loop
+    
+    future.add_done_callback(wake)
+    await asyncio.wait({waiter}, timeout=timeout)
+
+def _inflight_key(data):
+    """Digest of the request fields that determine an analysis, or None for malformed requests"""
+    if not isinstance(data, dict):
+        return None
+    source = data.get('url') if data.get('inputMethod') == 'link' else data.get('text')
+    manual_title = data.get('title') if data.get('titleMethod') == 'manual' else None
+    parts = (data.get('inputMethod'), data.get('titleMethod'), source, manual_title)
+    if not all(isinstance(part, str) or part is None for part in parts):
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update((part or '').strip().encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.digest()
+
+async def analyze_request(emit_phase):
+    """
+    Analyze the snippet or article URL in the current request.
+    Identical requests are coalesced: while one is being analyzed, the others wait for it and then
+    pick up its saved result through the duplicate check instead of re-running the whole pipeline.
+    """
+    data = request.get_json(silent=True)
+    key = _inflight_key(data)
+    if key is None:
+        return await _run_analysis(emit_phase)
+    
+    with _inflight_lock:
+        leader = _inflight_analyses.get(key)
+        if leader is None:
+            done = _inflight_analyses[key] = Future()
+    
+    if leader is not None:
+        logger.debug("prediction.coalesce waiting for an identical analysis in flight")
+        try:
+            await cancellable(
+                analysis_cancel_event(data.get('analysis_id', 'unknown')), 'while waiting for an identical analysis',
+                _wait_done(leader, INFLIGHT_WAIT_TIMEOUT)
+            )
+        except AnalysisCancelled:
+            pass  # _run_analysis reports the cancellation
+        return await _run_analysis(emit_phase)
+    
+    try:
+        return await _run_analysis(emit_phase)
+    finally:
+        with _inflight_lock:
+            _inflight_analyses.pop(key, None)
+        done.set_result(None)
+
+async def _run_analysis(emit_phase):
+    """
+    Run the analysis pipeline for the current request.
+    Blocking Gemini, extraction, cross-check and DB calls run in worker threads;
+    emit_phase(name, payload) is called as each stage's partial result becomes available.
+    """
     try:
-        from web_app import detector, article_extractor
+        # Bound on the app by web_app; no per-request import of the app module
+        detector = current_app.detector
+        article_extractor = current_app.article_extractor
         
+        timer = StageTimer()
         data = request.get_json()
-        print(f"\n📥 PREDICTION REQUEST:")
-        print(f"   Data: {data}")
+        logger.debug("prediction.request data=%s", data)
         
         if not data:
-            print("❌ Error: No JSON data received")
-            return jsonify({'error': 'No data provided'}), 400
+            logger.debug("prediction.request no JSON data received")
+            return ojsonify({'error': 'No data provided'}, 400)
         
         # Enhanced model readiness check
         if not detector.is_trained or detector.model is None:
-            print("❌ Error: Model not trained or not available")
-            print(f"   detector.is_trained: {detector.is_trained}")
-            print(f"   detector.model exists: {detector.model is not None}")
-            return jsonify({
+            logger.warning("prediction.request model not ready is_trained=%s model_exists=%s",
+                           detector.is_trained, detector.model is not None)
+            return ojsonify({
                 'error': 'Model is not ready yet. Please wait for training to complete and refresh the page.',
                 'model_status': {
                     'is_trained': detector.is_trained,
                     'model_exists': detector.model is not None
                 }
-            }), 503  # Service Unavailable
+            }, 503)  # Service Unavailable
         
         title_method = data.get('titleMethod')
         input_method = data.get('inputMethod')
         analysis_id = data.get('analysis_id', 'unknown')
         
-        print(f"\n⚙️ CONFIGURATION:")
-        print(f"   Analysis ID: {analysis_id}")
-        print(f"   Title method: {title_method}")
-        print(f"   Input method: {input_method}")
-        print(f"   Model ready: {detector.is_trained}")
+        logger.debug("prediction.config analysis=%s title_method=%s input_method=%s",
+                     analysis_id, title_method, input_method)
         
-        # Check for cancellation before starting
-        if is_analysis_cancelled(analysis_id):
-            cleanup_analysis(analysis_id)
-            print(f"🚫 Analysis {analysis_id} was cancelled before starting")
-            return jsonify({'error': 'Analysis was cancelled', 'cancelled': True}), 409
+        # Check for cancellation before starting; later stages are abandoned as soon as it is set
+        cancel_event = analysis_cancel_event(analysis_id)
+        if cancel_event.is_set():
+            raise AnalysisCancelled('before starting')
         
         # Determine the text to analyze based on input method
         text_to_analyze = ""
@@ -85,56 +393,52 @@ def predict():
         if input_method == 'snippet':
             user_text = data.get('text', '').strip()
             if not user_text:
-                print("❌ Error: No text provided for snippet method")
-                return jsonify({'error': 'No text provided'}), 400
+                logger.debug("prediction.snippet no text provided")
+                return ojsonify({'error': 'No text provided'}, 400)
             
             # Process user text snippet for completeness
-            print(f"\n📝 PROCESSING USER TEXT SNIPPET...")
-            print(f"   Original user text: {user_text[:100]}...")
-            
-            processed_snippet = gemini_analyzer.process_user_text_snippet(user_text)
+            processed_snippet = await cancellable(cancel_event, 'while processing the snippet', to_thread(process_user_text_snippet_cached, user_text))
             content_preview_for_frontend = processed_snippet['processed_preview']
             text_to_analyze = user_text  # Use original text for analysis
             
-            print(f"✅ Snippet processed:")
-            print(f"   Original length: {len(user_text)} chars")
-            print(f"   Processed length: {len(content_preview_for_frontend)} chars")
-            print(f"   Processed preview: {content_preview_for_frontend[:100]}...")
-            print(f"   Is complete: {processed_snippet.get('is_complete', 'Unknown')}")
-            print(f"   Source: {processed_snippet.get('source', 'Unknown')}")
+            logger.debug("prediction.snippet original_chars=%s processed_chars=%s complete=%s source=%s preview=%.100s",
+                         len(user_text), len(content_preview_for_frontend),
+                         processed_snippet.get('is_complete', 'Unknown'), processed_snippet.get('source', 'Unknown'),
+                         content_preview_for_frontend)
             
         elif input_method == 'link':
             url = data.get('url', '').strip()
             if not url:
-                print("❌ Error: No URL provided for link method")
-                return jsonify({'error': 'No URL provided'}), 400
+                logger.debug("prediction.link no URL provided")
+                return ojsonify({'error': 'No URL provided'}, 400)
             
             article_url = url
-            print(f"\n🔗 EXTRACTING CONTENT FROM URL:")
-            print(f"   URL: {url}")
-            article_data = article_extractor.extract_article_content(url)
+            logger.debug("prediction.link extracting url=%s", url)
+            article_data = await cancellable(cancel_event, 'while extracting the article', to_thread(article_extractor.extract_article_content, url))
             
             if 'error' in article_data:
-                print(f"❌ URL extraction error: {article_data['error']}")
-                return jsonify(article_data), 400
+                logger.warning("prediction.link extraction failed url=%s: %s", url, article_data['error'])
+                return ojsonify(article_data, 400)
             
             text_to_analyze = article_data['combined']
             content_preview_for_frontend = article_data['content_preview']
             
             if not text_to_analyze.strip():
-                print("❌ Error: No content extracted from URL")
-                return jsonify({'error': 'No content could be extracted from the URL'}), 400
+                logger.warning("prediction.link no content extracted url=%s", url)
+                return ojsonify({'error': 'No content could be extracted from the URL'}, 400)
                 
         else:
-            print(f"❌ Error: Invalid input method: {input_method}")
-            return jsonify({'error': 'Invalid input method. Must be "snippet" or "link"'}), 400
+            logger.debug("prediction.request invalid input method %r", input_method)
+            return ojsonify({'error': 'Invalid input method. Must be "snippet" or "link"'}, 400)
+        timer.lap('input')
+        
+        # Computed once: the preview prefix used for duplicate matching and the digest keying the Gemini result caches
+        preview_head = content_preview_for_frontend[:PREVIEW_MATCH_CHARS]
+        preview_digest = hashlib.blake2b(content_preview_for_frontend.encode('utf-8'), digest_size=16).digest()
 
         # ========================================================================
         # CHECK FOR EXISTING ANALYSIS IN GLOBAL DATABASE FIRST (SAVE API RESOURCES)
         # ========================================================================
-        print(f"\n🔍 CHECKING FOR EXISTING ANALYSIS IN DATABASE...")
-        print(f"   Checking before content classification to save API resources...")
-        
         try:
             db_service = current_app.db_service
             
@@ -142,30 +446,38 @@ def predict():
             title_for_duplicate_check = 'Content Analysis'  # Default
             if input_method == 'link' and 'article_data' in locals() and article_data:
                 title_for_duplicate_check = article_data.get('title', 'External Article')
-                print(f"   Using extracted title: {title_for_duplicate_check}")
             elif input_method == 'snippet':
                 # For snippets, try to extract first meaningful sentence as title
-                words = text_to_analyze.split()[:10]  # First 10 words
+                words = first_words(text_to_analyze, 10)
                 if words:
                     title_for_duplicate_check = ' '.join(words) + '...'
-                    print(f"   Generated title from snippet: {title_for_duplicate_check}")
             
-            # Check for global duplicate (any user)
-            existing_global_article = db_service.find_global_article(
-                title=title_for_duplicate_check,
-                link=article_url,  # Will be None for snippet inputs
-                summary=content_preview_for_frontend[:500]  # Use content preview as summary for matching
-            )
+            # Check for global duplicate (any user): indexed content-hash lookup first,
+            # then the title/link match for articles saved before content hashes existed
+            content_hash = compute_content_hash(article_url, preview_head)
+            existing_global_article = None
+            if not await to_thread(db_service.article_may_exist, content_hash, article_url):
+                # Bloom filter has no false negatives: nothing with this content or URL was saved
+                logger.debug("prediction.duplicate_check skipped: content not seen before")
+            else:
+                existing_global_article = await to_thread(db_service.find_article_by_content_hash, content_hash)
+                if not existing_global_article:
+                    existing_global_article = await to_thread(
+                        db_service.find_global_article,
+                        title=title_for_duplicate_check,
+                        link=article_url,  # Will be None for snippet inputs
+                        summary=preview_head  # Use content preview as summary for matching
+                    )
+            
+            timer.lap('duplicate_check')
             
             if existing_global_article:
-                print(f"✅ FOUND EXISTING ANALYSIS IN DATABASE!")
-                print(f"   Article ID: {existing_global_article.id}")
-                print(f"   Original classification: {existing_global_article.classification}")
-                print(f"   Original factuality score: {existing_global_article.factuality_score}%")
-                print(f"   ⚡ Skipping all API calls (content classification, title generation, ML analysis)")
+                logger.debug("prediction.duplicate_check found article=%s classification=%s factuality_score=%s",
+                             existing_global_article['id'], existing_global_article['classification'],
+                             existing_global_article['factuality_score'])
                 
                 # Get the complete existing analysis with all details
-                result = db_service.get_complete_analysis_result(existing_global_article.id)
+                result = await to_thread(db_service.get_complete_analysis_result, existing_global_article['id'])
                 
                 if result:
                     # Add input-specific information
@@ -175,28 +487,18 @@ def predict():
                         'content_preview': content_preview_for_frontend
                     }
                     result['from_existing_analysis'] = True
-                    result['existing_article_id'] = existing_global_article.id
+                    result['existing_article_id'] = existing_global_article['id']
                     result['api_calls_saved'] = True  # Flag to indicate we saved API resources
                     
-                    print(f"\n✅ EXISTING ANALYSIS RESPONSE PREPARED (API CALLS SAVED):")
-                    print(f"   Classification: {result['prediction']}")
-                    print(f"   Factuality Score: {result['factuality_score']}%")
-                    print(f"   Source: Existing database record (Article ID: {existing_global_article.id})")
-                    print(f"   💰 Saved: Content classification + Title generation + ML analysis API calls")
-                    print("="*80 + "\n")
-                    
                     # Handle user-specific logic for duplicate content
                     current_user_id = session.get('user_id')
                     
                     if current_user_id:
-                        # Check if this is the same user who originally created the analysis
-                        if existing_global_article.user_id == current_user_id:
-                            print(f"🔄 Same user ({current_user_id}) requesting existing analysis - returning stored result")
-                            # Same user - just return the result without saving again
-                        else:
-                            print(f"👥 Different user ({current_user_id}) requesting analysis originally by user {existing_global_article.user_id}")
+                        # The original author already has it in their history; other users get a copy
+                        if existing_global_article['user_id'] != current_user_id:
                             try:
-                                print(f"📝 Saving copy to user {current_user_id} history...")
+                                logger.debug("prediction.duplicate_check copying article=%s from user=%s to user=%s",
+                                             existing_global_article['id'], existing_global_article['user_id'], current_user_id)
                                 # Create analysis data structure for current user's history
                                 user_analysis_data = {
                                     'title': title_for_duplicate_check,
@@ -216,58 +518,44 @@ def predict():
                                     'cross_check_data': result.get('cross_check')
                                 }
                                 
-                                save_result = db_service.save_analysis_results(user_analysis_data, user_id=current_user_id)
-                                if save_result.get('is_duplicate'):
-                                    print(f"   Current user already has this analysis in their history")
-                                elif save_result.get('is_global_reuse'):
-                                    print(f"   Added to current user's history (global reuse)")
-                                else:
-                                    print(f"   Added to current user's history as new entry")
+                                # The client doesn't need to wait for its history entry
+                                _HISTORY_SAVE_POOL.submit(_save_history_copy, db_service, user_analysis_data, current_user_id)
                                     
                             except Exception as save_error:
-                                print(f"⚠️ Warning: Could not save to user history: {save_error}")
-                    else:
-                        print(f"👤 Anonymous user requesting existing analysis - returning result without saving")
+                                logger.warning("prediction.duplicate_check could not save to user history: %s", save_error)
                     
                     # Clean up analysis tracking
                     cleanup_analysis(analysis_id)
-                    print(f"🧹 Cleaned up analysis {analysis_id}")
+                    timer.lap('existing_result')
+                    log_prediction_done(analysis_id, 'existing_analysis', timer,
+                                        article_id=existing_global_article['id'], prediction=result['prediction'],
+                                        factuality_score=result['factuality_score'], input_method=input_method)
                     
-                    return jsonify(result)
+                    return ojsonify(result)
                 else:
-                    print(f"⚠️ Warning: Could not retrieve full details for existing article {existing_global_article.id}")
-                    print(f"   Continuing with normal analysis...")
-            else:
-                print(f"ℹ️ No existing analysis found - proceeding with content classification and full analysis")
+                    logger.warning("prediction.duplicate_check could not load details for article=%s; continuing with full analysis",
+                                   existing_global_article['id'])
                 
         except Exception as duplicate_check_error:
-            print(f"⚠️ Warning: Duplicate check failed: {duplicate_check_error}")
-            print(f"   Continuing with normal analysis...")
+            logger.warning("prediction.duplicate_check failed; continuing with full analysis: %s", duplicate_check_error)
             # Continue with normal analysis if duplicate check fails
 
         # ========================================================================
         # CHECK PHILIPPINE POLITICAL CONTENT (ONLY IF NO DUPLICATE FOUND)
         # ========================================================================
         
-        # Check for cancellation before political content classification
-        if is_analysis_cancelled(analysis_id):
-            cleanup_analysis(analysis_id)
-            print(f"🚫 Analysis {analysis_id} was cancelled before political content check")
-            return jsonify({'error': 'Analysis was cancelled', 'cancelled': True}), 409
-        
-        print(f"\n🏛️ CONTENT CLASSIFICATION:")
-        content_check = gemini_analyzer.check_philippine_political_content(text_to_analyze)
-        print(f"   Philippine Political: {content_check.get('is_philippine_political', False)}")
-        print(f"   Safe Content: {content_check.get('is_safe_content', True)}")
-        print(f"   Confidence: {content_check.get('confidence', 0.0)}")
-        print(f"   Reason: {content_check.get('reason', 'N/A')}")
+        content_check = await cancellable(
+            cancel_event, 'during political content check',
+            to_thread(check_political_content_cached, text_to_analyze)
+        )
+        timer.lap('classification')
+        logger.debug("prediction.classification political=%s safe=%s confidence=%s reason=%s",
+                     content_check.get('is_philippine_political', False), content_check.get('is_safe_content', True),
+                     content_check.get('confidence', 0.0), content_check.get('reason', 'N/A'))
+        emit_phase('content_check', content_check)
         
         # IMMEDIATELY STOP if not Philippine political content
         if not content_check.get('is_philippine_political', False):
-            print(f"\n❌ ANALYSIS STOPPED: Content is not Philippine political news")
-            print(f"   This detector is specialized for Philippine political content only")
-            print(f"   Skipping all further processing (title generation, ML prediction, cross-checking)")
-            
             # Determine simple title for response
             display_title = 'Content Analysis'
             if input_method == 'link':
@@ -277,48 +565,36 @@ def predict():
             
             # Return immediate response without any further processing
             non_political_response = {
-                'prediction': 'Not Philippine Political Content',
-                'confidence': 0.0,
-                'factuality_score': 0,
-                'factuality_level': 'Not Applicable',
-                'factuality_description': 'This content is not Philippine political news and therefore cannot be analyzed by this specialized detector.',
+                **_NON_POLITICAL_BASE,
                 'content_classification': content_check,
                 'content_preview': content_preview_for_frontend,
-                'cross_check': None,
-                'factuality_breakdown': None,
                 'content_summary': {
-                    'summary': 'Content classification indicates this is not Philippine political news.',
-                    'word_count': len(content_preview_for_frontend.split()),
+                    'summary': _NON_POLITICAL_SUMMARY,
+                    'word_count': count_words(content_preview_for_frontend),
                     'source': 'system_message'
                 },
                 'extracted_content': {
                     'title': display_title,
                     'content_preview': content_preview_for_frontend
-                },
-                'message': 'This detector is specifically designed for Philippine political news content. The provided content does not appear to be related to Philippine politics or government affairs.',
-                'analysis_stopped': True,
-                'detector_type': 'Philippine Political News Detector'
+                }
             }
             
-            print(f"\n✅ NON-POLITICAL CONTENT RESPONSE PREPARED:")
-            print(f"   Classification: {non_political_response['prediction']}")
-            print(f"   Reason: {content_check.get('reason', 'N/A')}")
-            print(f"   Content Preview Length: {len(content_preview_for_frontend)} chars")
-            print(f"   Display Title: {display_title}")
-            print("="*80 + "\n")
-            
             # Clean up analysis tracking for non-political content
             cleanup_analysis(analysis_id)
-            print(f"🧹 Cleaned up non-political analysis {analysis_id}")
+            log_prediction_done(analysis_id, 'not_political', timer,
+                                reason=content_check.get('reason', 'N/A'), input_method=input_method)
             
-            return jsonify(non_political_response)
+            return ojsonify(non_political_response)
         
         # ========================================================================
         # CONTINUE WITH FULL ANALYSIS ONLY FOR PHILIPPINE POLITICAL CONTENT
         # ========================================================================
-        print(f"\n✅ CONFIRMED: Philippine political content detected")
-        print(f"   Proceeding with full fake news detection analysis...")
-        print(f"   Content will be processed through title generation, ML model, and cross-checking")
+
+        # The summary only needs the content preview: start it now so it overlaps title generation,
+        # the ML model and the cross-check (to_thread submits to the pool immediately)
+        summary_call = to_thread(summarize_content_cached, content_preview_for_frontend, preview_digest)
+        # Mark its outcome as retrieved in case a cancellation abandons it before it is awaited
+        summary_call.add_done_callback(lambda done: done.cancelled() or done.exception())
 
         # Handle title method and determine final title for search (ONLY for political content)
         generated_title = None
@@ -329,46 +605,38 @@ def predict():
                 manual_title_used = manual_title  # Store for frontend display
                 final_title_for_search = manual_title  # Use manual title for search
                 text_to_analyze = f"{manual_title} {text_to_analyze}"
-                print(f"\n📝 TITLE PROCESSING:")
-                print(f"   Added manual title to analysis text: {manual_title}")
-                print(f"   Manual title will be used for cross-check search: {final_title_for_search}")
+                logger.debug("prediction.title manual title=%s", manual_title)
         elif title_method == 'automatic':
-            print(f"\n🤖 GENERATING AUTOMATIC TITLE...")
-            
             # For URL inputs, check if we already have an extracted title from the content extraction
             extracted_title = None
             if input_method == 'link' and article_data and article_data.get('title'):
                 extracted_title = article_data.get('title', '').strip()
-                print(f"   📄 Title already extracted during content extraction: {extracted_title}")
             
             # Only run Selenium again if we don't have a good extracted title
             if extracted_title and len(extracted_title) > 5:
                 generated_title = extracted_title
-                print(f"✅ Using already-extracted title (avoiding duplicate Selenium): {generated_title}")
             else:
-                print(f"   🔄 No suitable title from extraction, generating with Gemini/Selenium...")
-                generated_title = gemini_analyzer.generate_article_title(
+                generated_title = await cancellable(cancel_event, 'during title generation', to_thread(
+                    gemini_analyzer.generate_article_title,
                     text_to_analyze, 
                     input_method, 
                     article_url, 
-                    extracted_title=extracted_title
-                )
+                    extracted_title=extracted_title,
+                    # Snippets never need a browser; links only when extraction found no title
+                    allow_browser=(input_method == 'link' and not extracted_title)
+                ))
                 
             if generated_title and generated_title != 'Article Analysis':
                 final_title_for_search = generated_title  # Use generated title for search
                 text_to_analyze = f"{generated_title} {text_to_analyze}"
-                print(f"✅ Generated and added automatic title: {generated_title}")
-                print(f"   Generated title will be used for cross-check search: {final_title_for_search}")
+                logger.debug("prediction.title automatic title=%s", generated_title)
             else:
-                print("⚠️ Could not generate meaningful title, proceeding without title")
+                logger.debug("prediction.title could not generate a meaningful title")
         
         # For URL inputs, use the extracted title if no manual/automatic title is set
         if input_method == 'link' and not final_title_for_search:
             final_title_for_search = article_data.get('title', '')
-            print(f"   Using extracted URL title for search: {final_title_for_search}")
-        
-        print(f"\n📄 ANALYZING TEXT:")
-        print(f"   Preview: {text_to_analyze[:100]}...")
+        timer.lap('title')
         
         # ========================================================================
         # ML PREDICTION AND ANALYSIS (for new content)
@@ -377,27 +645,20 @@ def predict():
         # Get ML model prediction (only for Philippine political content)
         
         # Check for cancellation before ML prediction
-        if is_analysis_cancelled(analysis_id):
-            cleanup_analysis(analysis_id)
-            print(f"🚫 Analysis {analysis_id} was cancelled before ML prediction")
-            return jsonify({'error': 'Analysis was cancelled', 'cancelled': True}), 409
+        if cancel_event.is_set():
+            raise AnalysisCancelled('before ML prediction')
         
-        result = detector.predict(text_to_analyze)
+        # Vectorize the final text (title included) and run the ML model once;
+        # later stages only reweight this base prediction
+        vectorized = detector.vectorize(text_to_analyze)
+        base_prediction = detector.run_model(vectorized)
+        result = detector.reweight(base_prediction)
+        timer.lap('model')
+        emit_phase('prediction', result)
         
         # Perform cross-check verification for ALL inputs if we have a title to search
         cross_check_result = None
         if final_title_for_search and final_title_for_search.strip():
-            # Check for cancellation before cross-checking
-            if is_analysis_cancelled(analysis_id):
-                cleanup_analysis(analysis_id)
-                print(f"🚫 Analysis {analysis_id} was cancelled before cross-checking")
-                return jsonify({'error': 'Analysis was cancelled', 'cancelled': True}), 409
-            
-            print(f"\n🔍 PERFORMING CROSS-CHECK VERIFICATION...")
-            print(f"   Search title: {final_title_for_search}")
-            print(f"   Input method: {input_method}")
-            print(f"   Article URL: {article_url}")
-            
             # Ensure article_url is a string or None, not bytes
             safe_article_url = None
             if article_url:
@@ -410,30 +671,33 @@ def predict():
             
             # Ensure title is a proper string
             safe_title = str(final_title_for_search) if final_title_for_search else ""
+            logger.debug("prediction.cross_check title=%s url=%s", safe_title, safe_article_url)
             
-            print(f"   Safe article URL: {safe_article_url}")
-            print(f"   Safe title: {safe_title}")
-            
-            try:
-                cross_check_result = cross_checker.perform_cross_check(
+            summary_result, cross_check_outcome = await cancellable(cancel_event, 'during cross-checking', asyncio.gather(
+                summary_call,
+                to_thread(
+                    cross_checker.perform_cross_check,
                     safe_article_url,  # Will be None for snippet/manual inputs, which is fine
                     safe_title, 
                     ""  # Pass empty string for preview since we only use title
-                )
+                ),
+                return_exceptions=True
+            ))
+            
+            try:
+                if isinstance(cross_check_outcome, BaseException):
+                    raise cross_check_outcome
+                cross_check_result = cross_check_outcome
                 result['cross_check'] = cross_check_result
-                
-                print(f"✅ Cross-check completed:")
-                print(f"   Status: {cross_check_result['status']}")
-                print(f"   Confidence: {cross_check_result['confidence']}")
-                print(f"   Matches: {len(cross_check_result['matches'])}")
-                print(f"   Search Query: {cross_check_result['search_query']}")
+                logger.debug("prediction.cross_check status=%s confidence=%s matches=%s query=%s",
+                             cross_check_result['status'], cross_check_result['confidence'],
+                             len(cross_check_result['matches']), cross_check_result['search_query'])
                 
                 # Re-calculate factuality score with cross-check data
-                print(f"\n🔄 RECALCULATING FACTUALITY SCORE WITH CROSS-CHECK DATA...")
                 # Don't show weighting output yet - add flag to suppress it
                 cross_check_result['suppress_weighting_output'] = True
-                updated_result = detector.predict(
-                    text_to_analyze, 
+                updated_result = detector.reweight(
+                    base_prediction, 
                     cross_check_data=cross_check_result,
                     gemini_factuality_score=None  # Will be added later if available
                 )
@@ -447,10 +711,10 @@ def predict():
                     'factuality_description': updated_result['factuality_description'],
                     'weighting_info': updated_result.get('weighting_info', {})
                 })
+                emit_phase('cross_check', result)
                 
             except Exception as cross_check_error:
-                print(f"❌ Cross-check failed: {str(cross_check_error)}")
-                print(f"   Error type: {type(cross_check_error)}")
+                logger.warning("prediction.cross_check failed (%s): %s", type(cross_check_error).__name__, cross_check_error)
                 # Don't fail the entire prediction, just skip cross-check
                 result['cross_check'] = {
                     'status': 'error',
@@ -459,58 +723,48 @@ def predict():
                     'search_query': safe_title,
                     'error': str(cross_check_error)
                 }
+            
+            # A failed summary fails the request, as it did when it ran on its own
+            if isinstance(summary_result, BaseException):
+                raise summary_result
         else:
-            print(f"\n⚠️ No title available for cross-check verification")
-
-        # Generate content summary using the content preview
-        print(f"\n📋 GENERATING CONTENT SUMMARY...")
-        summary_result = gemini_analyzer.summarize_content(content_preview_for_frontend)
+            logger.debug("prediction.cross_check skipped: no title available")
+            summary_result = await cancellable(cancel_event, 'during content summary', summary_call)
+        
         result['content_summary'] = summary_result
+        timer.lap('cross_check_and_summary')
+        emit_phase('summary', summary_result)
         
         # Generate factuality breakdown for ALL Philippine political content (not just URL inputs)
         gemini_factuality_score = None
         if content_check.get('is_philippine_political', False):
-            print(f"\n🔍 GENERATING FACTUALITY BREAKDOWN...")
-            print(f"   Input method: {input_method}")
-            print(f"   Title method: {title_method}")
-            print(f"   Using content preview and cross-check as context")
-            
             # First, get Gemini's factuality assessment with cross-check context
-            print(f"\n🤖 GETTING GEMINI FACTUALITY ASSESSMENT...")
-            print(f"   Gemini API available: {gemini_analyzer.is_available()}")
-            print(f"   Content length: {len(content_preview_for_frontend)} chars")
-            print(f"   Cross-check matches: {len(cross_check_result.get('matches', []) if cross_check_result else [])}")
-            
-            gemini_assessment = gemini_analyzer.assess_factuality_score(
+            gemini_assessment = await cancellable(cancel_event, 'during factuality assessment', to_thread(
+                assess_factuality_score_cached,
                 content_preview_for_frontend, 
                 article_url, 
-                trusted_sources_info=cross_check_result
-            )
+                trusted_sources_info=cross_check_result,
+                content_digest=preview_digest
+            ))
             
             if gemini_assessment and gemini_assessment.get('factuality_score') is not None:
                 gemini_factuality_score = gemini_assessment['factuality_score']
-                print(f"✅ Gemini assessment: {gemini_factuality_score}/100 ({gemini_assessment.get('factuality_level', 'Unknown')})")
-                if gemini_assessment.get('source_boost_applied'):
-                    original_score = gemini_assessment.get('original_score')
-                    if original_score:
-                        print(f"   Source boost applied: {original_score}% → {gemini_factuality_score}% (+{gemini_factuality_score - original_score})")
-                    else:
-                        print(f"   Source validation boost applied")
+                logger.debug("prediction.factuality gemini_score=%s level=%s source_boost=%s original_score=%s",
+                             gemini_factuality_score, gemini_assessment.get('factuality_level', 'Unknown'),
+                             gemini_assessment.get('source_boost_applied', False), gemini_assessment.get('original_score'))
             else:
-                print(f"❌ Gemini factuality assessment failed:")
-                print(f"   Assessment result: {gemini_assessment}")
-                print(f"   Gemini available: {gemini_analyzer.is_available()}")
-                print(f"   Error details: {gemini_assessment.get('reasoning', 'No error details') if gemini_assessment else 'No assessment returned'}")
+                logger.warning("prediction.factuality Gemini assessment failed (available=%s): %s",
+                               gemini_analyzer.is_available(),
+                               gemini_assessment.get('reasoning', 'No error details') if gemini_assessment else 'No assessment returned')
 
             # Re-calculate with Gemini score included (pass full assessment for source boost info)
-            print(f"\n🔄 RECALCULATING WITH GEMINI FACTUALITY SCORE...")
             # Mark this as final calculation to show weighting output
             if cross_check_result:
                 cross_check_result['final_calculation'] = True
                 cross_check_result.pop('suppress_weighting_output', None)
             
-            updated_result = detector.predict(
-                text_to_analyze,
+            updated_result = detector.reweight(
+                base_prediction,
                 cross_check_data=cross_check_result,
                 gemini_factuality_score=gemini_assessment  # Pass full assessment object
             )
@@ -542,9 +796,10 @@ def predict():
                 enhanced_context += title_context
             
             # Generate detailed breakdown with Gemini assessment included
-            breakdown = gemini_analyzer.generate_factuality_breakdown(
+            breakdown = await cancellable(cancel_event, 'during factuality breakdown', to_thread(
+                gemini_analyzer.generate_factuality_breakdown,
                 enhanced_context, result['factuality_score'], article_url, include_score_assessment=False
-            )
+            ))
             
             # Add Gemini assessment data to breakdown if available
             if gemini_assessment:
@@ -557,11 +812,9 @@ def predict():
                 }
             
             result['factuality_breakdown'] = breakdown
-            print(f"✅ Factuality breakdown generated for {input_method} input with {title_method} title")
-            print(f"   Final weighted score: {result['factuality_score']}% (ML: {result.get('weighting_info', {}).get('original_ml_score', 'N/A')}%, Gemini: {gemini_factuality_score or 'N/A'}%)")
         else:
             result['factuality_breakdown'] = None
-            print(f"ℹ️ No factuality breakdown - not Philippine political content")
+        timer.lap('factuality')
         
         # Add content classification to result (already performed above)
         result['content_classification'] = content_check
@@ -589,10 +842,6 @@ def predict():
         # Ensure content_preview is available at root level for consistency
         result['content_preview'] = content_preview_for_frontend
         
-        print(f"\n✅ FINAL CONTENT PREVIEW FOR FRONTEND:")
-        print(f"   Content preview: {content_preview_for_frontend[:100]}...")
-        print(f"   Length: {len(content_preview_for_frontend)} chars")
-        
         # Add generated title to result if applicable (for separate AI title display)
         if title_method == 'automatic' and generated_title and input_method == 'snippet':
             result['generated_title'] = generated_title
@@ -601,38 +850,20 @@ def predict():
         if title_method == 'manual' and manual_title_used:
             result['manual_title'] = manual_title_used
         
-        print(f"\n✅ PREDICTION COMPLETED:")
-        print(f"   Classification: {result['prediction']}")
-        print(f"   Factuality Score: {result['factuality_score']}%")
-        print(f"   Confidence: {result['confidence']:.3f}")
-        print(f"   Level: {result['factuality_level']}")
-        print(f"   Content Preview Length: {len(content_preview_for_frontend)} chars")
-        print(f"   Input Method: {input_method}")
-        print(f"   Title Method: {title_method}")
-        print(f"   Cross-check performed: {cross_check_result is not None}")
-        print(f"   Factuality breakdown generated: {result['factuality_breakdown'] is not None}")
-        
-        print("="*80 + "\n")
-        
         # Save analysis results to database
+        article_id = None
         try:
-            print("🔄 Attempting to save analysis results to database...")
             db_service = current_app.db_service
-            print(f"🔧 Database service: {db_service}")
             
             # Extract summary text properly - matching results.js pattern
             # Frontend expects: results.content_summary.summary
             summary_text = ''
             if result.get('content_summary'):
                 content_summary = result['content_summary']
-                print(f"🔍 DEBUG - content_summary: {type(content_summary)} = {content_summary}")
                 if isinstance(content_summary, dict) and content_summary.get('summary'):
                     summary_text = content_summary['summary']
-                    print(f"🔍 DEBUG - Extracted summary from dict: {summary_text}")
                 elif isinstance(content_summary, str):
                     summary_text = content_summary
-                    print(f"🔍 DEBUG - Using content_summary as string: {summary_text}")
-            print(f"🔍 DEBUG - Final summary_text: {type(summary_text)} = {summary_text}")
             
             # Extract breakdown fields individually (like results.js does)
             breakdown_data = result.get('factuality_breakdown', {})
@@ -647,13 +878,7 @@ def predict():
             # Extract cross-check results for individual records (like results.js feedback function)
             crosscheck_results_list = []
             if cross_check_result and cross_check_result.get('matches'):
-                print(f"🔍 DEBUG - cross_check_result structure: {cross_check_result}")
-                for i, match in enumerate(cross_check_result['matches']):
-                    print(f"🔍 DEBUG - Match {i}: {match}")
-                    print(f"🔍 DEBUG - Match keys: {list(match.keys())}")
-                    print(f"🔍 DEBUG - match.get('url'): {match.get('url')}")
-                    print(f"🔍 DEBUG - match.get('link'): {match.get('link')}")
-                    
+                for match in cross_check_result['matches']:
                     crosscheck_item = {
                         'source_name': match.get('source', 'Unknown'),
                         'search_query': cross_check_result.get('search_query', ''),
@@ -661,9 +886,7 @@ def predict():
                         'match_url': match.get('url', '') or match.get('link', ''),  # Try both 'url' and 'link'
                         'similarity_score': match.get('similarity', 0.0)
                     }
-                    print(f"🔍 DEBUG - Final crosscheck_item: {crosscheck_item}")
                     crosscheck_results_list.append(crosscheck_item)
-                print(f"   Cross-check results: {len(crosscheck_results_list)} matches")
             
             # Build analysis_data structure for database - matching frontend data expectations
             analysis_data = {
@@ -689,66 +912,51 @@ def predict():
                 'cross_check_data': cross_check_result
             }
             
-            print(f"📋 Prepared analysis data structure")
-            print(f"   Title: {analysis_data['title']}")
-            print(f"   Input method: {analysis_data['inputMethod']}")
-            print(f"   Classification: {analysis_data['results']['prediction']}")
-            
-            # Save to database
-            print("💾 Calling database save function...")
-            print(f"🔍 DEBUG - analysis_data['summary'] type: {type(analysis_data['summary'])}")
-            print(f"🔍 DEBUG - analysis_data['summary'] value: {analysis_data['summary']}")
-            
             # Get current user ID for user-specific analysis history
             user_id = session.get('user_id')
             if user_id:
-                print(f"🔍 DEBUG - Saving analysis for user {user_id}")
-                save_result = db_service.save_analysis_results(analysis_data, user_id=user_id)
+                save_result = await to_thread(db_service.save_analysis_results, analysis_data, user_id=user_id)
                 article_id = save_result.get('article_id')
-                is_duplicate = save_result.get('is_duplicate', False)
-                is_global_reuse = save_result.get('is_global_reuse', False)
-                
-                if is_duplicate:
-                    print(f"♻️ Found duplicate analysis for user {user_id} - returned existing result")
-                elif is_global_reuse:
-                    print(f"🌍 Reused global analysis result for user {user_id}")
-                else:
-                    print(f"✅ New analysis results saved to database with article ID: {article_id}")
+                logger.debug("prediction.save user=%s article=%s duplicate=%s global_reuse=%s", user_id, article_id,
+                             save_result.get('is_duplicate', False), save_result.get('is_global_reuse', False))
             else:
-                print("⚠️ Warning: No user logged in - analysis will not be saved to history")
                 # For backward compatibility, still save without user (though this should rarely happen)
-                save_result = db_service.save_analysis_results(analysis_data)
+                save_result = await to_thread(db_service.save_analysis_results, analysis_data)
                 article_id = save_result.get('article_id')
-                print(f"⚠️ Analysis saved without user association: {article_id}")
+                logger.warning("prediction.save no user logged in; article=%s saved without user association", article_id)
             
         except Exception as db_error:
-            print(f"⚠️ Warning: Could not save to database: {str(db_error)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("prediction.save could not save to database: %s", db_error)
             # Continue execution - don't let database errors break the API response
+        timer.lap('save')
         
         # Clean up analysis tracking
         cleanup_analysis(analysis_id)
-        print(f"🧹 Cleaned up analysis {analysis_id}")
+        log_prediction_done(analysis_id, 'analyzed', timer, article_id=article_id,
+                            prediction=result['prediction'], factuality_score=result['factuality_score'],
+                            confidence=result['confidence'], input_method=input_method, title_method=title_method,
+                            cross_checked=cross_check_result is not None)
         
-        return jsonify(result)
+        return ojsonify(result)
+        
+    except AnalysisCancelled as cancelled:
+        cleanup_analysis(analysis_id)
+        logger.info("prediction.cancelled analysis=%s %s", analysis_id, cancelled)
+        return ojsonify({'error': 'Analysis was cancelled', 'cancelled': True}, 409)
         
     except Exception as e:
-        print(f"\n❌ PREDICTION ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("prediction.failed: %s", e)
         
         # Clean up analysis tracking in case of error
         if 'analysis_id' in locals():
             cleanup_analysis(analysis_id)
-            print(f"🧹 Cleaned up failed analysis {analysis_id}")
         
         # Check if it's a model-related error
         error_message = str(e)
         if "Model not trained" in error_message or "model" in error_message.lower():
-            return jsonify({
+            return ojsonify({
                 'error': 'Model is currently unavailable. Please wait for initialization to complete and try again.',
                 'technical_error': error_message
-            }), 503
+            }, 503)
         
-        return jsonify({'error': f'An error occurred: {error_message}'}), 500
+        return ojsonify({'error': f'An error occurred: {error_message}'}, 500)
@@ -0,0 +1,108 @@
+"""Shared helpers for route modules"""
+import hashlib
+import json
+import time
+from functools import wraps
+from flask import current_app, request, session, flash, redirect, url_for
+from database import DatabaseService
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# How long an admin role stored in the (signed) session is trusted before it is re-checked
+ADMIN_ROLE_RECHECK_SECONDS = 300
+
+ORJSON_OPTIONS = (orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if ORJSON_AVAILABLE else 0
+
+def ojsonify(payload, status=200):
+    """jsonify with a status code; serialized by the app's JSON provider (orjson when available)"""
+    response = current_app.json.response(payload)
+    response.status_code = status
+    return response
+
+def json_text(value):
+    """Serialize a value to a compact JSON string (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=str, option=ORJSON_OPTIONS).decode('utf-8')
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+
+def cached_response(response, max_age, public=False, stale_while_revalidate=None):
+    """Tag a response with a content ETag and Cache-Control, answering 304 on a matching If-None-Match"""
+    response.set_etag(hashlib.blake2b(response.get_data(), digest_size=16).hexdigest())
+    if public:
+        response.cache_control.public = True
+    else:
+        response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    if stale_while_revalidate:
+        response.cache_control['stale-while-revalidate'] = str(stale_while_revalidate)
+    # The body depends on the session (owner checks, per-user stats)
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
+
+def admin_required(f):
+    """Decorator for admin-only API routes; non-admin sessions get a 401 before any DB work"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not session_is_admin():
+            return ojsonify({
+                'error': 'Unauthorized',
+                'message': 'Admin access required'
+            }, 401)
+        return f(*args, **kwargs)
+    return decorated_function
+
+def mark_session_role(role):
+    """Record the user's role in the session and when it was last confirmed against the database"""
+    session['user_role'] = role or 'user'
+    session['role_checked_at'] = time.time()
+
+def refresh_session_role():
+    """
+    Re-read the logged-in user's role from the database into the session.
+    A failed lookup leaves the role unconfirmed (and not admin) so the next check retries it.
+    """
+    user = DatabaseService.get_user_by_id(session['user_id'])
+    if user is None:
+        session['user_role'] = 'user'
+        session.pop('role_checked_at', None)
+        return
+    mark_session_role(user.get('role'))
+
+def session_is_admin():
+    """
+    True if the logged-in user is an admin.
+    Trusts an admin role in the signed session for ADMIN_ROLE_RECHECK_SECONDS, then re-checks it,
+    so a demoted admin loses access within that window.
+    """
+    if not session.get('user_id') or session.get('user_role') != 'admin':
+        return False
+    checked_at = session.get('role_checked_at')
+    if checked_at is None or time.time() - checked_at > ADMIN_ROLE_RECHECK_SECONDS:
+        refresh_session_role()
+    return session['user_role'] == 'admin'
+
+def admin_page_required(f):
+    """
+    Decorator for admin pages and form posts; redirects instead of answering 401.
+    Trusts an admin role in the signed session for ADMIN_ROLE_RECHECK_SECONDS, then re-checks it.
+    Sessions without the admin role are checked once against the database so a fresh promotion works.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not session.get('user_id'):
+            flash('Please log in to access this page.', 'error')
+            return redirect(url_for('auth.login'))
+        
+        if session.get('user_role') != 'admin':
+            refresh_session_role()
+        if not session_is_admin():
+            flash('Access denied. Admin privileges required.', 'error')
+            return redirect(url_for('main.index'))
+        
+        return f(*args, **kwargs)
+    return decorated_function
@@ -1,7 +1,12 @@
 import time
 import os
 import logging
-from urllib.parse import urlparse
+import atexit
+import queue
+from functools import lru_cache
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+import requests
+from requests.adapters import HTTPAdapter
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -12,6 +17,7 @@ from webdriver_manager.chrome import ChromeDriverManager
 from newspaper import Article
 import nltk
 from nltk.tokenize import sent_tokenize
+from ttl_cache import TTLCache
 
 # Suppress logs for cleaner output
 os.environ['WDM_LOG_LEVEL'] = '0'
@@ -27,8 +33,56 @@ SOURCE_NAME_MAP = {
     "manilatimes.net": "The Manila Times", "theguardian.com": "The Guardian",
     "pna.gov.ph": "Philippine News Agency"
 }
+SOURCE_NAME_MAP_EXACT = {domain.lower(): name for domain, name in SOURCE_NAME_MAP.items()}
+
+def lookup_source_name(domain):
+    """Friendly name for a domain or any parent domain in SOURCE_NAME_MAP (e.g. www.edition.cnn.com), else None"""
+    parts = domain.lower().split(':')[0].split('.')
+    for i in range(len(parts) - 1):
+        name = SOURCE_NAME_MAP_EXACT.get('.'.join(parts[i:]))
+        if name is not None:
+            return name
+    return None
+
+# Number of idle headless Chrome instances kept warm between extractions
+CHROME_POOL_SIZE = int(os.environ.get('CHROME_POOL_SIZE', '2'))
+PAGE_LOAD_TIMEOUT = 15
+
+# Plain-HTTP fast path for known news sites that render articles server-side
+FAST_FETCH_TIMEOUT = 5
+FAST_FETCH_MIN_CHARS = 500  # shorter text means the page needs a browser
+FAST_FETCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# Shared HTTP session so repeat fetches from the same site reuse keep-alive connections
+http_session = requests.Session()
+http_session.headers.update(FAST_FETCH_HEADERS)
+http_session.mount("https://", HTTPAdapter(pool_connections=len(SOURCE_NAME_MAP), pool_maxsize=16))
+
+# Successful extractions, keyed by normalized URL (errors are never cached)
+ARTICLE_CACHE_TTL = 3600
+_article_cache = TTLCache(ttl=ARTICLE_CACHE_TTL, maxsize=1024, load_timeout=60)
+
+def normalize_article_url(url):
+    """Cache key for a URL: lowercased host, no fragment, utm_* tracking parameters or trailing slash"""
+    parsed = urlparse(url.strip())
+    query = urlencode([(key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+                       if not key.lower().startswith('utm_')])
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), parsed.path.rstrip('/'),
+                       parsed.params, query, ''))
+
+@lru_cache(maxsize=None)
+def chromedriver_path():
+    """Resolve (downloading if needed) the chromedriver binary once per process"""
+    return ChromeDriverManager().install()
 
 class ArticleExtractor:
+    # Warm drivers shared by every extractor; a driver is owned by one extraction at a time
+    _driver_pool = queue.Queue(maxsize=CHROME_POOL_SIZE)
+
     def __init__(self):
         pass
     
@@ -64,12 +118,90 @@ class ArticleExtractor:
     def create_chrome_driver(self):
         """Create and return a Chrome WebDriver instance"""
         try:
-            service = Service(ChromeDriverManager().install())
-            return webdriver.Chrome(service=service, options=self.get_chrome_options())
+            service = Service(chromedriver_path())
+            driver = webdriver.Chrome(service=service, options=self.get_chrome_options())
+            # Short page load timeout for faster failure
+            driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+            return driver
         except Exception as e:
             print(f"Failed to initialize Chrome driver: {str(e)}")
             return None
 
+    def warm_driver_pool(self):
+        """Start Chrome instances ahead of the first extraction until the pool is full"""
+        while not self._driver_pool.full():
+            driver = self.create_chrome_driver()
+            if driver is None:
+                return
+            try:
+                self._driver_pool.put_nowait(driver)
+            except queue.Full:
+                driver.quit()
+                return
+        print(f"Chrome driver pool ready ({self._driver_pool.qsize()} warm drivers)")
+
+    def acquire_driver(self):
+        """Take a warm driver from the pool, or start a new one when all are busy"""
+        try:
+            return self._driver_pool.get_nowait()
+        except queue.Empty:
+            return self.create_chrome_driver()
+
+    def release_driver(self, driver):
+        """Reset a driver to a blank page and return it to the pool.
+        Drivers that fail to reset (crashed or hung) or don't fit in the pool are shut down."""
+        try:
+            driver.delete_all_cookies()
+            driver.get('about:blank')
+            self._driver_pool.put_nowait(driver)
+        except Exception:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    @classmethod
+    def close_driver_pool(cls):
+        """Shut down every idle pooled driver"""
+        while True:
+            try:
+                driver = cls._driver_pool.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def is_fast_fetch_domain(self, url):
+        """True if the URL belongs to a known news site (a SOURCE_NAME_MAP domain or one of its subdomains)"""
+        return lookup_source_name(urlparse(url).netloc) is not None
+
+    def fast_article_extract(self, url):
+        """Fetch the page over plain HTTP and parse it without a browser.
+        Returns None when the fetch fails or yields less than FAST_FETCH_MIN_CHARS of text."""
+        try:
+            response = http_session.get(url, timeout=FAST_FETCH_TIMEOUT)
+            response.raise_for_status()
+            
+            article = Article(url, language='en')
+            article.download_state = 2  # Mark as downloaded
+            article.html = response.text
+            article.parse()
+            
+            if not article.text or len(article.text.strip()) < FAST_FETCH_MIN_CHARS:
+                print("Fast fetch extracted insufficient content, will use Selenium")
+                return None
+            
+            try:
+                article.nlp()
+            except Exception as e:
+                print(f"NLP processing failed in fast fetch: {str(e)}")
+            return article
+        except Exception as e:
+            print(f"Fast fetch failed: {str(e)}")
+        return None
+
     def static_article_extract(self, url):
         """Fallback pure-newspaper extraction without Selenium"""
         try:
@@ -206,19 +338,35 @@ class ArticleExtractor:
         print("="*80 + "\n")
 
     def extract_article_content(self, url):
+        """Extract article content, reusing a recent extraction of the same URL.
+        Concurrent requests for one URL share a single extraction."""
+        outcome = {}
+        
+        def load():
+            result = outcome['result'] = self.extract_article_content_uncached(url)
+            return None if 'error' in result else result
+        
+        article = _article_cache.get_or_load(normalize_article_url(url), load)
+        return article if article is not None else outcome['result']
+
+    def extract_article_content_uncached(self, url):
         """Extract article content with improved timeout handling and fallback"""
         try:
             print(f"Extracting content from URL: {url}")
             
             article_data = None
             
+            # Phase 0: Known news sites serve the article in the HTML - skip the browser when that's enough
+            if self.is_fast_fetch_domain(url):
+                print("Attempting fast HTTP extraction...")
+                article_data = self.fast_article_extract(url)
+                if article_data:
+                    print("Fast HTTP extraction successful")
+            
             # Phase 1: Try Selenium with aggressive timeouts
-            driver = self.create_chrome_driver()
+            driver = self.acquire_driver() if article_data is None else None
             if driver:
                 try:
-                    # Set shorter page load timeout for faster failure
-                    driver.set_page_load_timeout(15)  # Reduced from 30
-                    
                     print("Attempting Selenium extraction...")
                     driver.get(url)
                     
@@ -265,10 +413,7 @@ class ArticleExtractor:
                     else:
                         print(f"Selenium extraction failed: {str(e)}")
                 finally:
-                    try:
-                        driver.quit()
-                    except:
-                        pass
+                    self.release_driver(driver)
             
             # Phase 2: Fallback to pure newspaper extraction if Selenium failed
             if not article_data or not article_data.text or len(article_data.text.strip()) < 100:
@@ -285,8 +430,8 @@ class ArticleExtractor:
             
             # Get source name from domain
             try:
-                domain = urlparse(url).netloc.replace("www.", "")
-                source_name = next((SOURCE_NAME_MAP[domain_key] for domain_key in SOURCE_NAME_MAP if domain_key in domain), domain)
+                domain = urlparse(url).netloc.lower().removeprefix("www.")
+                source_name = lookup_source_name(domain) or domain
             except Exception:
                 source_name = "Unknown Source"
             
@@ -321,8 +466,8 @@ class ArticleExtractor:
                 if final_attempt and final_attempt.text and len(final_attempt.text.strip()) > 50:
                     # Quick result formatting using same preview logic
                     try:
-                        domain = urlparse(url).netloc.replace("www.", "")
-                        source_name = next((SOURCE_NAME_MAP[domain_key] for domain_key in SOURCE_NAME_MAP if domain_key in domain), domain)
+                        domain = urlparse(url).netloc.lower().removeprefix("www.")
+                        source_name = lookup_source_name(domain) or domain
                     except:
                         source_name = "Unknown Source"
                     
@@ -349,3 +494,5 @@ class ArticleExtractor:
                 print(f"Final fallback also failed: {str(final_error)}")
             
             return {'error': f"Failed to extract content from the URL. This could be due to website restrictions, network issues, or the content not being accessible to automated tools."}
+
+atexit.register(ArticleExtractor.close_driver_pool)
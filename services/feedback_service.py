@@ -1,6 +1,7 @@
 import json
 import os
 import threading
+import time
 from datetime import datetime
 import pandas as pd
 
@@ -10,6 +11,10 @@ class FeedbackService:
         self.feedback_file = 'user_feedback.json'
         self.feedback_data = []
         self.retrain_threshold = 10
+        self._lock = threading.Lock()
+        # Short-lived cache for get_feedback_stats(); cleared whenever feedback changes
+        self.stats_cache_ttl = 2.0
+        self._stats_cache = None  # (computed_at, stats)
         self.load_feedback_data()
     
     def load_feedback_data(self):
@@ -70,6 +75,7 @@ class FeedbackService:
         
         self.feedback_data.append(feedback_entry)
         self.save_feedback_data()
+        self.invalidate_stats_cache()
         
         print(f"✅ Feedback added. Total feedback entries: {len(self.feedback_data)}")
         
@@ -78,6 +84,12 @@ class FeedbackService:
         print(f"📊 Current unprocessed feedback: {len(unprocessed_feedback)} entries")
         print(f"💡 Use manual retrain button to retrain model with feedback")
     
+    def add_feedback_and_get_stats(self, **feedback):
+        """Add user feedback and return the updated statistics in one locked step"""
+        with self._lock:
+            self.add_feedback(**feedback)
+            return self.get_feedback_stats()
+    
     def manual_retrain_with_feedback(self):
         """Manually retrain the model incorporating user feedback"""
         if not self.model_service:
@@ -88,7 +100,9 @@ class FeedbackService:
             print("Starting MANUAL model retraining with user feedback...")
             
             df = self.model_service.load_and_prepare_data('WELFake_Dataset.csv')
-            unprocessed_feedback = [f for f in self.feedback_data if not f.get('used_for_training', False)]
+            # Snapshot under the lock: feedback can be added or deleted while the model trains
+            with self._lock:
+                unprocessed_feedback = [f for f in self.feedback_data if not f.get('used_for_training', False)]
             
             if not unprocessed_feedback:
                 return {'success': False, 'message': 'No new feedback available for training'}
@@ -118,11 +132,14 @@ class FeedbackService:
             )
             
             # Mark feedback as used ONLY after successful model save
-            for feedback in unprocessed_feedback:
-                feedback['used_for_training'] = True
-                feedback['training_date'] = datetime.now().isoformat()
-            
-            self.save_feedback_data()
+            with self._lock:
+                training_date = datetime.now().isoformat()
+                for feedback in unprocessed_feedback:
+                    feedback['used_for_training'] = True
+                    feedback['training_date'] = training_date
+                
+                self.save_feedback_data()
+                self.invalidate_stats_cache()
             
             print(f"✅ Manual model retraining completed!")
             print(f"   Previous accuracy: {old_accuracy:.4f}")
@@ -143,8 +160,22 @@ class FeedbackService:
             print(f"❌ Error during manual retraining: {str(e)}")
             return {'success': False, 'message': f'Retraining failed: {str(e)}'}
     
+    def invalidate_stats_cache(self):
+        """Drop cached feedback statistics so the next call recomputes them"""
+        self._stats_cache = None
+    
     def get_feedback_stats(self):
-        """Get statistics about user feedback"""
+        """Get statistics about user feedback (cached for stats_cache_ttl seconds)"""
+        cached = self._stats_cache
+        if cached is not None and time.monotonic() - cached[0] < self.stats_cache_ttl:
+            return dict(cached[1])
+        
+        stats = self._compute_feedback_stats()
+        self._stats_cache = (time.monotonic(), stats)
+        return dict(stats)
+    
+    def _compute_feedback_stats(self):
+        """Compute statistics about user feedback"""
         print(f"\nGET_FEEDBACK_STATS CALLED:")
         print(f"   self.feedback_data exists: {self.feedback_data is not None}")
         print(f"   self.feedback_data length: {len(self.feedback_data) if self.feedback_data else 'N/A'}")
@@ -193,12 +224,16 @@ class FeedbackService:
     def delete_feedback(self, feedback_id):
         """Delete feedback entry by ID (index)"""
         try:
-            if 0 <= feedback_id < len(self.feedback_data):
-                deleted_feedback = self.feedback_data.pop(feedback_id)
-                
-                # Save the updated data immediately to maintain consistency
-                self.save_feedback_data()
-                
+            deleted_feedback = None
+            with self._lock:
+                if 0 <= feedback_id < len(self.feedback_data):
+                    deleted_feedback = self.feedback_data.pop(feedback_id)
+                    
+                    # Save the updated data immediately to maintain consistency
+                    self.save_feedback_data()
+                    self.invalidate_stats_cache()
+            
+            if deleted_feedback is not None:
                 print(f"Deleted feedback entry {feedback_id}: {deleted_feedback.get('timestamp', 'Unknown timestamp')}")
                 return True
             else:
@@ -210,7 +245,11 @@ class FeedbackService:
     
     def get_all_feedback(self):
         """Get all feedback entries with IDs"""
-        return [
+        return list(self.iter_feedback())
+    
+    def iter_feedback(self):
+        """Yield feedback entries with IDs one at a time (over a snapshot of the list)"""
+        return (
             {
                 'id': i, 
                 'timestamp': entry.get('timestamp', ''), 
@@ -225,5 +264,5 @@ class FeedbackService:
                 'factuality_score': entry.get('factuality_score', None),
                 'used_for_training': entry.get('used_for_training', False)
             }
-            for i, entry in enumerate(self.feedback_data)
-        ]
+            for i, entry in enumerate(list(self.feedback_data))
+        )
@@ -1,5 +1,4 @@
-from helpers import GeminiAnalyzer
-gemini_analyzer = GeminiAnalyzer()
+from helpers import gemini_analyzer
 
 
 class GeminiService:
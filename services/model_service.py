@@ -265,23 +265,57 @@ class FakeNewsDetector:
             'gemini_source_boosted': gemini_source_boosted
         }
 
+    def _fallback_prediction(self, error):
+        """Neutral result returned when the model cannot score a text"""
+        return {
+            'prediction': 'Fake', 'confidence': 0.5, 'probabilities': {'Fake': 0.5, 'Real': 0.5},
+            'factuality_score': 50, 'factuality_level': 'Low',
+            'factuality_description': 'Frequently misleading or poorly sourced; lacks consistent verification.',
+            'error': error
+        }
+
     def predict(self, text, cross_check_data=None, gemini_factuality_score=None):
         """Predict if a news article is fake or real with enhanced factuality score"""
-        if not self.is_trained or self.model is None:
+        return self.reweight(self.run_model(self.vectorize(text)), cross_check_data, gemini_factuality_score)
+
+    def vectorize(self, text):
+        """
+        Preprocess a text and turn it into the model's TF-IDF features (a one-row sparse matrix).
+        Returns (pipeline, features); features is None when nothing is left after preprocessing.
+        The pipeline is read once so run_model() uses the same model even if retraining swaps self.model.
+        """
+        pipeline = self.model
+        if not self.is_trained or pipeline is None:
             raise ValueError("Model not trained yet!")
         
         processed_text = self.preprocess_text(text)
         if not processed_text:
-            return {
-                'prediction': 'Fake', 'confidence': 0.5, 'probabilities': {'Fake': 0.5, 'Real': 0.5},
-                'factuality_score': 50, 'factuality_level': 'Low',
-                'factuality_description': 'Frequently misleading or poorly sourced; lacks consistent verification.',
-                'error': 'Text is empty after preprocessing'
-            }
+            return pipeline, None
+        # Every pipeline stage except the classifier
+        return pipeline, pipeline[:-1].transform([processed_text])
+
+    def run_model(self, vectorized):
+        """
+        Run the classifier once on the (pipeline, features) pair returned by vectorize().
+        Returns the base prediction that reweight() combines with cross-check and Gemini data.
+        """
+        pipeline, features = vectorized
+        if features is None:
+            return {'probabilities': None, 'error': 'Text is empty after preprocessing'}
         
         try:
-            prediction = self.model.predict([processed_text])[0]
-            probability = self.model.predict_proba([processed_text])[0]
+            probability = pipeline[-1].predict_proba(features)[0]
+            return {'probabilities': (float(probability[0]), float(probability[1]))}
+        except Exception as e:
+            return {'probabilities': None, 'error': str(e)}
+
+    def reweight(self, base, cross_check_data=None, gemini_factuality_score=None):
+        """Weight a run_model() base prediction with cross-check and Gemini data (no model inference)"""
+        if base['probabilities'] is None:
+            return self._fallback_prediction(base['error'])
+        
+        try:
+            probability = base['probabilities']
             
             real_prob = float(probability[1])
             ml_factuality_score = int(real_prob * 100)
@@ -362,9 +396,4 @@ class FakeNewsDetector:
             return result
             
         except Exception as e:
-            return {
-                'prediction': 'Fake', 'confidence': 0.5, 'probabilities': {'Fake': 0.5, 'Real': 0.5},
-                'factuality_score': 50, 'factuality_level': 'Low',
-                'factuality_description': 'Frequently misleading or poorly sourced; lacks consistent verification.',
-                'error': str(e)
-            }
+            return self._fallback_prediction(str(e))
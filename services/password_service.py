@@ -0,0 +1,55 @@
+"""
+Password Service - Centralized password hashing for user accounts
+Uses argon2id when argon2-cffi is installed and falls back to werkzeug otherwise.
+Legacy werkzeug (scrypt/pbkdf2) hashes keep verifying and are flagged for rehash.
+"""
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHash
+    _PH = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=2)
+    ARGON2_AVAILABLE = True
+except ImportError:
+    _PH = None
+    ARGON2_AVAILABLE = False
+
+_ARGON2_PREFIX = '$argon2'
+
+
+def hash_password(password: str) -> str:
+    """Hash a password with argon2id (werkzeug scrypt if argon2 is unavailable)"""
+    if ARGON2_AVAILABLE:
+        return _PH.hash(password)
+    return generate_password_hash(password)
+
+def check_password(password_hash: str, password: str) -> bool:
+    """Check a password against an argon2 or legacy werkzeug hash"""
+    if not password_hash:
+        return False
+
+    if password_hash.startswith(_ARGON2_PREFIX):
+        if not ARGON2_AVAILABLE:
+            return False
+        try:
+            return _PH.verify(password_hash, password)
+        except (VerificationError, InvalidHash):
+            return False
+
+    try:
+        return check_password_hash(password_hash, password)
+    except ValueError:
+        # Unknown hash method
+        return False
+
+def password_needs_rehash(password_hash: str) -> bool:
+    """Check whether a stored hash should be upgraded to the current argon2 parameters"""
+    if not ARGON2_AVAILABLE:
+        return False
+    if not password_hash.startswith(_ARGON2_PREFIX):
+        return True
+    try:
+        return _PH.check_needs_rehash(password_hash)
+    except InvalidHash:
+        return True
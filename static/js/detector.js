@@ -172,6 +172,22 @@ async function triggerManualRetrain() {
   }
 }
 
+async function waitForRetrainTask(taskId, intervalMs = 2000) {
+  while (true) {
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+
+    const response = await fetch(`/retrain-status/${encodeURIComponent(taskId)}`);
+    const task = await response.json();
+
+    if (!response.ok) {
+      return { success: false, message: task.error || 'Retraining status is unavailable.' };
+    }
+    if (task.state === 'success' || task.state === 'failed') {
+      return task;
+    }
+  }
+}
+
 async function performRetraining() {
   const retrainBtn = document.getElementById('retrainBtn');
   
@@ -195,7 +211,13 @@ async function performRetraining() {
       }
     });
 
-    const result = await response.json();
+    let result = await response.json();
+
+    // Retraining runs in the background; poll until it finishes
+    if (result.task_id && (response.status === 202 || response.status === 409)) {
+      console.log(`⏳ Retraining task ${result.task_id} started, waiting for completion...`);
+      result = await waitForRetrainTask(result.task_id);
+    }
 
     if (result.success) {
       console.log('✅ Manual retraining completed successfully:', result);
@@ -27,6 +27,7 @@ CREATE TABLE IF NOT EXISTS articles (
     title VARCHAR(255) NOT NULL,
     link VARCHAR(2048),
     content TEXT NOT NULL,
+    content_hash CHAR(32), -- blake2b of normalized link + content preview, for duplicate lookups
     summary TEXT,
     input_type VARCHAR(10) NOT NULL CHECK (input_type IN ('url', 'snippet')),
     analysis_date TIMESTAMPTZ DEFAULT NOW(),
@@ -49,6 +50,17 @@ UNIQUE (user_id, title, link, summary);
 CREATE INDEX IF NOT EXISTS idx_articles_user_id ON articles(user_id);
 CREATE INDEX IF NOT EXISTS idx_articles_analysis_date ON articles(analysis_date);
 
+-- History listing: newest-first keyset paging, optionally filtered by owner/classification/input type
+CREATE INDEX IF NOT EXISTS idx_articles_created ON articles(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_articles_user_created ON articles(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_articles_class_created ON articles(classification, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_articles_input_created ON articles(input_type, created_at DESC, id DESC);
+-- Duplicate lookups by title and link
+CREATE INDEX IF NOT EXISTS idx_articles_title_link ON articles(title, link);
+-- Global duplicate check before analysis (column added for databases created before it existed)
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS content_hash CHAR(32);
+CREATE INDEX IF NOT EXISTS idx_articles_content_hash ON articles(content_hash);
+
 -- Breakdowns table - Detailed AI-generated factuality analysis
 CREATE TABLE IF NOT EXISTS breakdowns (
     id SERIAL PRIMARY KEY,
@@ -111,6 +123,22 @@ CREATE TABLE IF NOT EXISTS user_game_stats (
 -- Create index for user_game_stats table
 CREATE INDEX IF NOT EXISTS idx_user_game_stats_user_id ON user_game_stats(user_id);
 
+-- Game Results table - Per-stage completion details
+CREATE TABLE IF NOT EXISTS game_results (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    stage INTEGER,
+    total_xp INTEGER,
+    accuracy DECIMAL(5,2),
+    average_time DECIMAL(8,2),
+    answers JSONB,
+    completed_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Create index for game_results table
+CREATE INDEX IF NOT EXISTS idx_game_results_user_id ON game_results(user_id);
+
 -- Password Reset Requests table - Admin-controlled password resets
 CREATE TABLE IF NOT EXISTS password_reset_requests (
     id SERIAL PRIMARY KEY,
@@ -127,6 +155,17 @@ CREATE TABLE IF NOT EXISTS password_reset_requests (
 CREATE INDEX IF NOT EXISTS idx_password_reset_requests_user_id ON password_reset_requests(user_id);
 CREATE INDEX IF NOT EXISTS idx_password_reset_requests_status ON password_reset_requests(status);
 
+-- Password Reset Tokens table - Single-use reset tokens, stored only as SHA-256 hashes
+CREATE TABLE IF NOT EXISTS password_reset_tokens (
+    token_hash CHAR(64) PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    expires_at TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Create index for password_reset_tokens table
+CREATE INDEX IF NOT EXISTS idx_password_reset_tokens_user_id ON password_reset_tokens(user_id);
+
 -- Admin Logs table - Audit trail for admin actions
 CREATE TABLE IF NOT EXISTS admin_logs (
     id SERIAL PRIMARY KEY,
@@ -140,6 +179,14 @@ CREATE TABLE IF NOT EXISTS admin_logs (
 CREATE INDEX IF NOT EXISTS idx_admin_logs_admin_id ON admin_logs(admin_id);
 CREATE INDEX IF NOT EXISTS idx_admin_logs_timestamp ON admin_logs(timestamp);
 
+-- Newest copy of each article (by title and link) across all users, used when admins hide duplicates
+CREATE OR REPLACE VIEW articles_unique AS
+SELECT * FROM (
+    SELECT a.*, ROW_NUMBER() OVER (PARTITION BY a.title, a.link ORDER BY a.created_at DESC, a.id DESC) AS duplicate_rank
+    FROM articles a
+) ranked
+WHERE duplicate_rank = 1;
+
 -- Function to automatically update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -149,6 +196,18 @@ BEGIN
 END;
 $$ language 'plpgsql';
 
+-- Delete an article and every other user's copy of it (same title and link) in one statement
+CREATE OR REPLACE FUNCTION delete_article_duplicates(target_article_id INTEGER)
+RETURNS TABLE (id INTEGER, user_id INTEGER) AS $$
+    WITH target AS (
+        SELECT title, link FROM articles WHERE articles.id = target_article_id
+    )
+    DELETE FROM articles a
+    USING target t
+    WHERE a.title = t.title AND a.link IS NOT DISTINCT FROM t.link
+    RETURNING a.id, a.user_id;
+$$ LANGUAGE sql;
+
 -- Create triggers for updated_at fields
 CREATE TRIGGER update_articles_updated_at 
     BEFORE UPDATE ON articles 
@@ -199,5 +258,8 @@ COMMENT ON TABLE breakdowns IS 'Stores detailed AI-generated factuality analysis
 COMMENT ON TABLE crosscheckresults IS 'Stores individual cross-reference verification results from trusted news sources';
 COMMENT ON TABLE feedback IS 'User feedback table for collecting opinions, suggestions, and bug reports';
 COMMENT ON TABLE user_game_stats IS 'Game statistics tracking for user progress display';
+COMMENT ON TABLE game_results IS 'Per-stage game completion details';
 COMMENT ON TABLE password_reset_requests IS 'Password reset requests tracking for admin-controlled resets';
+COMMENT ON TABLE password_reset_tokens IS 'Outstanding password reset tokens (SHA-256 of the emailed token), deleted once used';
 COMMENT ON TABLE admin_logs IS 'Admin action logging for auditing and tracking administrative actions';
+COMMENT ON VIEW articles_unique IS 'Newest copy of each distinct article (title, link) for de-duplicated admin listings';
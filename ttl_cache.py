@@ -0,0 +1,100 @@
+"""
+TruthGuard in-process TTL cache
+Thread-safe key/value cache with per-entry expiry, shared by the database and route layers.
+"""
+
+import threading
+import time
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe mapping whose entries expire ttl seconds after being stored"""
+
+    def __init__(self, ttl, maxsize=1024, load_timeout=10):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.load_timeout = load_timeout
+        self._data = {}  # key -> (expires_at, value)
+        self._loading = {}  # key -> Event set when the in-flight load finishes
+        self._generation = 0  # bumped on invalidation so in-flight loads don't store stale values
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= time.monotonic():
+            with self._lock:
+                if self._data.get(key) is entry:
+                    del self._data[key]
+            return default
+        return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Store value under key for ttl seconds (defaults to the cache ttl)"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data.pop(key, None)
+            if len(self._data) >= self.maxsize:
+                self._evict()
+            self._data[key] = (expires_at, value)
+
+    def get_or_load(self, key, loader, ttl=None):
+        """
+        Return the cached value for key, calling loader() on a miss.
+        Concurrent misses for the same key are coalesced: one caller loads while the
+        others wait for its result. None results are returned but not cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            event = self._loading.get(key)
+            is_loader = event is None
+            if is_loader:
+                event = self._loading[key] = threading.Event()
+            generation = self._generation
+
+        if not is_loader:
+            event.wait(self.load_timeout)
+            value = self.get(key, _MISSING)
+            # Fall back to loading directly if the other load failed or timed out
+            return loader() if value is _MISSING else value
+
+        try:
+            value = loader()
+            if value is not None:
+                with self._lock:
+                    stale = generation != self._generation
+                if not stale:
+                    self.set(key, value, ttl)
+            return value
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            event.set()
+
+    def invalidate(self, *keys):
+        """Drop the given keys from the cache"""
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def _evict(self):
+        """Remove expired entries, then the oldest ones, until there is room (lock held)"""
+        now = time.monotonic()
+        for key in [key for key, entry in self._data.items() if entry[0] <= now]:
+            del self._data[key]
+        while len(self._data) >= self.maxsize:
+            del self._data[next(iter(self._data))]
@@ -1,4 +1,5 @@
 from flask import Flask, jsonify, session
+from flask.json.provider import DefaultJSONProvider
 import pandas as pd
 import numpy as np
 import nltk
@@ -10,6 +11,29 @@ import joblib
 import json
 from datetime import datetime
 import threading
+import queue
+import atexit
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Logging goes through a queue drained by a background listener, so request
+# threads never block on handler I/O
+_log_queue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s'))
+_log_listener = QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logging.getLogger().addHandler(QueueHandler(_log_queue))
+logging.getLogger().setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+# Supabase's HTTP client logs every request at INFO
+logging.getLogger('httpx').setLevel(logging.WARNING)
 
 # Import database with Supabase support
 from database import DatabaseService, init_database_with_supabase_support, User
@@ -31,14 +55,57 @@ from crosscheck import cross_checker
 
 warnings.filterwarnings('ignore')
 
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that serializes and parses with orjson.
+    Datetimes are passed through to Flask's default handler so their format is unchanged."""
+
+    option = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if ORJSON_AVAILABLE else 0
+
+    def _dump_bytes(self, obj, sort_keys=False, indent=None):
+        option = self.option
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        return self._dump_bytes(obj, kwargs.get('sort_keys', False), kwargs.get('indent')).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Match DefaultJSONProvider: pretty-print in debug unless compact is set
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._dump_bytes(obj, self.sort_keys, indent), mimetype=self.mimetype
+        )
+
 app = Flask(__name__)
 
+# Use orjson for jsonify/get_json when available
+if ORJSON_AVAILABLE:
+    app.json = OrjsonProvider(app)
+
+# Always emit compact, unsorted JSON (no debug pretty-printing or key sorting)
+app.json.compact = True
+app.json.sort_keys = False
+
 # Configure Flask sessions
 import secrets
 app.secret_key = secrets.token_hex(16)  # Generate a secure secret key
 app.config['SESSION_TYPE'] = 'filesystem'
 app.config['PERMANENT_SESSION_LIFETIME'] = 86400  # 24 hours
 
+# Static files are served by Flask's built-in /static route with a cache lifetime.
+# Several assets are referenced without a version query, so the default stays at one day;
+# raise STATIC_MAX_AGE once every asset URL is versioned.
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = int(os.environ.get('STATIC_MAX_AGE', 86400))
+# Behind nginx/Apache configured for X-Sendfile, let the proxy stream static files
+app.use_x_sendfile = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+
 # Session cookie configuration for better incognito compatibility
 app.config['SESSION_COOKIE_SECURE'] = False  # Allow non-HTTPS for development
 app.config['SESSION_COOKIE_HTTPONLY'] = True  # Prevent XSS
@@ -60,6 +127,17 @@ try:
 except ImportError:
     print("⚠️ Flask-Mail not available - email functionality will be disabled")
 
+# Compress large JSON responses (optional - responses are sent uncompressed without Flask-Compress)
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_MIN_SIZE'] = 1024
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+try:
+    from flask_compress import Compress
+    Compress(app)
+    print("✅ Response compression enabled")
+except ImportError:
+    print("⚠️ Flask-Compress not available - responses will not be compressed")
+
 # Initialize database with Supabase support
 db = init_database_with_supabase_support(app)
 
@@ -69,6 +147,8 @@ _initialized = False
 # Initialize services globally so routes can access them
 detector = FakeNewsDetector()
 article_extractor = ArticleExtractor()
+# Boot the pooled Chrome instances in the background so the first link analysis doesn't pay for it
+threading.Thread(target=article_extractor.warm_driver_pool, name='chrome-pool-warmup', daemon=True).start()
 gemini_service = GeminiService()
 feedback_service = None  # Will be initialized after detector
 
@@ -77,6 +157,7 @@ app.detector = detector
 app.article_extractor = article_extractor
 app.gemini_service = gemini_service
 app.db_service = DatabaseService
+app.feedback_service = None  # Set by initialize_feedback_service_if_needed()
 
 def initialize_feedback_service_if_needed():
     """Initialize feedback service if not already initialized"""
@@ -244,6 +325,8 @@ try:
     
     # Ensure feedback service is available before routes registration
     initialize_feedback_service_if_needed()
+    if app.feedback_service is None:
+        print("⚠️ Feedback service not initialized - feedback endpoints will return 503")
     
     register_routes(app)
     print("Routes registered successfully")
@@ -261,8 +344,8 @@ except ImportError as e:
                 status_info['accuracy'] = f"{detector.accuracy:.4f}"
                 status_info['status'] = f"Model ready (Accuracy: {detector.accuracy:.1%})"
             
-            # Use the global feedback_service or app.feedback_service
-            current_feedback_service = getattr(app, 'feedback_service', feedback_service)
+            # app.feedback_service is always defined (None until initialized)
+            current_feedback_service = app.feedback_service
             if current_feedback_service:
                 feedback_stats = current_feedback_service.get_feedback_stats()
                 status_info['feedback'] = feedback_stats